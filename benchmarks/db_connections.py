@@ -0,0 +1,93 @@
+"""
+Benchmark per-request connection setup against persistent connections
+
+Replays the database side of a spin request (company lookup, spin insert)
+inside Django's request_started/request_finished signals, so connections are
+opened and closed exactly as they are under gunicorn. Run it once per
+setting and compare requests/sec:
+
+    DJANGO_SETTINGS_MODULE=dawerha.production_settings python benchmarks/db_connections.py --conn-max-age 0
+    DJANGO_SETTINGS_MODULE=dawerha.production_settings python benchmarks/db_connections.py --conn-max-age 60
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dawerha.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.signals import request_finished, request_started  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+
+from companies.models import Company  # noqa: E402
+from game.models import GameSpin  # noqa: E402
+
+BENCHMARK_SLUG = 'benchmark-connections'
+
+
+def simulated_request(company_id):
+    """One request cycle: connect (if needed), read, write, release"""
+    request_started.send(sender=None)
+    try:
+        Company.objects.filter(pk=company_id).values_list('slug', 'prizes').first()
+        GameSpin.objects.create(
+            company_id=company_id,
+            visitor_name='benchmark',
+            prize='benchmark',
+            session_id='benchmark'
+        )
+    finally:
+        request_finished.send(sender=None)
+
+
+def run(requests, threads, company_id):
+    started = time.perf_counter()
+    if threads == 1:
+        for _ in range(requests):
+            simulated_request(company_id)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda _: simulated_request(company_id), range(requests)))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--conn-max-age', type=int, default=None,
+                        help='Override CONN_MAX_AGE (default: value from settings)')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WEB_THREADS', '2')),
+                        help='Concurrent request threads (like gunicorn --threads)')
+    args = parser.parse_args()
+
+    settings_dict = connections.settings['default']
+    if args.conn_max_age is not None:
+        settings_dict['CONN_MAX_AGE'] = args.conn_max_age
+        connection.close()
+
+    company, _ = Company.objects.get_or_create(
+        slug=BENCHMARK_SLUG,
+        defaults={'name': 'Benchmark Connections', 'type': 'other', 'email': 'benchmark@example.com',
+                  'phone': '0500000000', 'prizes': ['benchmark']}
+    )
+    try:
+        run(min(50, args.requests), args.threads, company.pk)  # warm up
+        elapsed = run(args.requests, args.threads, company.pk)
+    finally:
+        GameSpin.objects.filter(company=company).delete()
+        company.delete()
+
+    print(f"engine={settings_dict['ENGINE']} CONN_MAX_AGE={settings_dict['CONN_MAX_AGE']} "
+          f"pool={'pool' in settings_dict.get('OPTIONS', {})} threads={args.threads}")
+    print(f'{args.requests} requests in {elapsed:.2f}s -> {args.requests / elapsed:.1f} req/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Concurrency check for limited-stock prizes (PrizeStock.reserve)
+
+Fires several hundred parallel POST /game/spin/<slug>/ requests at a company
+whose favoured prize has a small stock and daily cap, then checks that the
+prize was never oversold and that the stock counters match the recorded
+spins. Prints p50/p99 latency and exits with status 1 on an oversell:
+
+    python benchmarks/prize_stock_concurrency.py
+    python benchmarks/prize_stock_concurrency.py --spins 1000 --threads 128 --remaining 50 --daily-cap 30
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dawerha.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.sessions.models import Session  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from companies.models import ActivationSchedule, Company, PrizeStock  # noqa: E402
+from game.models import GameSpin  # noqa: E402
+
+LIMITED_PRIZE = 'جائزة محدودة'
+OTHER_PRIZE = 'حظ أوفر'
+
+
+def use_scratch_database(path, remaining, daily_cap):
+    """Create the tables in a new SQLite file and a company with one limited prize"""
+    connections.settings['default']['NAME'] = path
+    connection.close()
+
+    with connection.schema_editor() as editor:
+        for model in (Company, ActivationSchedule, PrizeStock, GameSpin, Session):
+            editor.create_model(model)
+
+    # The limited prize is drawn 90% of the time, so it sells out early in the run
+    company = Company.objects.create(
+        name='Benchmark Stock', slug='benchmark-stock', type='other',
+        email='benchmark@example.com', phone='0500000000',
+        prizes=[LIMITED_PRIZE, OTHER_PRIZE], status='approved', is_active=True,
+        notes=json.dumps({'prize_percentages': [90, 10]}, ensure_ascii=False)
+    )
+    stock = PrizeStock.objects.create(company=company, prize=LIMITED_PRIZE, remaining=remaining, daily_cap=daily_cap)
+    return company, stock
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--spins', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--remaining', type=int, default=20, help='Initial stock of the limited prize')
+    parser.add_argument('--daily-cap', type=int, default=15, help='Daily cap of the limited prize')
+    args = parser.parse_args()
+
+    if connections.settings['default']['ENGINE'] != 'django.db.backends.sqlite3':
+        parser.error('this benchmark needs the SQLite settings')
+    if args.spins < args.threads:
+        parser.error('--spins must be at least --threads')
+
+    settings.ALLOWED_HOSTS.append('testserver')
+    settings.PLAY_PAGE_CACHE_TIMEOUT = 0
+
+    local = threading.local()
+    start = threading.Barrier(args.threads)
+
+    def spin(index):
+        if not hasattr(local, 'client'):
+            local.client = Client()
+            # Release all threads at once so the first spins really race
+            start.wait()
+        started = time.perf_counter()
+        response = local.client.post(
+            f'/game/spin/{company.slug}/',
+            json.dumps({'visitor_name': f'زائر {index}'}),
+            content_type='application/json'
+        )
+        return response.status_code, (time.perf_counter() - started) * 1000
+
+    with tempfile.TemporaryDirectory() as directory:
+        company, stock = use_scratch_database(os.path.join(directory, 'stock.sqlite3'), args.remaining, args.daily_cap)
+
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            results = list(pool.map(spin, range(args.spins)))
+
+        awarded = GameSpin.objects.filter(company=company, prize=LIMITED_PRIZE).count()
+        recorded = GameSpin.objects.filter(company=company).count()
+        stock.refresh_from_db()
+        connections.close_all()
+
+    latencies = sorted(ms for _, ms in results)
+    failed = sum(1 for status, _ in results if status != 200)
+    limit = min(args.remaining, args.daily_cap)
+    print(f'{args.spins} spins from {args.threads} threads: {recorded} recorded, {failed} failed')
+    print(f'p50 {latencies[len(latencies) // 2]:.1f}ms  p99 {latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)]:.1f}ms')
+    print(f'limited prize awarded {awarded} (limit {limit}); remaining {stock.remaining}, daily_awarded {stock.daily_awarded}')
+
+    problems = []
+    if awarded > limit:
+        problems.append(f'oversold: {awarded} awarded > {limit}')
+    if stock.remaining < 0:
+        problems.append(f'remaining went negative: {stock.remaining}')
+    if stock.remaining != args.remaining - awarded or stock.daily_awarded != awarded:
+        problems.append('stock counters do not match the recorded spins')
+    if problems:
+        for problem in problems:
+            print(f'FAIL: {problem}')
+        sys.exit(1)
+    print('OK: no oversell')
+
+
+if __name__ == '__main__':
+    main()
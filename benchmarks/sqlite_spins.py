@@ -0,0 +1,101 @@
+"""
+Concurrent spin benchmark for the single-node SQLite setup
+
+Runs POST /game/spin/<slug>/ from several threads against a scratch SQLite
+file and reports throughput and failed spins, once with the plain SQLite
+defaults and once with the tuning profile from settings (WAL, busy timeout,
+synchronous=NORMAL, IMMEDIATE transactions):
+
+    python benchmarks/sqlite_spins.py --profile default
+    python benchmarks/sqlite_spins.py --profile tuned
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dawerha.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.sessions.models import Session  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from companies.models import ActivationSchedule, Company, PrizeStock  # noqa: E402
+from game.models import GameSpin  # noqa: E402
+
+
+def use_scratch_database(path, profile):
+    """Point the default alias at a new SQLite file with the chosen profile"""
+    settings_dict = connections.settings['default']
+    settings_dict['NAME'] = path
+    if profile == 'default':
+        settings_dict['OPTIONS'] = {}
+    connection.close()
+
+    with connection.schema_editor() as editor:
+        for model in (Company, ActivationSchedule, PrizeStock, GameSpin, Session):
+            editor.create_model(model)
+
+    return Company.objects.create(
+        name='Benchmark SQLite', slug='benchmark-sqlite', type='other',
+        email='benchmark@example.com', phone='0500000000',
+        prizes=['خصم 10%', 'قهوة مجانية', 'حظ أوفر'], status='approved', is_active=True
+    )
+
+
+def spin(client, slug, index):
+    response = client.post(
+        f'/game/spin/{slug}/',
+        json.dumps({'visitor_name': f'زائر {index}'}),
+        content_type='application/json'
+    )
+    return response.status_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', choices=['default', 'tuned'], default='tuned')
+    parser.add_argument('--spins', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    if connections.settings['default']['ENGINE'] != 'django.db.backends.sqlite3':
+        parser.error('this benchmark needs the SQLite settings')
+    if args.profile == 'tuned' and not settings.SQLITE_TUNING:
+        parser.error('SQLITE_TUNING is disabled in settings')
+
+    settings.ALLOWED_HOSTS.append('testserver')
+    settings.PLAY_PAGE_CACHE_TIMEOUT = 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        company = use_scratch_database(os.path.join(directory, 'bench.sqlite3'), args.profile)
+        clients = [Client() for _ in range(args.threads)]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            statuses = list(pool.map(
+                lambda i: spin(clients[i % args.threads], company.slug, i), range(args.spins)
+            ))
+        elapsed = time.perf_counter() - started
+
+        recorded = GameSpin.objects.count()
+        connections.close_all()
+
+    failed = sum(1 for status in statuses if status != 200)
+    print(f'profile={args.profile} threads={args.threads}')
+    print(f'{args.spins} spins in {elapsed:.2f}s -> {args.spins / elapsed:.1f} spins/s, '
+          f'{failed} failed, {recorded} recorded')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+"""
+End-to-end benchmark suite for the play, spin, registration and admin paths
+
+Seeds a scratch SQLite database with realistic data through the
+generate_load_data command (scheduled companies, GameSpin history, large
+participant lists), drives each endpoint through the
+Django test client and records latency percentiles and SQL query counts.
+Every endpoint is measured --rounds times and its best round (lowest
+median) is kept, so a slow round on a busy machine does not count as a
+regression. The results are compared with benchmarks/baseline.json; the run
+fails when an endpoint's median latency regresses by more than --threshold
+or it runs more queries than the baseline:
+
+    python benchmarks/suite.py
+    python benchmarks/suite.py --scale medium --db /tmp/bench.sqlite3   # keep and reuse the seeded file
+    python benchmarks/suite.py --only game:spin --iterations 200
+    python benchmarks/suite.py --update-baseline
+
+Latencies depend on the machine; refresh the baseline (--update-baseline)
+on the machine that runs the comparison.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dawerha.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.apps import apps  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from companies.models import Company  # noqa: E402
+from game.models import GameSpin  # noqa: E402
+from influencers.models import Influencer, Participant  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'baseline.json'
+
+SCALES = {
+    'small': {'companies': 20, 'spins': 200_000, 'influencers': 5, 'participants': 100_000},
+    'medium': {'companies': 100, 'spins': 2_000_000, 'influencers': 20, 'participants': 1_000_000},
+}
+
+BENCH_PREFIX = 'bench'
+BENCH_SLUG = f'{BENCH_PREFIX}-company-0'
+BENCH_INFLUENCER = f'{BENCH_PREFIX}-influencer-0'
+ADMIN_USERNAME = 'bench-admin'
+
+
+def seed(scale, seed_value, workers, state_file):
+    """
+    Generate the dataset with generate_load_data (resumes a partly seeded --db),
+    then pin down the measured company and influencer
+    """
+    call_command(
+        'generate_load_data', prefix=BENCH_PREFIX, seed=seed_value, workers=workers,
+        state_file=state_file, stdout=io.StringIO(), **scale
+    )
+
+    # The measured company stays active for the whole run: no schedule can end
+    # its activation and no limited-stock prize can sell out
+    now = timezone.now()
+    company = Company.objects.get(slug=BENCH_SLUG)
+    company.schedules.all().delete()
+    company.prize_stocks.all().delete()
+    Company.objects.filter(pk=company.pk).update(
+        status='approved', is_active=True,
+        activation_start_time=now - timedelta(hours=1), activation_end_time=now + timedelta(days=365)
+    )
+    Influencer.objects.filter(slug=BENCH_INFLUENCER).update(status='approved', is_active=True)
+
+    User = get_user_model()
+    if not User.objects.filter(username=ADMIN_USERNAME).exists():
+        User.objects.create_superuser(ADMIN_USERNAME, 'admin@example.com', 'bench-password')
+
+
+@dataclass
+class Case:
+    """One benchmarked endpoint; body builds the POST payload for request i"""
+    name: str
+    path: str
+    method: str = 'GET'
+    body: object = None
+    staff: bool = False
+    expected: tuple = (200,)
+
+
+def build_cases(influencer_id):
+    return [
+        Case('game:play', f'/game/play/{BENCH_SLUG}/'),
+        Case('game:wheel_config', f'/game/config/{BENCH_SLUG}/'),
+        Case('game:spin', f'/game/spin/{BENCH_SLUG}/', 'POST',
+             body=lambda i: {'visitor_name': f'زائر {i}'}),
+        Case('influencers:play_wheel', f'/influencers/play/{BENCH_INFLUENCER}/'),
+        Case('influencers:register_participant_submit', f'/influencers/register-participant/{BENCH_INFLUENCER}/submit/',
+             'POST', body=lambda i: {'name': 'مشارك', 'phone': f'059{i:07d}',
+                                     'social_media_account': '@bench', 'city': 'جدة'}),
+        Case('influencers:participants_count', f'/influencers/participants-count/{BENCH_INFLUENCER}/'),
+        Case('influencers:spin_wheel', f'/influencers/spin/{BENCH_INFLUENCER}/', 'POST', body=lambda i: {}),
+        Case('influencers:dashboard', f'/influencers/dashboard/{influencer_id}/'),
+        Case('admin:companies_company_changelist', '/admin/companies/company/', staff=True),
+        Case('admin:game_gamespin_changelist', '/admin/game/gamespin/', staff=True),
+        Case('admin:influencers_participant_changelist', '/admin/influencers/participant/', staff=True),
+    ]
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def run_case(case, client, iterations, warmup, counter):
+    latencies = []
+    queries = []
+    errors = 0
+    for i in range(warmup + iterations):
+        number = next(counter)
+        kwargs = {}
+        if case.body is not None:
+            kwargs = {'data': json.dumps(case.body(number)), 'content_type': 'application/json'}
+        # The log is capped (9000 entries); once full, captured counts would read 0
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.generic(case.method, case.path, **kwargs)
+            elapsed = time.perf_counter() - started
+        if i < warmup:
+            continue
+        latencies.append(elapsed * 1000)
+        queries.append(len(captured))
+        if response.status_code not in case.expected:
+            errors += 1
+
+    return {
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p90_ms': round(percentile(latencies, 90), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'queries': int(statistics.median(queries)),
+        'errors': errors,
+    }
+
+
+def best_round(rounds):
+    """The round with the lowest median; errors from any round are kept"""
+    best = dict(min(rounds, key=lambda result: result['p50_ms']))
+    best['errors'] = max(result['errors'] for result in rounds)
+    return best
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Return a list of regression messages"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        limit = max(previous['p50_ms'] * (1 + threshold), previous['p50_ms'] + min_delta_ms)
+        if result['p50_ms'] > limit:
+            regressions.append(f"{name}: p50 {result['p50_ms']:.2f}ms > {previous['p50_ms']:.2f}ms baseline")
+        if result['queries'] > previous['queries']:
+            regressions.append(f"{name}: {result['queries']} queries > {previous['queries']} baseline")
+        if result['errors']:
+            regressions.append(f"{name}: {result['errors']} unexpected status code(s)")
+    return regressions
+
+
+def use_database(path):
+    """Point the default alias at a SQLite file and create any missing tables"""
+    connections.settings['default']['NAME'] = path
+    connection.close()
+
+    # Built from the models: the game migrations add visitor_phone twice and
+    # cannot run on an empty database
+    existing = set(connection.introspection.table_names())
+    with connection.schema_editor() as editor:
+        for model in apps.get_models():
+            if model._meta.db_table not in existing:
+                editor.create_model(model)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--db', help='SQLite file to seed and keep (reused when already seeded)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the generated data')
+    parser.add_argument('--workers', type=int, default=4, help='Parallel workers for seeding')
+    parser.add_argument('--iterations', type=int, default=50, help='Measured requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per endpoint')
+    parser.add_argument('--rounds', type=int, default=3, help='Measure every endpoint this often and keep the best round')
+    parser.add_argument('--only', action='append', help='Only run this endpoint (repeatable)')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--threshold', type=float, default=0.5, help='Allowed p50 slowdown (0.5 = 50%%)')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                        help='Ignore slowdowns smaller than this (timer noise on fast endpoints)')
+    parser.add_argument('--update-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--output', type=Path, help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    if connections.settings['default']['ENGINE'] != 'django.db.backends.sqlite3':
+        parser.error('the suite seeds a scratch SQLite database; run it with the SQLite settings')
+
+    # Measure the production code paths: no query log, no SSL redirect for the test client
+    settings.DEBUG = False
+    settings.SECURE_SSL_REDIRECT = False
+    settings.ALLOWED_HOSTS.append('testserver')
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = args.db or os.path.join(directory, 'suite.sqlite3')
+        use_database(database)
+        started = time.perf_counter()
+        seed(SCALES[args.scale], args.seed, args.workers, f'{database}.load_state.json')
+        print(f'Seeded {args.scale} dataset in {time.perf_counter() - started:.1f}s')
+
+        influencer = Influencer.objects.get(slug=BENCH_INFLUENCER)
+        admin = get_user_model().objects.get(username=ADMIN_USERNAME)
+        cases = [case for case in build_cases(influencer.pk) if not args.only or case.name in args.only]
+
+        # Rows written by the measured requests are removed afterwards so a kept
+        # database (--db) stays identical between runs
+        last_spin = GameSpin.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        last_participant = Participant.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+        counter = iter(range(10 ** 7))
+        rounds = {case.name: [] for case in cases}
+        try:
+            for _ in range(args.rounds):
+                for case in cases:
+                    client = Client()
+                    if case.staff:
+                        client.force_login(admin)
+                    rounds[case.name].append(run_case(case, client, args.iterations, args.warmup, counter))
+        finally:
+            GameSpin.objects.filter(pk__gt=last_spin).delete()
+            Participant.objects.filter(pk__gt=last_participant).delete()
+            connections.close_all()
+        results = {name: best_round(measured) for name, measured in rounds.items()}
+
+    print(f"{'endpoint':<45} {'p50':>8} {'p90':>8} {'p99':>8} {'queries':>8} {'errors':>7}")
+    for name, result in results.items():
+        print(f"{name:<45} {result['p50_ms']:>8.2f} {result['p90_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+              f"{result['queries']:>8} {result['errors']:>7}")
+
+    report = {
+        'meta': {
+            'scale': args.scale, 'iterations': args.iterations, 'rounds': args.rounds,
+            'python': platform.python_version(),
+            'django': django.get_version(), 'machine': platform.machine(),
+        },
+        'results': results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+
+    if args.update_baseline:
+        if args.only and args.baseline.exists():
+            merged = json.loads(args.baseline.read_text(encoding='utf-8'))
+            merged['results'].update(results)
+            report['results'] = merged['results']
+        args.baseline.write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+        print(f'Baseline written to {args.baseline}')
+        return
+
+    if not args.baseline.exists():
+        print(f'No baseline at {args.baseline}; run with --update-baseline to create one')
+        return
+
+    baseline = json.loads(args.baseline.read_text(encoding='utf-8'))['results']
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    if regressions:
+        print('\nRegressions against the baseline:')
+        for message in regressions:
+            print(f'  {message}')
+        sys.exit(1)
+    print('\nNo regressions against the baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -3,19 +3,32 @@ Admin configuration for companies app
 """
 from django.contrib import admin
 from django.contrib.admin import SimpleListFilter
+from django.core.exceptions import PermissionDenied
 from django.db import models
+from django.db.models import F
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.utils import timezone
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 import json
+import math
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
 from datetime import datetime
-from .models import Company, ActivationSchedule
-from .utils import format_riyadh_datetime, format_arabic_datetime
+from dawerha.db_router import replica_reads, use_replica
+from dawerha.importing import ImportForm
+from .importer import import_companies, read_rows
+from .models import Company, ActivationSchedule, PrizeStock
+from .utils import format_riyadh_datetime, format_arabic_datetime, normalize_prize_percentages
+from game.distribution import get_prize_percentages
+from game.pagecache import invalidate_play_pages
+from game.ratelimit import invalidate_spin_limits_for
+from game.simulation import simulate_distribution
 
 
 class ActivationStatusFilter(SimpleListFilter):
@@ -184,9 +197,22 @@ class ActivationScheduleInline(admin.TabularInline):
     duration_hours_display.short_description = "المدة"
 
 
+class PrizeStockInline(admin.TabularInline):
+    """Inline admin for limited-stock prizes"""
+    model = PrizeStock
+    extra = 0
+    fields = ['prize', 'remaining', 'daily_cap', 'daily_awarded', 'daily_date']
+    readonly_fields = ['daily_awarded', 'daily_date']
+    
+    classes = ['collapse']
+    
+    verbose_name = "مخزون جائزة"
+    verbose_name_plural = "🎁 مخزون الجوائز المحدودة (الجوائز غير المضافة هنا غير محدودة)"
+
+
 @admin.register(Company)
 class CompanyAdmin(admin.ModelAdmin):
-    inlines = [ActivationScheduleInline]
+    inlines = [ActivationScheduleInline, PrizeStockInline]
     
     class Media:
         js = ('admin/js/company_status_updater.js', 'admin/js/prize_percentages.js',)
@@ -218,31 +244,8 @@ class CompanyAdmin(admin.ModelAdmin):
         
         # If percentages were submitted and match prizes count, normalize and save them
         if prize_percentages and len(prize_percentages) == len(prizes):
-            # Normalize percentages to sum to 100
-            total = sum(prize_percentages)
-            if total > 0:
-                # Normalize: (each_percentage / total) * 100
-                normalized = [(float(p) / total) * 100.0 for p in prize_percentages]
-                prize_percentages = [round(p) for p in normalized]
-                
-                # Adjust to ensure sum is exactly 100 (handle rounding errors)
-                current_sum = sum(prize_percentages)
-                if current_sum != 100:
-                    difference = 100 - current_sum
-                    max_idx = prize_percentages.index(max(prize_percentages))
-                    prize_percentages[max_idx] += difference
-                
-                # Ensure no percentage is less than 1
-                for i in range(len(prize_percentages)):
-                    if prize_percentages[i] < 1:
-                        prize_percentages[i] = 1
-                
-                # Re-adjust if needed
-                current_sum = sum(prize_percentages)
-                if current_sum != 100:
-                    difference = 100 - current_sum
-                    max_idx = prize_percentages.index(max(prize_percentages))
-                    prize_percentages[max_idx] += difference
+            # Whole percentages summing to 100, as at registration
+            prize_percentages = normalize_prize_percentages(prizes, prize_percentages)
             
             # Store in notes field
             prizes_with_percentages = [
@@ -278,7 +281,11 @@ class CompanyAdmin(admin.ModelAdmin):
             'fields': ('name', 'slug', 'type', 'custom_type', 'email', 'phone')
         }),
         ('إعدادات اللعبة', {
-            'fields': ('prizes', 'colors', 'logo_url', 'prize_percentages_editor')
+            'fields': ('prizes', 'colors', 'logo_url', 'prize_distribution_mode', 'prize_percentages_editor')
+        }),
+        ('حدود الدوران', {
+            'fields': ('spin_limit_per_phone_daily', 'spin_limit_per_ip_minute', 'kiosk_secret'),
+            'description': 'حماية العجلة من التكرار والبوتات (0 = بدون حد)'
         }),
         ('الحالة والإدارة', {
             'fields': ('status', 'is_active', 'active_hours', 'activation_start_time', 'activation_end_time', 'activation_status', 'notes')
@@ -478,6 +485,7 @@ class CompanyAdmin(admin.ModelAdmin):
         
         # Calculate total
         total = sum(prize_percentages)
+        simulate_url = reverse('admin:companies_company_simulate', args=[obj.pk])
         total_color = '#28a745' if total == 100 else '#ffc107' if total < 100 else '#dc3545'
         
         html = f'''
@@ -540,6 +548,17 @@ class CompanyAdmin(admin.ModelAdmin):
                     </tr>
                 </tfoot>
             </table>
+            <div id="prize-simulation" data-url="{simulate_url}" style="margin-top: 15px; padding: 12px; background: white; border-radius: 5px; border: 1px dashed #6A3FA0;">
+                <div style="display: flex; align-items: center; gap: 10px; flex-wrap: wrap;">
+                    <button type="button" id="prize-simulation-run" class="button" style="background: #6A3FA0; color: white;">🔮 محاكاة التوزيع</button>
+                    <label style="font-size: 13px; color: #666;">
+                        احتمال ظهور كل جائزة على الأقل
+                        <input type="number" id="prize-simulation-at-least" value="1" min="1" style="width: 70px; text-align: center;">
+                        مرة
+                    </label>
+                </div>
+                <div id="prize-simulation-results" style="margin-top: 10px;"></div>
+            </div>
         </div>
         '''
         
@@ -547,6 +566,98 @@ class CompanyAdmin(admin.ModelAdmin):
     prize_percentages_editor.short_description = '🎯 تعديل النسب المئوية للجوائز'
     prize_percentages_editor.allow_tags = True
     
+    def get_urls(self):
+        urls = [
+            path(
+                'import/',
+                self.admin_site.admin_view(self.import_view),
+                name='companies_company_import'
+            ),
+            path(
+                '<path:object_id>/simulate/',
+                self.admin_site.admin_view(self.simulate_view),
+                name='companies_company_simulate'
+            ),
+        ]
+        return urls + super().get_urls()
+    
+    def import_view(self, request):
+        """Import companies from a CSV/XLSX file (see companies/importer.py)"""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        
+        form = ImportForm(request.POST or None, request.FILES or None)
+        result = None
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                result = import_companies(
+                    read_rows(upload, upload.name),
+                    skip_invalid=form.cleaned_data['skip_invalid'],
+                    dry_run=form.cleaned_data['dry_run']
+                )
+            except ValueError as e:
+                form.add_error('file', str(e))
+            
+            if result and result.created and not result.errors:
+                self.message_user(request, f'✅ تم استيراد {result.created} شركة (قيد المراجعة)', level='success')
+                return redirect('admin:companies_company_changelist')
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'استيراد الشركات من ملف',
+            'opts': self.model._meta,
+            'form': form,
+            'result': result,
+            'valid_count': result.total - len(result.errors) if result else 0,
+        }
+        return TemplateResponse(request, 'admin/companies/company/import.html', context)
+    
+    def simulate_view(self, request, object_id):
+        """
+        Simulate the prize distribution for the weights in the editor
+        (?weights=5,20,75&at_least=1&mode=smooth), before they are saved.
+        Submitted weights are normalized as on save, so the preview runs on
+        the percentages the production sampler will use.
+        """
+        company = get_object_or_404(Company, pk=object_id)
+        prizes = [str(p).strip() for p in company.get_prizes_list() if p]
+        if not prizes:
+            return JsonResponse({'success': False, 'message': 'لا توجد جوائز'}, status=400)
+        
+        try:
+            weights = request.GET.get('weights')
+            if weights:
+                percentages = tuple(float(w) for w in weights.split(','))
+            else:
+                percentages = tuple(get_prize_percentages(company, prizes))
+            at_least = max(int(request.GET.get('at_least', 1)), 1)
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'قيم غير صحيحة'}, status=400)
+        
+        # float() also accepts nan/inf, which the simulation cannot sample from
+        if (len(percentages) != len(prizes) or not all(math.isfinite(p) and p >= 0 for p in percentages)
+                or not any(percentages)):
+            return JsonResponse({'success': False, 'message': 'عدد النسب يجب أن يساوي عدد الجوائز'}, status=400)
+        if weights:
+            # Whole percentages summing to 100, as saved; this also bounds the
+            # smooth round-robin period (1e9,1 would loop a billion times)
+            try:
+                percentages = tuple(normalize_prize_percentages(prizes, list(percentages)))
+            except ValueError as e:
+                return JsonResponse({'success': False, 'message': str(e)}, status=400)
+        
+        mode = request.GET.get('mode', company.prize_distribution_mode)
+        if mode not in dict(Company.DISTRIBUTION_CHOICES):
+            return JsonResponse({'success': False, 'message': 'طريقة التوزيع غير معروفة'}, status=400)
+        return JsonResponse({
+            'success': True,
+            'mode': mode,
+            'at_least': at_least,
+            'prizes': prizes,
+            'results': simulate_distribution(percentages, mode, at_least),
+        })
+    
     def schedules_summary(self, obj):
         """Display summary of active schedules"""
         schedules = obj.schedules.all()
@@ -588,14 +699,22 @@ class CompanyAdmin(admin.ModelAdmin):
         return format_html(html)
     schedules_summary.short_description = 'ملخص الجدولة'
     
+    def _invalidate_company_caches(self, slugs):
+        """queryset.update() sends no post_save; drop the cached play pages and spin limits"""
+        invalidate_play_pages(slugs)
+        invalidate_spin_limits_for(slugs)
+    
     def activate_companies(self, request, queryset):
         """تفعيل الشركات المحددة بشكل دائم (بدون حد زمني)"""
+        slugs = list(queryset.values_list('slug', flat=True))
         updated = queryset.update(
             is_active=True, 
             status='approved',
+            version=F('version') + 1,
             activation_start_time=None,
             activation_end_time=None
         )
+        self._invalidate_company_caches(slugs)
         self.message_user(
             request, 
             f'✅ تم تفعيل {updated} شركة بشكل دائم (تفعيل مستمر بدون حد زمني).',
@@ -605,11 +724,14 @@ class CompanyAdmin(admin.ModelAdmin):
     
     def deactivate_companies(self, request, queryset):
         """إلغاء تفعيل الشركات المحددة"""
+        slugs = list(queryset.values_list('slug', flat=True))
         updated = queryset.update(
             is_active=False,
+            version=F('version') + 1,
             activation_start_time=None,
             activation_end_time=None
         )
+        self._invalidate_company_caches(slugs)
         self.message_user(
             request, 
             f'تم إلغاء تفعيل {updated} شركة.',
@@ -625,6 +747,7 @@ class CompanyAdmin(admin.ModelAdmin):
         no_schedule_count = 0
         details = []
         exact_hour_details = []
+        conflict_details = []
         
         for company in queryset:
             # Get active schedules
@@ -647,9 +770,11 @@ class CompanyAdmin(admin.ModelAdmin):
                     break
                 elif can_activate:
                     # Can activate immediately (before start_hour by 1 minute or after)
-                    company.activate_now(hours=schedule.duration_hours, scheduled_hour=schedule.start_hour, scheduled_end_hour=schedule.end_hour)
-                    schedule.last_activation = timezone.now()
-                    schedule.save()
+                    if not company.activate_now(hours=schedule.duration_hours, scheduled_hour=schedule.start_hour, scheduled_end_hour=schedule.end_hour):
+                        conflict_details.append(f"🔄 {company.name}: تم تعديل الشركة في نفس الوقت، أعد المحاولة")
+                        activated = True
+                        break
+                    schedule.mark_activated()
                     
                     activated_count += 1
                     end_time = format_arabic_datetime(company.activation_end_time)
@@ -674,6 +799,9 @@ class CompanyAdmin(admin.ModelAdmin):
         if no_schedule_count > 0:
             message_parts.append(f'⚠️ {no_schedule_count} شركة بدون جداول نشطة')
         
+        if conflict_details:
+            message_parts.extend(conflict_details[:10])
+        
         # Only show details for activated companies
         if details:
             if activated_count > 0:
@@ -700,11 +828,16 @@ class CompanyAdmin(admin.ModelAdmin):
             else:
                 # Export all if nothing selected
                 queryset = self.get_queryset(request)
-            return self.export_to_excel(request, queryset)
+            with replica_reads():
+                return self.export_to_excel(request, queryset)
         
         extra_context = extra_context or {}
         extra_context['show_export_button'] = True
         extra_context['export_action_name'] = 'export_to_excel'
+        extra_context['import_url'] = reverse('admin:companies_company_import')
+        if request.method == 'GET':
+            # List pages read from the replica; actions (POST) stay on the primary
+            return use_replica(super().changelist_view)(request, extra_context)
         return super().changelist_view(request, extra_context)
     
     def export_to_excel(self, request, queryset):
@@ -914,23 +1047,26 @@ class ActivationScheduleAdmin(admin.ModelAdmin):
     
     def status_indicator(self, obj):
         """Show real-time company activation status"""
-        # Get company activation status
-        company_status = obj.get_company_activation_status()
+        # Get company activation status (company is already select_related)
+        company_status = obj.get_company_activation_status(refresh=False)
         
-        # Add data attribute for AJAX updates
+        # Add data attributes for AJAX updates (batched status endpoint)
         status_id = f"schedule-status-{obj.id}"
+        status_url = reverse('companies:schedules_status')
         
         if not obj.is_active:
             return format_html(
-                '<span id="{}" style="color: #dc3545;">⏸️ الجدولة متوقفة</span>',
-                status_id
+                '<span id="{}" data-status-url="{}" style="color: #dc3545;">⏸️ الجدولة متوقفة</span>',
+                status_id,
+                status_url
             )
         
         # Show company activation status
         if company_status['is_active']:
             return format_html(
-                '<span id="{}" style="color: {}; font-weight: bold;">✅ {}</span>',
+                '<span id="{}" data-status-url="{}" style="color: {}; font-weight: bold;">✅ {}</span>',
                 status_id,
+                status_url,
                 company_status['color'],
                 company_status['display']
             )
@@ -938,13 +1074,15 @@ class ActivationScheduleAdmin(admin.ModelAdmin):
             # Check if should activate soon
             if obj.should_activate_soon():
                 return format_html(
-                    '<span id="{}" style="color: #ffc107;">⏳ جاهز للتفعيل (ضمن النطاق)</span>',
-                    status_id
+                    '<span id="{}" data-status-url="{}" style="color: #ffc107;">⏳ جاهز للتفعيل (ضمن النطاق)</span>',
+                    status_id,
+                    status_url
                 )
             else:
                 return format_html(
-                    '<span id="{}" style="color: #6c757d;">⏳ {} - خارج نطاق الجدولة</span>',
+                    '<span id="{}" data-status-url="{}" style="color: #6c757d;">⏳ {} - خارج نطاق الجدولة</span>',
                     status_id,
+                    status_url,
                     company_status['display']
                 )
     status_indicator.short_description = 'حالة الشركة'
@@ -975,13 +1113,19 @@ class ActivationScheduleAdmin(admin.ModelAdmin):
     
     def activate_selected_schedules(self, request, queryset):
         """Activate selected schedules"""
+        # Schedules decide the inactive page and its expiry; update() sends no post_save
+        slugs = list(Company.objects.filter(schedules__in=queryset).values_list('slug', flat=True).distinct())
         count = queryset.update(is_active=True)
+        invalidate_play_pages(slugs)
         self.message_user(request, f'تم تفعيل {count} جدولة')
     activate_selected_schedules.short_description = 'تفعيل الجدولة المحددة'
     
     def deactivate_selected_schedules(self, request, queryset):
         """Deactivate selected schedules"""
+        # Schedules decide the inactive page and its expiry; update() sends no post_save
+        slugs = list(Company.objects.filter(schedules__in=queryset).values_list('slug', flat=True).distinct())
         count = queryset.update(is_active=False)
+        invalidate_play_pages(slugs)
         self.message_user(request, f'تم إيقاف {count} جدولة')
     deactivate_selected_schedules.short_description = 'إيقاف الجدولة المحددة'
     
@@ -996,11 +1140,15 @@ class ActivationScheduleAdmin(admin.ModelAdmin):
             else:
                 # Export all if nothing selected
                 queryset = self.get_queryset(request)
-            return self.export_to_excel(request, queryset)
+            with replica_reads():
+                return self.export_to_excel(request, queryset)
         
         extra_context = extra_context or {}
         extra_context['show_export_button'] = True
         extra_context['export_action_name'] = 'export_to_excel'
+        if request.method == 'GET':
+            # List pages read from the replica; actions (POST) stay on the primary
+            return use_replica(super().changelist_view)(request, extra_context)
         return super().changelist_view(request, extra_context)
     
     def export_to_excel(self, request, queryset):
@@ -0,0 +1,128 @@
+"""
+Bulk company import from CSV or XLSX files
+
+Used by the admin import page and the import_companies command. Every row is
+validated first; prize percentages are normalized with the same rules as
+register_company. Reading, slug allocation and the bulk insert are shared
+with the influencer import (dawerha/importing.py).
+
+Columns (first row; English or Arabic headers):
+    name / الاسم              required
+    type / النوع              required; key (restaurant) or label (مطعم)
+    custom_type / نوع مخصص    required when type is other
+    email / البريد الإلكتروني  required
+    phone / رقم الجوال        optional
+    prizes / الجوائز          required; separated by , or ، or |
+    prize_percentages / النسب  optional; same separators, equal split if empty
+"""
+import json
+import math
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+
+from dawerha.importing import import_rows, read_rows as read_import_rows, split_list
+
+from .models import Company
+from .utils import normalize_prize_percentages, pick_wheel_colors
+
+COLUMNS = {
+    'name': ('name', 'company', 'الاسم', 'اسم الجهة'),
+    'type': ('type', 'النوع', 'نوع الجهة'),
+    'custom_type': ('custom_type', 'customtype', 'نوع مخصص', 'النوع المخصص'),
+    'email': ('email', 'البريد الإلكتروني', 'البريد الالكتروني'),
+    'phone': ('phone', 'رقم الجوال', 'رقم التواصل', 'الجوال'),
+    'prizes': ('prizes', 'الجوائز'),
+    'prize_percentages': ('prize_percentages', 'percentages', 'النسب المئوية', 'النسب'),
+}
+REQUIRED_COLUMNS = ('name', 'type', 'email', 'prizes')
+
+_TYPE_LOOKUP = {
+    **{key: key for key, _ in Company.TYPE_CHOICES},
+    **{label: key for key, label in Company.TYPE_CHOICES},
+}
+
+
+def read_rows(fileobj, filename):
+    """
+    Yield (row_number, {column: text}) for each non-empty data row
+    Raises ValueError for an unsupported file or missing required columns
+    """
+    return read_import_rows(fileobj, filename, COLUMNS, REQUIRED_COLUMNS)
+
+
+def build_company(values):
+    """
+    Validate one row and return an unsaved pending Company
+    Raises ValueError with an Arabic message for invalid rows
+    """
+    name = values.get('name', '')
+    if len(name) < 2:
+        raise ValueError('اسم الجهة مطلوب (حرفان على الأقل)')
+    if len(name) > Company._meta.get_field('name').max_length:
+        raise ValueError('اسم الجهة طويل جداً')
+
+    company_type = _TYPE_LOOKUP.get(values.get('type', '').lower())
+    if not company_type:
+        raise ValueError(f"نوع الجهة غير معروف: {values.get('type') or '-'}")
+    custom_type = values.get('custom_type', '')
+    if company_type == 'other' and not custom_type:
+        raise ValueError('النوع المخصص مطلوب عند اختيار "أخرى"')
+    if len(custom_type) > Company._meta.get_field('custom_type').max_length:
+        raise ValueError('النوع المخصص طويل جداً')
+
+    email = values.get('email', '')
+    if not email:
+        raise ValueError('البريد الإلكتروني مطلوب')
+    try:
+        validate_email(email)
+    except ValidationError:
+        raise ValueError(f'البريد الإلكتروني غير صحيح: {email}')
+
+    phone = values.get('phone', '')
+    if len(phone) > Company._meta.get_field('phone').max_length:
+        raise ValueError('رقم الجوال طويل جداً')
+
+    prizes = split_list(values.get('prizes', ''))
+    if not prizes:
+        raise ValueError('يجب تحديد جوائز واحدة على الأقل')
+    try:
+        prize_percentages = [float(p) for p in split_list(values.get('prize_percentages', ''))]
+    except ValueError:
+        raise ValueError('النسب المئوية يجب أن تكون أرقاماً')
+    # float() also accepts nan, inf and overflows such as 1e309
+    if not all(math.isfinite(p) for p in prize_percentages):
+        raise ValueError('النسب المئوية يجب أن تكون أرقاماً')
+    prize_percentages = normalize_prize_percentages(prizes, prize_percentages)
+
+    # Same shape as register_company: names in prizes, percentages in notes
+    notes = json.dumps({
+        'prize_percentages': prize_percentages,
+        'prizes_with_percentages': [
+            {'name': prize, 'percentage': percentage}
+            for prize, percentage in zip(prizes, prize_percentages)
+        ]
+    }, ensure_ascii=False)
+
+    return Company(
+        name=name,
+        type=company_type,
+        custom_type=custom_type if company_type == 'other' else None,
+        email=email,
+        phone=phone or None,
+        prizes=prizes,
+        colors=pick_wheel_colors(len(prizes)),
+        notes=notes,
+        status='pending',
+        is_active=False
+    )
+
+
+def import_companies(rows, skip_invalid=False, dry_run=False):
+    """
+    Validate rows from read_rows() and bulk-insert the valid companies
+    (see dawerha.importing.import_rows)
+    Returns:
+        ImportResult
+    """
+    return import_rows(Company, rows, build_company, skip_invalid=skip_invalid, dry_run=dry_run)
@@ -0,0 +1,381 @@
+"""
+Management command to generate a large synthetic dataset for scale testing
+
+Creates companies (random schedules and prize weights), influencers, and
+GameSpin / Participant rows with realistic time and prize distributions:
+evening peaks, busier weekends (Thursday/Friday) and a few popular venues
+and influencers taking most of the traffic.
+
+    python manage.py generate_load_data --companies 200 --influencers 50 \\
+        --spins 100000000 --participants 20000000 --workers 8
+    python manage.py generate_load_data --clear
+
+Rows are generated in fixed-size chunks, each from its own random seed and
+with explicit primary keys, so the same arguments always produce the same
+dataset and an interrupted run resumes where it stopped: run the same
+command again. The plan (seed, key ranges, time window) is kept in a state
+file under logs/.
+"""
+import bisect
+import json
+import math
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from itertools import accumulate
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections
+from django.db.models import Max
+from django.utils import timezone
+
+from companies.models import ActivationSchedule, Company, PrizeStock
+from dawerha.db import retry_on_locked
+from game.models import GameSpin
+from influencers.models import Influencer, Participant
+
+PRIZE_POOL = [
+    'خصم 10%', 'خصم 20%', 'خصم 50%', 'قهوة مجانية', 'حلى مجاني',
+    'مشروب مجاني', 'بطاقة هدية', 'وجبة مجانية', 'حظ أوفر',
+]
+COLOR_POOL = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8', '#F7DC6F', '#BB8FCE', '#85C1E9']
+NAME_POOL = ['محمد', 'أحمد', 'عبدالله', 'فهد', 'خالد', 'سارة', 'نورة', 'ريم', 'لمى', 'هند', 'زائر']
+CITY_POOL = ['الرياض', 'جدة', 'الدمام', 'مكة المكرمة', 'المدينة المنورة', 'الخبر', 'أبها', 'تبوك']
+USER_AGENTS = [
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148',
+    'Mozilla/5.0 (Linux; Android 14; SM-S918B) AppleWebKit/537.36 Chrome/126.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/126.0 Safari/537.36',
+]
+
+# Relative traffic by hour of day (local time): quiet mornings, evening peak
+HOUR_WEIGHTS = [3, 2, 1, 1, 1, 1, 1, 2, 3, 4, 5, 6, 7, 6, 5, 5, 6, 8, 10, 13, 15, 15, 12, 7]
+HOUR_CUM = list(accumulate(HOUR_WEIGHTS))
+WEEKEND_DAYS = (3, 4)  # Thursday, Friday
+WEEKEND_FACTOR = 1.6
+SPIN_PHONE_SHARE = 0.6
+MAX_PHONES_PER_INFLUENCER = 10 ** 8  # 05 + eight digits
+
+# Set in each worker (inherited on fork, or set directly for threads)
+_plan = None
+
+
+def _zipf_cum(count, exponent=1.0):
+    """Cumulative long-tail weights: rank r gets 1 / r^exponent"""
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+
+def _timestamps(rng, size):
+    """size aware datetimes spread over the plan's days with hour/weekday shape"""
+    days = rng.choices(range(len(_plan['day_starts'])), cum_weights=_plan['day_cum'], k=size)
+    hours = rng.choices(range(24), cum_weights=HOUR_CUM, k=size)
+    end = _plan['end']
+    result = []
+    for day, hour in zip(days, hours):
+        moment = _plan['day_starts'][day] + hour * 3600 + rng.randrange(3600)
+        if moment > end:
+            moment -= 86400
+        result.append(datetime.fromtimestamp(moment, dt_timezone.utc))
+    return result
+
+
+def _spin_rows(rng, first_pk, size):
+    companies = _plan['companies']
+    indexes = rng.choices(range(len(companies)), cum_weights=_plan['company_cum'], k=size)
+    rows = []
+    for offset, (index, created_at) in enumerate(zip(indexes, _timestamps(rng, size))):
+        company_id, prizes, prize_cum = companies[index]
+        rows.append(GameSpin(
+            pk=first_pk + offset,
+            company_id=company_id,
+            visitor_name=rng.choice(NAME_POOL),
+            visitor_phone=f'05{rng.randrange(10 ** 8):08d}' if rng.random() < SPIN_PHONE_SHARE else None,
+            prize=rng.choices(prizes, cum_weights=prize_cum)[0],
+            session_id=f'{rng.getrandbits(128):032x}',
+            ip_address=f'{rng.randint(1, 223)}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randint(1, 254)}',
+            user_agent=rng.choice(USER_AGENTS),
+            created_at=created_at,
+        ))
+    return rows
+
+
+def _participant_rows(rng, first_pk, first_index, size):
+    influencer_ids = _plan['influencer_ids']
+    starts = _plan['influencer_starts']
+    rows = []
+    for offset, created_at in enumerate(_timestamps(rng, size)):
+        number = first_index + offset
+        # Participants are laid out in one contiguous block per influencer
+        slot = bisect.bisect_right(starts, number) - 1
+        phone = f'05{number - starts[slot]:08d}'
+        rows.append(Participant(
+            pk=first_pk + offset,
+            influencer_id=influencer_ids[slot],
+            name=rng.choice(NAME_POOL),
+            phone=phone,
+            phone_normalized=phone,
+            social_media_account=f'@user{number}',
+            city=rng.choice(CITY_POOL),
+            created_at=created_at,
+        ))
+    return rows
+
+
+def _set_plan(plan):
+    global _plan
+    _plan = plan
+
+
+def insert_chunk(kind, chunk):
+    """Insert one chunk of spins or participants; returns rows inserted (0 if already there)"""
+    section = _plan[kind]
+    first_index = chunk * _plan['batch_size']
+    size = min(_plan['batch_size'], section['total'] - first_index)
+    first_pk = section['base'] + first_index
+    model = GameSpin if kind == 'spins' else Participant
+
+    # Each chunk is one transaction, so its last row marks it as done
+    if model.objects.filter(pk=first_pk + size - 1).exists():
+        return 0
+
+    rng = random.Random(f"{_plan['seed']}:{kind}:{chunk}")
+    if kind == 'spins':
+        rows = _spin_rows(rng, first_pk, size)
+    else:
+        rows = _participant_rows(rng, first_pk, first_index, size)
+    # ignore_conflicts makes a chunk that was cut off mid-way safe to redo
+    retry_on_locked(model.objects.bulk_create)(rows, ignore_conflicts=True)
+    return size
+
+
+class Command(BaseCommand):
+    help = 'Generate companies, influencers, spins and participants at production scale for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=100)
+        parser.add_argument('--influencers', type=int, default=20)
+        parser.add_argument('--spins', type=int, default=1_000_000)
+        parser.add_argument('--participants', type=int, default=1_000_000)
+        parser.add_argument('--days', type=int, default=90, help='Spread rows over this many past days')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create chunk')
+        parser.add_argument('--workers', type=int, default=4, help='Parallel insert workers')
+        parser.add_argument('--prefix', default='load', help='Slug prefix of the generated companies/influencers')
+        parser.add_argument('--state-file', help='Resume state (default: logs/load_data_<prefix>.json)')
+        parser.add_argument('--clear', action='store_true', help='Delete the generated data and its state')
+
+    def handle(self, *args, **options):
+        state_path = Path(options['state_file'] or settings.BASE_DIR / 'logs' / f"load_data_{options['prefix']}.json")
+        if options['clear']:
+            self.clear(options['prefix'], state_path)
+            return
+
+        for name in ('companies', 'influencers', 'days', 'batch_size', 'workers'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be positive")
+
+        params = {name: options[name] for name in
+                  ('companies', 'influencers', 'spins', 'participants', 'days', 'seed', 'batch_size', 'prefix')}
+        state = self.load_state(state_path, params)
+
+        companies = self.ensure_companies(options['prefix'], options['companies'], options['seed'])
+        influencers = self.ensure_influencers(options['prefix'], options['influencers'], options['seed'])
+        plan = self.build_plan(params, state, companies, influencers)
+        with open(state_path, 'w', encoding='utf-8') as handle:
+            json.dump(state, handle, indent=2)
+
+        started = time.perf_counter()
+        for kind in ('spins', 'participants'):
+            self.run(kind, plan, options['workers'])
+
+        # Explicit keys bypass PostgreSQL sequences; move them past the new rows
+        with connection.cursor() as cursor:
+            for statement in connection.ops.sequence_reset_sql(no_style(), [GameSpin, Participant]):
+                cursor.execute(statement)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Load data ready in {time.perf_counter() - started:.1f}s '
+            f"({len(companies)} companies, {len(influencers)} influencers, "
+            f"{params['spins']:,} spins, {params['participants']:,} participants)"
+        ))
+
+    def load_state(self, path, params):
+        try:
+            with open(path, encoding='utf-8') as handle:
+                state = json.load(handle)
+        except FileNotFoundError:
+            return {'params': params}
+
+        if state['params'] != params:
+            raise CommandError(
+                f'{path} belongs to a run with different arguments {state["params"]}; '
+                f'rerun with those to resume, or use --clear to start over'
+            )
+        self.stdout.write(f'Resuming from {path}')
+        return state
+
+    def ensure_companies(self, prefix, count, seed):
+        """Create the missing generated companies (deterministic per index); return them in index order"""
+        slugs = [f'{prefix}-company-{index}' for index in range(count)]
+        existing = set(Company.objects.filter(slug__in=slugs).values_list('slug', flat=True))
+        now = timezone.now()
+
+        new_companies = []
+        for index, slug in enumerate(slugs):
+            if slug in existing:
+                continue
+            rng = random.Random(f'{seed}:company:{index}')
+            prizes = rng.sample(PRIZE_POOL, rng.randint(4, 8))
+            weights = [rng.randint(1, 10) for _ in prizes]
+            percentages = [round(weight * 100 / sum(weights), 2) for weight in weights]
+            status = rng.choices(['approved', 'pending', 'rejected'], weights=[85, 10, 5])[0]
+            new_companies.append(Company(
+                name=f'Load Company {index}', slug=slug, type='other', custom_type='مقهى',
+                email=f'{slug}@example.com', phone=f'05{rng.randrange(10 ** 8):08d}',
+                prizes=prizes, colors=rng.sample(COLOR_POOL, len(prizes)),
+                notes=json.dumps({'prize_percentages': percentages}),
+                prize_distribution_mode=rng.choices(['random', 'smooth'], weights=[3, 1])[0],
+                status=status, is_active=status == 'approved',
+                approved_at=now if status == 'approved' else None,
+            ))
+        created = Company.objects.bulk_create(new_companies, batch_size=1000)
+
+        schedules = []
+        stocks = []
+        for company in created:
+            rng = random.Random(f'{seed}:schedule:{company.slug}')
+            if rng.random() < 0.7:
+                start_hour = rng.randint(8, 20)
+                duration = rng.randint(2, 6)
+                schedules.append(ActivationSchedule(
+                    company=company, start_hour=start_hour, end_hour=(start_hour + duration) % 24,
+                    duration_hours=duration, is_active=True,
+                    **{day: rng.random() < 0.6 for day in
+                       ('saturday', 'sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday')}
+                ))
+            if rng.random() < 0.3:
+                stocks.append(PrizeStock(
+                    company=company, prize=company.prizes[0],
+                    remaining=rng.randint(100, 10000), daily_cap=rng.choice([None, 50, 200]),
+                ))
+        ActivationSchedule.objects.bulk_create(schedules, batch_size=1000)
+        PrizeStock.objects.bulk_create(stocks, batch_size=1000)
+
+        by_slug = {company.slug: company for company in
+                   Company.objects.filter(slug__in=slugs).only('id', 'slug', 'prizes', 'notes')}
+        return [by_slug[slug] for slug in slugs]
+
+    def ensure_influencers(self, prefix, count, seed):
+        slugs = [f'{prefix}-influencer-{index}' for index in range(count)]
+        existing = set(Influencer.objects.filter(slug__in=slugs).values_list('slug', flat=True))
+
+        new_influencers = []
+        for index, slug in enumerate(slugs):
+            if slug in existing:
+                continue
+            rng = random.Random(f'{seed}:influencer:{index}')
+            new_influencers.append(Influencer(
+                name=f'Load Influencer {index}', slug=slug,
+                platform=rng.choice(['instagram', 'snapchat', 'tiktok', 'youtube', 'twitter']),
+                username=f'load_influencer_{index}', email=f'{slug}@example.com',
+                phone=f'05{rng.randrange(10 ** 8):08d}', followers_count=int(rng.paretovariate(1.2) * 5000),
+                prizes=rng.sample(PRIZE_POOL, 4), colors=rng.sample(COLOR_POOL, 4),
+                status='approved', is_active=True, approved_at=timezone.now(),
+            ))
+        Influencer.objects.bulk_create(new_influencers, batch_size=1000)
+
+        by_slug = {influencer.slug: influencer for influencer in
+                   Influencer.objects.filter(slug__in=slugs).only('id', 'slug')}
+        return [by_slug[slug] for slug in slugs]
+
+    def build_plan(self, params, state, companies, influencers):
+        """Everything a worker needs to generate any chunk; key ranges and time window come from the state"""
+        if 'spin_base' not in state:
+            state['spin_base'] = (GameSpin.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+            state['participant_base'] = (Participant.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+            state['end'] = timezone.now().timestamp()
+
+        # Local midnights of the last `days` days; weekends weigh more
+        end_local = datetime.fromtimestamp(state['end'], timezone.get_current_timezone())
+        last_midnight = end_local.replace(hour=0, minute=0, second=0, microsecond=0)
+        midnights = [last_midnight - timedelta(days=offset) for offset in range(params['days'])]
+        day_weights = [WEEKEND_FACTOR if day.weekday() in WEEKEND_DAYS else 1 for day in midnights]
+
+        company_rows = []
+        for company in companies:
+            try:
+                percentages = json.loads(company.notes)['prize_percentages']
+            except (TypeError, ValueError, KeyError):
+                percentages = [1] * len(company.prizes)
+            company_rows.append((company.pk, list(company.prizes), list(accumulate(percentages))))
+
+        # Influencer k gets a contiguous block of participant numbers (long-tail sizes)
+        weights = [1 / (rank + 1) for rank in range(len(influencers))]
+        sizes = [int(params['participants'] * weight / sum(weights)) for weight in weights]
+        sizes[0] += params['participants'] - sum(sizes)
+        if max(sizes) > MAX_PHONES_PER_INFLUENCER:
+            raise CommandError('Too many participants per influencer for unique phone numbers; add influencers')
+
+        return {
+            'seed': params['seed'],
+            'batch_size': params['batch_size'],
+            'end': state['end'],
+            'day_starts': [day.timestamp() for day in midnights],
+            'day_cum': list(accumulate(day_weights)),
+            'companies': company_rows,
+            'company_cum': _zipf_cum(len(companies)),
+            'influencer_ids': [influencer.pk for influencer in influencers],
+            'influencer_starts': [0] + list(accumulate(sizes))[:-1],
+            'spins': {'total': params['spins'], 'base': state['spin_base']},
+            'participants': {'total': params['participants'], 'base': state['participant_base']},
+        }
+
+    def run(self, kind, plan, workers):
+        total = plan[kind]['total']
+        chunks = math.ceil(total / plan['batch_size'])
+        if not chunks:
+            return
+
+        _set_plan(plan)
+        # Workers open their own connections (forked processes must not share the parent's)
+        connections.close_all()
+        if workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('fork'),
+                initializer=_set_plan, initargs=(plan,)
+            )
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+
+        started = time.perf_counter()
+        inserted = done = 0
+        with executor:
+            futures = [executor.submit(insert_chunk, kind, chunk) for chunk in range(chunks)]
+            for future in as_completed(futures):
+                inserted += future.result()
+                done += 1
+                if done % 20 == 0 or done == chunks:
+                    rate = inserted / max(time.perf_counter() - started, 1e-9)
+                    self.stdout.write(
+                        f'{kind}: {done}/{chunks} chunks, {inserted:,} rows inserted ({rate:,.0f} rows/s)'
+                    )
+        if workers > 1:
+            connections.close_all()
+
+    def clear(self, prefix, state_path):
+        companies = Company.objects.filter(slug__startswith=f'{prefix}-company-')
+        influencers = Influencer.objects.filter(slug__startswith=f'{prefix}-influencer-')
+        # Delete the big tables with single DELETE statements before the cascades
+        spins, _ = GameSpin.objects.filter(company__in=companies).delete()
+        participants, _ = Participant.objects.filter(influencer__in=influencers).delete()
+        companies.delete()
+        influencers.delete()
+        state_path.unlink(missing_ok=True)
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {spins:,} spins, {participants:,} participants and the {prefix}-* companies/influencers'
+        ))
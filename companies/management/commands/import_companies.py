@@ -0,0 +1,53 @@
+"""
+Management command to import companies from a CSV or XLSX file
+
+    python manage.py import_companies companies.xlsx
+    python manage.py import_companies companies.csv --dry-run
+    python manage.py import_companies companies.csv --skip-invalid
+
+See companies/importer.py for the expected columns.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from companies.importer import import_companies, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Import companies (pending review) from a CSV or XLSX file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file')
+        parser.add_argument('--skip-invalid', action='store_true',
+                            help='Import the valid rows even when other rows have errors')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without importing')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        started = time.perf_counter()
+        try:
+            with open(path, 'rb') as fileobj:
+                result = import_companies(
+                    read_rows(fileobj, path), skip_invalid=options['skip_invalid'], dry_run=options['dry_run']
+                )
+        except OSError as e:
+            raise CommandError(f'Cannot open {path}: {e}')
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for row_number, message in result.errors:
+            self.stdout.write(self.style.ERROR(f'Row {row_number}: {message}'))
+
+        elapsed = time.perf_counter() - started
+        valid = result.total - len(result.errors)
+        if options['dry_run']:
+            self.stdout.write(f'[DRY RUN] {valid} of {result.total} row(s) valid ({elapsed:.1f}s)')
+        elif result.errors and not options['skip_invalid']:
+            raise CommandError(
+                f'{len(result.errors)} invalid row(s); nothing imported (use --skip-invalid to import the rest)'
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Imported {result.created} of {result.total} row(s) in {elapsed:.1f}s'
+            ))
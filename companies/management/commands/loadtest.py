@@ -0,0 +1,426 @@
+"""
+Management command to load test the play, spin and participant endpoints
+
+Runs a scenario - phases of closed-loop traffic with a weighted request mix -
+against the application booted in-process or against a running server:
+
+    python manage.py loadtest                                  # in-process WSGI, threads
+    python manage.py loadtest --mode asyncio                   # in-process ASGI, asyncio
+    python manage.py loadtest --scenario viral-venue --url http://127.0.0.1:8000
+    python manage.py loadtest --scenario my_shape.json --json results.json
+
+Scenarios are JSON files (built-ins live in benchmarks/scenarios/):
+
+    {"name": "...", "phases": [
+        {"name": "peak", "duration": 30, "concurrency": 50, "think_time": 0,
+         "mix": {"spin": 5, "play": 2, "register-participant": 3, "participants-count": 4}}
+    ]}
+
+Targets default to the generate_load_data dataset (load-company-0 and
+load-influencer-0). Reports requests/sec, latency percentiles, error rates
+and "database is locked" failures per phase and request kind.
+"""
+import asyncio
+import http.client
+import io
+import json
+import logging
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SCENARIO_DIR = settings.BASE_DIR / 'benchmarks' / 'scenarios'
+LOCKED_MARKER = b'database is locked'
+
+
+def build_request(kind, options, rng, counter):
+    """(method, path, body) for one request of the given kind"""
+    company = options['company']
+    influencer = options['influencer']
+    if kind == 'play':
+        return 'GET', f'/game/play/{company}/', None
+    if kind == 'spin':
+        body = {'visitor_name': f'زائر {next(counter)}'}
+        if rng.random() < 0.6:
+            body['visitor_phone'] = f'05{rng.randrange(10 ** 8):08d}'
+        return 'POST', f'/game/spin/{company}/', body
+    if kind == 'register-participant':
+        # Unique phone per request so the duplicate check does not short-circuit
+        phone = f"05{(options['phone_offset'] + next(counter)) % 10 ** 8:08d}"
+        body = {'name': 'Load Test', 'phone': phone, 'social_media_account': '@loadtest', 'city': 'الرياض'}
+        return 'POST', f'/influencers/register-participant/{influencer}/submit/', body
+    if kind == 'participants-count':
+        return 'GET', f'/influencers/participants-count/{influencer}/', None
+    raise CommandError(f'Unknown request kind: {kind}')
+
+
+REQUEST_KINDS = ('play', 'spin', 'register-participant', 'participants-count')
+
+
+class LockCounter(logging.Handler):
+    """Counts lock retries logged by dawerha.db while running in-process"""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+# Transports: each sends (method, path, body) and returns (status, response body)
+
+class WSGITransport:
+    """Calls dawerha.wsgi.application directly"""
+
+    def __init__(self, host):
+        from dawerha.wsgi import application
+        self.application = application
+        self.host = host
+
+    def send(self, method, path, body, client_ip):
+        payload = json.dumps(body).encode('utf-8') if body is not None else b''
+        environ = {
+            'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+            'SERVER_NAME': self.host, 'SERVER_PORT': '443', 'HTTP_HOST': self.host, 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': client_ip, 'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(payload)),
+            'wsgi.input': io.BytesIO(payload), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'https',
+            'wsgi.version': (1, 0), 'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+        }
+        status = []
+        result = self.application(environ, lambda line, headers, exc_info=None: status.append(line))
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return int(status[0].split(' ', 1)[0]), content
+
+
+class ASGITransport:
+    """Calls dawerha.asgi.application directly on the running event loop"""
+
+    def __init__(self, host):
+        from dawerha.asgi import application
+        self.application = application
+        self.host = host
+
+    async def send(self, method, path, body, client_ip):
+        payload = json.dumps(body).encode('utf-8') if body is not None else b''
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+            'scheme': 'https', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+            'headers': [(b'host', self.host.encode()), (b'content-type', b'application/json'),
+                        (b'content-length', str(len(payload)).encode())],
+            'client': (client_ip, 50000), 'server': (self.host, 443),
+        }
+        disconnected = asyncio.Event()
+        request_sent = False
+        response = {'status': None, 'body': []}
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': payload, 'more_body': False}
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+            elif message['type'] == 'http.response.body':
+                response['body'].append(message.get('body', b''))
+
+        try:
+            await self.application(scope, receive, send)
+        finally:
+            disconnected.set()
+        return response['status'], b''.join(response['body'])
+
+
+class HTTPTransport:
+    """Keep-alive HTTP/1.1 connections to a running server, one per worker thread"""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.netloc = parts.netloc
+        self.local = threading.local()
+
+    def send(self, method, path, body, client_ip):
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        for attempt in range(2):
+            conn = getattr(self.local, 'connection', None)
+            if conn is None:
+                conn = self.local.connection = self.connection_class(self.netloc, timeout=30)
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                self.local.connection = None
+                if attempt:
+                    raise
+
+
+class AsyncHTTPTransport:
+    """Minimal keep-alive HTTP/1.1 client on asyncio streams (no extra dependency)"""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = parts.scheme == 'https'
+        self.netloc = parts.netloc
+
+    async def send(self, method, path, body, client_ip, stream=None):
+        payload = json.dumps(body).encode('utf-8') if body is not None else b''
+        reader, writer = stream
+        head = (f'{method} {path} HTTP/1.1\r\nHost: {self.netloc}\r\nContent-Type: application/json\r\n'
+                f'Content-Length: {len(payload)}\r\n\r\n').encode('latin-1')
+        writer.write(head + payload)
+        await writer.drain()
+
+        status = int((await reader.readline()).split(b' ', 2)[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if not size:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            content = b''.join(chunks)
+        else:
+            content = await reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            writer.close()
+            stream[:] = await self.open()
+        return status, content
+
+    async def open(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl or None)
+        return [reader, writer]
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class Command(BaseCommand):
+    help = 'Replay a traffic scenario against the app (in-process or a running server) and report throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', default='steady',
+                            help='Built-in scenario name (benchmarks/scenarios/<name>.json) or a JSON file path')
+        parser.add_argument('--url', help='Base URL of a running server (default: boot the app in-process)')
+        parser.add_argument('--mode', choices=['threads', 'asyncio'], default='threads',
+                            help='Thread pool (WSGI in-process) or asyncio tasks (ASGI in-process)')
+        parser.add_argument('--company', default='load-company-0', help='Company slug for play/spin')
+        parser.add_argument('--influencer', default='load-influencer-0', help='Influencer slug for registration/count')
+        parser.add_argument('--duration-scale', type=float, default=1.0,
+                            help='Multiply every phase duration (e.g. 0.1 for a quick smoke run)')
+        parser.add_argument('--seed', type=int, default=None, help='Seed for the request mix')
+        parser.add_argument('--json', dest='json_path', help='Write the results to this JSON file')
+
+    def load_scenario(self, name):
+        path = Path(name)
+        if not path.suffix:
+            path = SCENARIO_DIR / f'{name}.json'
+        try:
+            scenario = json.loads(path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            available = ', '.join(sorted(p.stem for p in SCENARIO_DIR.glob('*.json')))
+            raise CommandError(f'Scenario not found: {path} (built-in: {available})')
+        except ValueError as e:
+            raise CommandError(f'Invalid scenario {path}: {e}')
+
+        for phase in scenario.get('phases', []):
+            unknown = set(phase.get('mix', {})) - set(REQUEST_KINDS)
+            if unknown:
+                raise CommandError(f"Phase {phase.get('name')}: unknown request kinds {sorted(unknown)}")
+            if phase.get('duration', 0) <= 0 or phase.get('concurrency', 0) < 1 or not phase.get('mix'):
+                raise CommandError(f"Phase {phase.get('name')}: needs duration > 0, concurrency >= 1 and a mix")
+        if not scenario.get('phases'):
+            raise CommandError(f'Scenario {path} has no phases')
+        return scenario
+
+    def handle(self, *args, **options):
+        scenario = self.load_scenario(options['scenario'])
+        options['phone_offset'] = random.Random(options['seed']).randrange(10 ** 8)
+        lock_counter = None
+
+        if options['url']:
+            target = options['url']
+            transport = (AsyncHTTPTransport if options['mode'] == 'asyncio' else HTTPTransport)(options['url'])
+        else:
+            # Measure the production code paths, not the debug ones
+            settings.DEBUG = False
+            host = 'loadtest.local'
+            settings.ALLOWED_HOSTS.append(host)
+            target = 'in-process ' + ('ASGI' if options['mode'] == 'asyncio' else 'WSGI')
+            transport = (ASGITransport if options['mode'] == 'asyncio' else WSGITransport)(host)
+            lock_counter = LockCounter()
+            logging.getLogger('dawerha.db').addHandler(lock_counter)
+
+        self.stdout.write(f"Scenario {scenario.get('name', options['scenario'])} against {target} "
+                          f"({options['mode']})")
+        report = {'scenario': scenario.get('name'), 'target': target, 'mode': options['mode'], 'phases': []}
+        all_samples = []
+        for index, phase in enumerate(scenario['phases']):
+            duration = phase['duration'] * options['duration_scale']
+            rng_seed = None if options['seed'] is None else options['seed'] + index
+            if options['mode'] == 'asyncio':
+                samples, elapsed = asyncio.run(self.run_phase_async(transport, phase, duration, options, rng_seed))
+            else:
+                samples, elapsed = self.run_phase_threads(transport, phase, duration, options, rng_seed)
+            summary = self.summarize(samples, elapsed)
+            summary['name'] = phase.get('name', f'phase {index + 1}')
+            summary['concurrency'] = phase['concurrency']
+            report['phases'].append(summary)
+            all_samples.extend(samples)
+            self.print_summary(summary)
+
+        total_elapsed = sum(phase['elapsed_s'] for phase in report['phases'])
+        report['total'] = self.summarize(all_samples, total_elapsed)
+        if lock_counter is not None:
+            report['total']['lock_retries'] = lock_counter.count
+            logging.getLogger('dawerha.db').removeHandler(lock_counter)
+        report['total']['name'] = 'total'
+        report['total']['concurrency'] = max(phase['concurrency'] for phase in scenario['phases'])
+        self.print_summary(report['total'])
+
+        if options['json_path']:
+            Path(options['json_path']).write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n',
+                                                  encoding='utf-8')
+
+    # Phase runners: closed loop, each worker sends its next request as soon as the previous one returns
+
+    def run_phase_threads(self, transport, phase, duration, options, rng_seed):
+        kinds, weights = zip(*phase['mix'].items())
+        think_time = phase.get('think_time', 0)
+        counter = iter(range(10 ** 9))
+        results = [[] for _ in range(phase['concurrency'])]
+        deadline = time.perf_counter() + duration
+
+        def worker(slot):
+            rng = random.Random(None if rng_seed is None else rng_seed * 1000 + slot)
+            client_ip = f'10.{slot // 250}.{slot % 250}.{rng.randint(1, 254)}'
+            samples = results[slot]
+            while time.perf_counter() < deadline:
+                kind = rng.choices(kinds, weights=weights)[0]
+                method, path, body = build_request(kind, options, rng, counter)
+                started = time.perf_counter()
+                try:
+                    status, content = transport.send(method, path, body, client_ip)
+                except Exception:
+                    status, content = None, b''
+                samples.append((kind, status, time.perf_counter() - started, LOCKED_MARKER in content))
+                if think_time:
+                    time.sleep(think_time)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(slot,)) for slot in range(phase['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return [sample for samples in results for sample in samples], time.perf_counter() - started
+
+    async def run_phase_async(self, transport, phase, duration, options, rng_seed):
+        kinds, weights = zip(*phase['mix'].items())
+        think_time = phase.get('think_time', 0)
+        counter = iter(range(10 ** 9))
+        samples = []
+        deadline = time.perf_counter() + duration
+
+        async def worker(slot):
+            rng = random.Random(None if rng_seed is None else rng_seed * 1000 + slot)
+            client_ip = f'10.{slot // 250}.{slot % 250}.{rng.randint(1, 254)}'
+            stream = await transport.open() if isinstance(transport, AsyncHTTPTransport) else None
+            try:
+                while time.perf_counter() < deadline:
+                    kind = rng.choices(kinds, weights=weights)[0]
+                    method, path, body = build_request(kind, options, rng, counter)
+                    started = time.perf_counter()
+                    try:
+                        if stream is not None:
+                            status, content = await transport.send(method, path, body, client_ip, stream)
+                        else:
+                            status, content = await transport.send(method, path, body, client_ip)
+                    except Exception:
+                        status, content = None, b''
+                        if stream is not None:
+                            stream[1].close()
+                            stream = await transport.open()
+                    samples.append((kind, status, time.perf_counter() - started, LOCKED_MARKER in content))
+                    if think_time:
+                        await asyncio.sleep(think_time)
+            finally:
+                if stream is not None:
+                    stream[1].close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(slot) for slot in range(phase['concurrency'])))
+        return samples, time.perf_counter() - started
+
+    def summarize(self, samples, elapsed):
+        by_kind = defaultdict(list)
+        for sample in samples:
+            by_kind[sample[0]].append(sample)
+
+        def stats(rows):
+            latencies = sorted(latency * 1000 for _, _, latency, _ in rows)
+            statuses = Counter(str(status) for _, status, _, _ in rows)
+            errors = sum(1 for _, status, _, _ in rows if status is None or status >= 400)
+            return {
+                'requests': len(rows),
+                'rps': round(len(rows) / elapsed, 1) if elapsed else 0,
+                'p50_ms': round(percentile(latencies, 50), 2) if latencies else None,
+                'p90_ms': round(percentile(latencies, 90), 2) if latencies else None,
+                'p99_ms': round(percentile(latencies, 99), 2) if latencies else None,
+                'mean_ms': round(statistics.fmean(latencies), 2) if latencies else None,
+                'error_rate': round(errors / len(rows), 4) if rows else 0,
+                'locked': sum(1 for _, _, _, locked in rows if locked),
+                'statuses': dict(sorted(statuses.items())),
+            }
+
+        summary = stats(samples)
+        summary['elapsed_s'] = round(elapsed, 2)
+        summary['kinds'] = {kind: stats(rows) for kind, rows in sorted(by_kind.items())}
+        return summary
+
+    def print_summary(self, summary):
+        self.stdout.write('=' * 78)
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['name']} (concurrency {summary['concurrency']}, {summary['elapsed_s']}s): "
+            f"{summary['requests']} requests, {summary['rps']} req/s, "
+            f"errors {summary['error_rate']:.2%}, locked {summary['locked']}"
+            + (f", lock retries {summary['lock_retries']}" if 'lock_retries' in summary else '')
+        ))
+        self.stdout.write(f"{'kind':<22} {'req/s':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'err%':>7}  statuses")
+        for kind, row in summary['kinds'].items():
+            self.stdout.write(
+                f"{kind:<22} {row['rps']:>8} {row['p50_ms']:>8} {row['p90_ms']:>8} {row['p99_ms']:>8} "
+                f"{row['error_rate'] * 100:>6.1f}%  {row['statuses']}"
+            )
@@ -0,0 +1,96 @@
+"""
+Management command to control the request profiler and report on its dumps
+
+    python manage.py profiling on --slow-ms 800 --minutes 30
+    python manage.py profiling on --sample-rate 0.01
+    python manage.py profiling off
+    python manage.py profiling status
+    python manage.py profiling report --top 25 --view game:spin
+"""
+import io
+import pstats
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from dawerha.profiling import disable_profiler, enable_profiler, profiler_config
+
+DUMP_PATTERN = re.compile(r'^(?P<view>.+)_\d{8}-\d{6}-\d+_(?P<ms>\d+)ms\.prof$')
+
+
+class Command(BaseCommand):
+    help = 'Switch the sampled request profiler on/off and aggregate its dumps into a hot-function report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['on', 'off', 'status', 'report'])
+        parser.add_argument('--sample-rate', type=float, default=0.0,
+                            help='Fraction of requests to profile (0-1)')
+        parser.add_argument('--slow-ms', type=int, default=0,
+                            help='Keep every request slower than this many milliseconds')
+        parser.add_argument('--minutes', type=int, default=60,
+                            help='Switch the profiler off again after this many minutes (0 = never)')
+        parser.add_argument('--top', type=int, default=20, help='Number of functions in the report')
+        parser.add_argument('--view', help='Only include dumps for this URL name (e.g. game:spin)')
+        parser.add_argument('--sort', choices=['cumulative', 'tottime', 'calls'], default='cumulative')
+
+    def handle(self, *args, **options):
+        action = options['action']
+        if action == 'on':
+            self.switch_on(options)
+        elif action == 'off':
+            disable_profiler()
+            self.stdout.write(self.style.SUCCESS('Request profiler disabled'))
+        elif action == 'status':
+            config = profiler_config()
+            if config:
+                self.stdout.write(f"Profiler on: sample_rate={config['sample_rate']} slow_ms={config['slow_ms']}")
+            else:
+                self.stdout.write('Profiler off')
+        else:
+            self.report(options)
+
+    def switch_on(self, options):
+        sample_rate = options['sample_rate']
+        slow_ms = options['slow_ms']
+        if not 0 <= sample_rate <= 1:
+            raise CommandError('--sample-rate must be between 0 and 1')
+        if not sample_rate and not slow_ms:
+            raise CommandError('Give --sample-rate and/or --slow-ms')
+
+        timeout = options['minutes'] * 60 or None
+        enable_profiler(sample_rate=sample_rate, slow_ms=slow_ms, timeout=timeout)
+        until = f"for {options['minutes']} minute(s)" if timeout else 'until switched off'
+        self.stdout.write(self.style.SUCCESS(
+            f'Request profiler enabled {until}: sample_rate={sample_rate} slow_ms={slow_ms}'
+        ))
+
+    def report(self, options):
+        directory = settings.PROFILE_DIR
+        view_filter = options['view'].replace(':', '.') if options['view'] else None
+
+        dumps = []
+        timings = defaultdict(list)
+        for path in sorted(directory.glob('*.prof')) if directory.exists() else []:
+            match = DUMP_PATTERN.match(path.name)
+            if not match or (view_filter and match['view'] != view_filter):
+                continue
+            dumps.append(str(path))
+            timings[match['view']].append(int(match['ms']))
+
+        if not dumps:
+            self.stdout.write(self.style.WARNING(f'No profile dumps found in {directory}'))
+            return
+
+        self.stdout.write(f'{len(dumps)} profile(s) in {directory}\n')
+        for view, values in sorted(timings.items(), key=lambda item: -len(item[1])):
+            self.stdout.write(f'  {view}: {len(values)} request(s), '
+                              f'avg {sum(values) / len(values):.0f}ms, max {max(values)}ms')
+        self.stdout.write('')
+
+        # pstats writes in fragments; OutputWrapper would end each one with a newline
+        buffer = io.StringIO()
+        stats = pstats.Stats(*dumps, stream=buffer)
+        stats.strip_dirs().sort_stats(options['sort']).print_stats(options['top'])
+        self.stdout.write(buffer.getvalue())
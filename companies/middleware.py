@@ -1,6 +1,7 @@
 """
 Middleware for automatic activation based on schedules
 """
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.utils import timezone
 from .models import ActivationSchedule
 import logging
@@ -14,22 +15,41 @@ class ScheduleActivationMiddleware:
     Runs on every request to ensure timely activation
     """
     
+    sync_capable = True
+    async_capable = True
+    
     def __init__(self, get_response):
         self.get_response = get_response
         self.last_check = None
         self.check_interval = 1  # Check every 1 second
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
     
-    def __call__(self, request):
-        # Check if it's time to run the scheduler
+    def _scheduler_due(self):
+        """Check if it's time to run the scheduler"""
         now = timezone.now()
-        
         if self.last_check is None or (now - self.last_check).total_seconds() >= self.check_interval:
             self.last_check = now
+            return True
+        return False
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        
+        if self._scheduler_due():
             self.run_scheduler()
         
         response = self.get_response(request)
         return response
     
+    async def __acall__(self, request):
+        # Under ASGI only the scheduler run itself goes to a thread
+        if self._scheduler_due():
+            await sync_to_async(self.run_scheduler)()
+        
+        return await self.get_response(request)
+    
     def run_scheduler(self):
         """Run the activation scheduler"""
         try:
@@ -39,12 +59,16 @@ class ScheduleActivationMiddleware:
             for schedule in schedules:
                 if schedule.should_activate_now():
                     # Activate company with scheduled hour to ensure activation starts at exact hour
-                    schedule.company.activate_now(hours=schedule.duration_hours, scheduled_hour=schedule.start_hour, scheduled_end_hour=schedule.end_hour)
-                    schedule.last_activation = timezone.now()
-                    schedule.save()
+                    if not schedule.company.activate_now(hours=schedule.duration_hours, scheduled_hour=schedule.start_hour, scheduled_end_hour=schedule.end_hour):
+                        # Another worker activated (or edited) the company first
+                        continue
+                    schedule.mark_activated()
                     
-                    logger.info(f"Auto-activated: {schedule.company.name} for {schedule.duration_hours} hours at {schedule.start_hour}:00")
+                    logger.info(
+                        "Auto-activated: %s for %s hours at %s:00",
+                        schedule.company.name, schedule.duration_hours, schedule.start_hour
+                    )
         
         except Exception as e:
-            logger.error(f"Error in schedule activation middleware: {e}")
+            logger.error("Error in schedule activation middleware: %s", e)
 
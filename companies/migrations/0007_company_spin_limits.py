@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0006_alter_company_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='spin_limit_per_ip_minute',
+            field=models.PositiveIntegerField(default=0, help_text='عدد الدورات المسموح بها لكل عنوان IP في الدقيقة (0 = بدون حد)', verbose_name='حد الدورات لكل IP في الدقيقة'),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='spin_limit_per_phone_daily',
+            field=models.PositiveIntegerField(default=0, help_text='عدد الدورات المسموح بها لكل رقم جوال في اليوم (0 = بدون حد)', verbose_name='حد الدورات لكل جوال يومياً'),
+        ),
+    ]
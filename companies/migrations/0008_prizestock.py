@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0007_company_spin_limits'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrizeStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prize', models.CharField(help_text='يجب أن يطابق اسم الجائزة في قائمة الجوائز', max_length=200, verbose_name='الجائزة')),
+                ('remaining', models.PositiveIntegerField(blank=True, help_text='اتركه فارغاً لمخزون غير محدود', null=True, verbose_name='المخزون المتبقي')),
+                ('daily_cap', models.PositiveIntegerField(blank=True, help_text='أقصى عدد مرات الفوز بالجائزة في اليوم (فارغ = بدون حد)', null=True, verbose_name='الحد اليومي')),
+                ('daily_awarded', models.PositiveIntegerField(default=0, verbose_name='الممنوح اليوم')),
+                ('daily_date', models.DateField(blank=True, null=True, verbose_name='تاريخ العداد اليومي')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prize_stocks', to='companies.company', verbose_name='الشركة')),
+            ],
+            options={
+                'verbose_name': 'مخزون جائزة',
+                'verbose_name_plural': 'مخزون الجوائز',
+                'constraints': [models.UniqueConstraint(fields=('company', 'prize'), name='unique_prize_stock_per_company')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0008_prizestock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='prize_distribution_mode',
+            field=models.CharField(choices=[('random', 'عشوائي موزون'), ('smooth', 'توزيع منتظم حسب النسب')], default='random', help_text='التوزيع المنتظم يلتزم بالنسب المحددة في كل مجموعة دورات بدلاً من العشوائية', max_length=20, verbose_name='طريقة توزيع الجوائز'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0009_company_prize_distribution_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='kiosk_secret',
+            field=models.CharField(blank=True, help_text='مفتاح توقيع دفعات الدوران من الأجهزة غير المتصلة (فارغ = تعطيل)', max_length=128, verbose_name='مفتاح أجهزة الكشك'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0010_company_kiosk_secret'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='يزداد مع كل تعديل لاكتشاف التحديثات المتزامنة', verbose_name='رقم النسخة'),
+        ),
+    ]
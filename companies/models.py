@@ -2,13 +2,14 @@
 Company models for Dawerha platform
 """
 from django.db import models
+from django.db.models import F, Q
 from django.utils import timezone
 from django.core.validators import MinLengthValidator, MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
-from django.utils.text import slugify
+from dawerha.db import retry_on_locked, save_bumping_version, update_versioned
+from dawerha.slugs import save_with_slug
 import json
-import random
-import string
+from functools import partial
 
 
 class Company(models.Model):
@@ -81,6 +82,36 @@ class Company(models.Model):
         verbose_name="الألوان"
     )
     
+    DISTRIBUTION_CHOICES = [
+        ('random', 'عشوائي موزون'),
+        ('smooth', 'توزيع منتظم حسب النسب'),
+    ]
+    prize_distribution_mode = models.CharField(
+        max_length=20,
+        choices=DISTRIBUTION_CHOICES,
+        default='random',
+        verbose_name="طريقة توزيع الجوائز",
+        help_text="التوزيع المنتظم يلتزم بالنسب المحددة في كل مجموعة دورات بدلاً من العشوائية"
+    )
+    
+    # Spin Limits (0 = unlimited)
+    spin_limit_per_phone_daily = models.PositiveIntegerField(
+        default=0,
+        verbose_name="حد الدورات لكل جوال يومياً",
+        help_text="عدد الدورات المسموح بها لكل رقم جوال في اليوم (0 = بدون حد)"
+    )
+    spin_limit_per_ip_minute = models.PositiveIntegerField(
+        default=0,
+        verbose_name="حد الدورات لكل IP في الدقيقة",
+        help_text="عدد الدورات المسموح بها لكل عنوان IP في الدقيقة (0 = بدون حد)"
+    )
+    kiosk_secret = models.CharField(
+        max_length=128,
+        blank=True,
+        verbose_name="مفتاح أجهزة الكشك",
+        help_text="مفتاح توقيع دفعات الدوران من الأجهزة غير المتصلة (فارغ = تعطيل)"
+    )
+    
     # Status and Management
     status = models.CharField(
         max_length=20, 
@@ -123,6 +154,12 @@ class Company(models.Model):
         null=True,
         verbose_name="تاريخ الموافقة"
     )
+    version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="رقم النسخة",
+        help_text="يزداد مع كل تعديل لاكتشاف التحديثات المتزامنة"
+    )
     
     # Additional Information
     logo_url = models.URLField(
@@ -146,29 +183,19 @@ class Company(models.Model):
     
     def save(self, *args, **kwargs):
         """Override save to generate unique slug"""
-        if not self.slug:
-            # Use allow_unicode=False to ensure slug contains only Latin characters
-            base_slug = slugify(self.name, allow_unicode=False)
-            
-            # If slug is empty (name was all non-Latin characters), generate a random one
-            if not base_slug:
-                base_slug = ''.join(random.choices(string.ascii_lowercase, k=8))
-            
-            unique_slug = base_slug
-            counter = 1
-            
-            # Ensure slug is unique
-            while Company.objects.filter(slug=unique_slug).exists():
-                # Add random suffix to make it unique
-                random_suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=4))
-                unique_slug = f"{base_slug}-{random_suffix}"
-                counter += 1
-                if counter > 10:  # Safety check
-                    break
-            
-            self.slug = unique_slug
+        write = super().save
+        if not self._state.adding:
+            # Any edit moves the version so pending optimistic updates (activate_now,
+            # approve, reject) notice it instead of acting on a stale read
+            write = partial(save_bumping_version, self, write)
+            if not self.slug and kwargs.get('update_fields') is not None:
+                # The slug allocated below must be written too
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'slug'}
         
-        super().save(*args, **kwargs)
+        if not self.slug:
+            # Retried with a fresh slug if a concurrent insert takes it first
+            return save_with_slug(self, self.name, lambda: write(*args, **kwargs))
+        return write(*args, **kwargs)
     
     @property
     def final_type(self):
@@ -311,18 +338,18 @@ class Company(models.Model):
                     if time_since_last.total_seconds() < (schedule.duration_hours * 3600):
                         continue  # Still within activation period
                 
-                # Activate company with scheduled hour
-                self.activate_now(hours=schedule.duration_hours, scheduled_hour=schedule.start_hour, scheduled_end_hour=schedule.end_hour)
-                schedule.last_activation = timezone.now()
-                schedule.save()
+                # Activate company with scheduled hour; a concurrent request may win the activation
+                if self.activate_now(hours=schedule.duration_hours, scheduled_hour=schedule.start_hour, scheduled_end_hour=schedule.end_hour):
+                    schedule.mark_activated()
                 break  # Only activate from one schedule at a time
     
     def approve(self):
-        """Approve the company"""
-        self.status = 'approved'
-        self.is_active = True
-        self.approved_at = timezone.now()
-        self.save()
+        """
+        Approve the company
+        Returns False (nothing written, instance reloaded) if the company was
+        changed concurrently since it was loaded
+        """
+        return update_versioned(self, status='approved', is_active=True, approved_at=timezone.now())
     
     def activate_now(self, hours=None, scheduled_hour=None, scheduled_end_hour=None):
         """
@@ -331,6 +358,10 @@ class Company(models.Model):
             hours: Number of hours to activate
             scheduled_hour: If provided, set start time to the beginning of that hour
             scheduled_end_hour: If provided, set end time to the end of that hour
+        Returns:
+            False if the company was changed concurrently since it was loaded
+            (e.g. another worker activated it first); nothing is written and
+            the instance is reloaded
         """
         if hours is None:
             hours = self.active_hours
@@ -378,13 +409,17 @@ class Company(models.Model):
             self.activation_start_time = timezone.now()
             self.activation_end_time = timezone.now() + timezone.timedelta(hours=hours)
         
-        self.save()
+        # Only the activation columns, and only if no one else activated or edited the company meanwhile
+        return update_versioned(
+            self,
+            is_active=True,
+            activation_start_time=self.activation_start_time,
+            activation_end_time=self.activation_end_time
+        )
     
     def reject(self):
-        """Reject the company"""
-        self.status = 'rejected'
-        self.is_active = False
-        self.save()
+        """Reject the company (False if it was changed concurrently, see approve)"""
+        return update_versioned(self, status='rejected', is_active=False)
     
     def get_prizes_list(self):
         """Get prizes as a list"""
@@ -405,6 +440,121 @@ class Company(models.Model):
         return self.colors if self.colors else []
 
 
+class PrizeStock(models.Model):
+    """
+    Limited stock and daily cap for one of a company's prizes.
+    Prizes without a PrizeStock row are unlimited.
+    """
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name='prize_stocks',
+        verbose_name="الشركة"
+    )
+    prize = models.CharField(
+        max_length=200,
+        verbose_name="الجائزة",
+        help_text="يجب أن يطابق اسم الجائزة في قائمة الجوائز"
+    )
+    remaining = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        verbose_name="المخزون المتبقي",
+        help_text="اتركه فارغاً لمخزون غير محدود"
+    )
+    daily_cap = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        verbose_name="الحد اليومي",
+        help_text="أقصى عدد مرات الفوز بالجائزة في اليوم (فارغ = بدون حد)"
+    )
+    daily_awarded = models.PositiveIntegerField(
+        default=0,
+        verbose_name="الممنوح اليوم"
+    )
+    daily_date = models.DateField(
+        blank=True,
+        null=True,
+        verbose_name="تاريخ العداد اليومي"
+    )
+    
+    class Meta:
+        verbose_name = "مخزون جائزة"
+        verbose_name_plural = "مخزون الجوائز"
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'prize'], name='unique_prize_stock_per_company'),
+        ]
+    
+    def __str__(self):
+        return f"{self.company.name} - {self.prize}"
+    
+    def clean(self):
+        """Validate that the prize exists in the company prizes"""
+        if self.company_id:
+            prizes = [str(p).strip() for p in self.company.get_prizes_list() if p]
+            if self.prize.strip() not in prizes:
+                raise ValidationError('الجائزة غير موجودة في قائمة جوائز الشركة')
+    
+    def is_available(self, today=None):
+        """Check (without locking) whether the prize can still be won"""
+        if self.remaining is not None and self.remaining <= 0:
+            return False
+        if self.daily_cap is not None:
+            today = today or timezone.localdate()
+            if self.daily_date == today and self.daily_awarded >= self.daily_cap:
+                return False
+        return True
+    
+    @retry_on_locked
+    def reserve(self):
+        """
+        Atomically take one unit of this prize.
+        Uses conditional UPDATEs (remaining > 0, daily_awarded < daily_cap), so
+        no row lock is held beyond the single statement and stock never oversells.
+        Returns True if the prize was reserved.
+        """
+        stock = PrizeStock.objects.filter(pk=self.pk)
+        changes = {}
+        if self.remaining is not None:
+            stock = stock.filter(remaining__gt=0)
+            changes['remaining'] = F('remaining') - 1
+        
+        if self.daily_cap is None:
+            return stock.update(**changes) == 1 if changes else True
+        
+        today = timezone.localdate()
+        
+        # Same day: count against today's cap
+        if stock.filter(daily_date=today, daily_awarded__lt=self.daily_cap).update(
+            daily_awarded=F('daily_awarded') + 1, **changes
+        ):
+            return True
+        
+        # First award of a new day: reset the daily counter
+        if self.daily_cap > 0 and stock.filter(Q(daily_date__lt=today) | Q(daily_date__isnull=True)).update(
+            daily_date=today, daily_awarded=1, **changes
+        ):
+            return True
+        
+        return False
+    
+    @retry_on_locked
+    def release(self):
+        """Give back a reserved unit (the spin could not be recorded)"""
+        stock = PrizeStock.objects.filter(pk=self.pk)
+        changes = {}
+        if self.remaining is not None:
+            changes['remaining'] = F('remaining') + 1
+        
+        if self.daily_cap is not None and stock.filter(
+            daily_date=timezone.localdate(), daily_awarded__gt=0
+        ).update(daily_awarded=F('daily_awarded') - 1, **changes):
+            return
+        
+        if changes:
+            stock.update(**changes)
+
+
 class ActivationSchedule(models.Model):
     """
     Model for scheduling automatic activation
@@ -506,6 +656,13 @@ class ActivationSchedule(models.Model):
     
     def save(self, *args, **kwargs):
         """Auto-calculate duration before saving and auto-activate if schedule conditions are met"""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            if not {'start_hour', 'end_hour'} & set(update_fields):
+                # Partial save that does not touch the hours (e.g. mark_activated)
+                return super().save(*args, **kwargs)
+            kwargs['update_fields'] = {*update_fields, 'duration_hours'}
+        
         # Calculate duration automatically based on start and end hours
         if self.start_hour <= self.end_hour:
             # Normal case: start=9, end=17 → duration=8 hours
@@ -519,6 +676,11 @@ class ActivationSchedule(models.Model):
         # Save the schedule (no auto-activation - only via "activate_by_schedule" action)
         super().save(*args, **kwargs)
     
+    def mark_activated(self):
+        """Record an activation from this schedule (writes only last_activation)"""
+        self.last_activation = timezone.now()
+        self.save(update_fields=['last_activation', 'updated_at'])
+    
     def clean(self):
         """Validate schedule"""
         # Check if at least one day is selected
@@ -695,17 +857,23 @@ class ActivationSchedule(models.Model):
         if not self.should_activate_now():
             return False
         
-        # Activate company with scheduled hour
-        self.company.activate_now(hours=self.duration_hours, scheduled_hour=self.start_hour, scheduled_end_hour=self.end_hour)
-        self.last_activation = timezone.now()
-        self.save()
+        # Activate company with scheduled hour (False if another worker activated it first)
+        if not self.company.activate_now(hours=self.duration_hours, scheduled_hour=self.start_hour, scheduled_end_hour=self.end_hour):
+            return False
+        self.mark_activated()
         
         return True
     
-    def get_company_activation_status(self):
-        """Get real-time company activation status"""
+    def get_company_activation_status(self, refresh=True):
+        """
+        Get real-time company activation status
+        Args:
+            refresh: Reload the company row first. Pass False when the company
+                was just fetched with select_related (bulk status polling).
+        """
         # Refresh company from database
-        self.company.refresh_from_db()
+        if refresh:
+            self.company.refresh_from_db()
         
         if not self.company.is_active:
             return {
@@ -12,6 +12,7 @@ urlpatterns = [
     path('register/', views.register_company, name='register'),
     path('dashboard/<int:company_id>/', views.company_dashboard, name='dashboard'),
     path('admin/schedule-status/<int:schedule_id>/', views.get_schedule_status, name='schedule_status'),
+    path('schedule-status/', views.get_schedules_status, name='schedules_status'),
 ]
 
 
@@ -3,6 +3,7 @@ Utility functions for companies app
 """
 from django.utils import timezone
 import pytz
+import random
 from datetime import datetime
 
 
@@ -80,3 +81,78 @@ def format_arabic_datetime(dt):
 
 
 
+
+
+WHEEL_COLORS = [
+    "#6A3FA0", "#F2C23E", "#8C59C4", "#FF6B9D",
+    "#2E2240", "#4ECDC4", "#B794F6", "#FF8B5A"
+]
+
+
+def pick_wheel_colors(count):
+    """Random wheel colors from the Dawerha palette (one per prize, at most 8)"""
+    return random.sample(WHEEL_COLORS, min(count, len(WHEEL_COLORS)))
+
+
+def equal_prize_percentages(count):
+    """Equal split of 100% over count prizes; the last prize takes the remainder"""
+    equal_percentage = 100 // count
+    prize_percentages = [equal_percentage] * count
+    remainder = 100 - (equal_percentage * count)
+    if remainder > 0:
+        prize_percentages[-1] += remainder
+    return prize_percentages
+
+
+def normalize_prize_percentages(prizes, prize_percentages):
+    """
+    Normalize prize percentages to whole numbers that sum to 100
+    Args:
+        prizes: list of prize names
+        prize_percentages: list of positive numbers in any total (50, 150, ...)
+                           or empty for an equal split
+    Returns:
+        list of integer percentages, each at least 1
+    Raises:
+        ValueError with an Arabic message when the counts differ or a
+        percentage is not positive
+    """
+    if not prize_percentages:
+        return equal_prize_percentages(len(prizes))
+    
+    if len(prize_percentages) != len(prizes):
+        raise ValueError('عدد النسب المئوية يجب أن يساوي عدد الجوائز')
+    
+    # Validate that all percentages are positive
+    if any(p <= 0 for p in prize_percentages):
+        raise ValueError('جميع النسب المئوية يجب أن تكون أكبر من 0')
+    
+    # Normalize percentages to sum to 100
+    # This works for any total (e.g., 50%, 150%, 300%, etc.)
+    # The algorithm preserves the relative ratios between prizes
+    total_percentage = sum(prize_percentages)
+    # Formula: (each_percentage / total) * 100
+    normalized = [(float(p) / total_percentage) * 100.0 for p in prize_percentages]
+    
+    # Round to nearest integer for display/storage
+    prize_percentages = [round(p) for p in normalized]
+    
+    # Adjust to ensure sum is exactly 100 (handle rounding errors)
+    current_sum = sum(prize_percentages)
+    if current_sum != 100:
+        # Add/subtract difference from the prize with the highest percentage
+        # This maintains the relative importance
+        max_idx = prize_percentages.index(max(prize_percentages))
+        prize_percentages[max_idx] += 100 - current_sum
+    
+    # Ensure no percentage is less than 1 after normalization
+    # This prevents prizes from having 0% chance
+    prize_percentages = [max(p, 1) for p in prize_percentages]
+    
+    # Re-adjust if needed after ensuring minimum of 1%
+    current_sum = sum(prize_percentages)
+    if current_sum != 100:
+        max_idx = prize_percentages.index(max(prize_percentages))
+        prize_percentages[max_idx] = max(prize_percentages[max_idx] + 100 - current_sum, 1)
+    
+    return prize_percentages
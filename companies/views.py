@@ -4,16 +4,19 @@ Views for companies app
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
 from django.urls import reverse
+import hashlib
 import json
-import random
 import logging
 from .models import Company, ActivationSchedule
+from .utils import equal_prize_percentages, normalize_prize_percentages, pick_wheel_colors
 
 logger = logging.getLogger(__name__)
 
@@ -87,12 +90,7 @@ def register_company(request):
             prizes = [prize.strip() for prize in prizes.split(',') if prize.strip()]
             # Default equal percentages for old format
             if prizes:
-                equal_percentage = 100 // len(prizes)
-                prize_percentages = [equal_percentage] * len(prizes)
-                # Adjust last item to make total 100
-                remainder = 100 - (equal_percentage * len(prizes))
-                if remainder > 0:
-                    prize_percentages[-1] += remainder
+                prize_percentages = equal_prize_percentages(len(prizes))
         
         # Validate prizes after conversion
         if not prizes or (isinstance(prizes, list) and len(prizes) == 0):
@@ -105,75 +103,14 @@ def register_company(request):
         if not isinstance(prize_percentages, list):
             prize_percentages = []
         
-        # Validate percentages if provided
-        if prize_percentages and len(prize_percentages) > 0:
-            if len(prize_percentages) != len(prizes):
-                return JsonResponse({
-                    'success': False,
-                    'message': 'عدد النسب المئوية يجب أن يساوي عدد الجوائز'
-                }, status=400)
-            
-            # Validate that all percentages are positive
-            if any(p <= 0 for p in prize_percentages):
-                return JsonResponse({
-                    'success': False,
-                    'message': 'جميع النسب المئوية يجب أن تكون أكبر من 0'
-                }, status=400)
-            
-            # Normalize percentages to sum to 100
-            # This works for any total (e.g., 50%, 150%, 300%, etc.)
-            # The algorithm preserves the relative ratios between prizes
-            total_percentage = sum(prize_percentages)
-            if total_percentage > 0:
-                # Normalize to percentages that sum to 100
-                # Formula: (each_percentage / total) * 100
-                # This preserves the relative weights
-                normalized = [(float(p) / total_percentage) * 100.0 for p in prize_percentages]
-                
-                # Round to nearest integer for display/storage
-                prize_percentages = [round(p) for p in normalized]
-                
-                # Adjust to ensure sum is exactly 100 (handle rounding errors)
-                current_sum = sum(prize_percentages)
-                if current_sum != 100:
-                    difference = 100 - current_sum
-                    # Add/subtract difference from the prize with the highest percentage
-                    # This maintains the relative importance
-                    max_idx = prize_percentages.index(max(prize_percentages))
-                    prize_percentages[max_idx] += difference
-                
-                # Ensure no percentage is less than 1 after normalization
-                # This prevents prizes from having 0% chance
-                for i in range(len(prize_percentages)):
-                    if prize_percentages[i] < 1:
-                        prize_percentages[i] = 1
-                
-                # Re-adjust if needed after ensuring minimum of 1%
-                current_sum = sum(prize_percentages)
-                if current_sum != 100:
-                    difference = 100 - current_sum
-                    # Adjust the highest percentage to compensate
-                    max_idx = prize_percentages.index(max(prize_percentages))
-                    prize_percentages[max_idx] += difference
-                    # Ensure it doesn't go below 1
-                    if prize_percentages[max_idx] < 1:
-                        prize_percentages[max_idx] = 1
-        else:
-            # Default equal percentages if not provided
-            equal_percentage = 100 // len(prizes)
-            prize_percentages = [equal_percentage] * len(prizes)
-            remainder = 100 - (equal_percentage * len(prizes))
-            if remainder > 0:
-                prize_percentages[-1] += remainder
-        
-        # Ensure prize_percentages has the same length as prizes
-        if not prize_percentages or len(prize_percentages) != len(prizes):
-            # Generate default equal percentages
-            equal_percentage = 100 // len(prizes)
-            prize_percentages = [equal_percentage] * len(prizes)
-            remainder = 100 - (equal_percentage * len(prizes))
-            if remainder > 0:
-                prize_percentages[-1] += remainder
+        # Validate and normalize percentages (equal split if not provided)
+        try:
+            prize_percentages = normalize_prize_percentages(prizes, prize_percentages)
+        except ValueError as e:
+            return JsonResponse({
+                'success': False,
+                'message': str(e)
+            }, status=400)
         
         # Store prizes with percentages as list of dicts
         prizes_with_percentages = [
@@ -182,11 +119,7 @@ def register_company(request):
         ]
         
         # Generate colors
-        dawerha_colors = [
-            "#6A3FA0", "#F2C23E", "#8C59C4", "#FF6B9D", 
-            "#2E2240", "#4ECDC4", "#B794F6", "#FF8B5A"
-        ]
-        colors = random.sample(dawerha_colors, min(len(prizes), len(dawerha_colors)))
+        colors = pick_wheel_colors(len(prizes))
         
         # Determine final type
         final_type = custom_type if company_type == 'other' else company_type
@@ -215,7 +148,7 @@ def register_company(request):
                 }, ensure_ascii=False)
                 company.save()
         except Exception as db_error:
-            logger.error(f'Database error creating company: {db_error}')
+            logger.error('Database error creating company: %s', db_error)
             raise
         
         return JsonResponse({
@@ -226,16 +159,16 @@ def register_company(request):
         })
         
     except json.JSONDecodeError as e:
-        logger.error(f'JSON decode error in register_company: {e}')
+        logger.error('JSON decode error in register_company: %s', e)
         return JsonResponse({
             'success': False,
             'message': 'خطأ في البيانات المرسلة'
         }, status=400)
     except Exception as e:
-        logger.exception(f'Error in register_company: {e}')
+        logger.exception('Error in register_company: %s', e)
         import traceback
         error_details = traceback.format_exc()
-        logger.error(f'Full traceback: {error_details}')
+        logger.error('Full traceback: %s', error_details)
         return JsonResponse({
             'success': False,
             'message': f'حدث خطأ: {str(e)}'
@@ -308,3 +241,67 @@ def get_schedule_status(request, schedule_id):
         }, status=500)
 
 
+
+
+def _schedule_status_payload(schedule):
+    """Build the status dict for one schedule (company already loaded)"""
+    company_status = schedule.get_company_activation_status(refresh=False)
+    return {
+        'status': company_status['status'],
+        'display': company_status['display'],
+        'color': company_status['color'],
+        'is_active': company_status['is_active'],
+        'end_time': company_status.get('end_time'),
+        'schedule_active': schedule.is_active,
+        'should_activate_soon': schedule.should_activate_soon()
+    }
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def get_schedules_status(request):
+    """
+    Get activation status for many schedules in one request.
+    Accepts ?ids=1,2,3 or ?company=<id>. Responds with an ETag so the admin
+    poller gets a 304 when nothing changed.
+    """
+    ids = request.GET.get('ids', '')
+    company_id = request.GET.get('company')
+    
+    try:
+        schedule_ids = [int(i) for i in ids.split(',') if i.strip()]
+        if company_id:
+            company_id = int(company_id)
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'error': 'invalid ids'
+        }, status=400)
+    
+    if not schedule_ids and not company_id:
+        return JsonResponse({
+            'success': False,
+            'error': 'ids or company is required'
+        }, status=400)
+    
+    # One joined query for all schedules and their companies
+    schedules = ActivationSchedule.objects.select_related('company')
+    if schedule_ids:
+        schedules = schedules.filter(id__in=schedule_ids)
+    if company_id:
+        schedules = schedules.filter(company_id=company_id)
+    
+    statuses = {
+        str(schedule.id): _schedule_status_payload(schedule)
+        for schedule in schedules
+    }
+    
+    content = json.dumps({'success': True, 'schedules': statuses}, ensure_ascii=False, sort_keys=True)
+    etag = quote_etag(hashlib.md5(content.encode('utf-8')).hexdigest())
+    
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,15 @@
+"""
+ASGI config for dawerha project.
+
+Serves the async participant endpoints (registration, count, spin) without
+tying up a worker thread per in-flight request; sync views such as the admin
+run in Django's thread pool as usual.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dawerha.settings')
+
+application = get_asgi_application()
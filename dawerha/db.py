@@ -0,0 +1,104 @@
+"""
+Write helpers: retries for "database is locked" and optimistic versioned updates
+
+With SQLite a write can still time out waiting for the lock under a burst of
+spins. Retrying the write after a short randomized backoff spreads the
+competing writers out instead of failing the request.
+
+update_versioned() writes only the changed columns of a row with a `version`
+field, and only while the version is still the one the instance was loaded
+with, so two workers acting on the same stale read (e.g. both activating a
+company at the scheduled minute) cannot both win. save_bumping_version()
+moves the version on an ordinary save() so those updates notice the edit.
+"""
+import logging
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection, router
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def _is_locked_error(error):
+    return 'database is locked' in str(error) or 'database table is locked' in str(error)
+
+
+def retry_on_locked(func):
+    """
+    Retry func when the database reports it is locked.
+    Never retries inside an atomic block - the outer transaction has
+    already failed and must be retried as a whole.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        attempts = settings.DB_WRITE_RETRIES
+        for attempt in range(attempts + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as e:
+                if attempt == attempts or not _is_locked_error(e) or connection.in_atomic_block:
+                    raise
+                delay = settings.DB_WRITE_RETRY_DELAY * (2 ** attempt) * random.uniform(0.5, 1.5)
+                logger.warning("Database locked in %s, retrying in %.3fs (attempt %d)", func.__name__, delay, attempt + 1)
+                time.sleep(delay)
+
+    return wrapper
+
+
+@retry_on_locked
+def update_versioned(instance, **changes):
+    """
+    UPDATE ... SET <changes>, version = version + 1 WHERE pk = ? AND version = ?
+
+    On success the instance is updated in place and post_save is sent with
+    update_fields (cache invalidation still runs). Returns False when another
+    writer changed the row first; the instance is then reloaded.
+    """
+    model = type(instance)
+    using = router.db_for_write(model, instance=instance)
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now', False):
+            changes.setdefault(field.attname, timezone.now())
+
+    updated = model._default_manager.using(using).filter(
+        pk=instance.pk, version=instance.version
+    ).update(version=F('version') + 1, **changes)
+    if not updated:
+        instance.refresh_from_db(using=using)
+        return False
+
+    for name, value in changes.items():
+        setattr(instance, name, value)
+    instance.version += 1
+    post_save.send(
+        sender=model, instance=instance, created=False, raw=False,
+        using=using, update_fields=frozenset(changes) | {'version'}
+    )
+    return True
+
+
+def save_bumping_version(instance, save, *args, **kwargs):
+    """
+    Run save(*args, **kwargs) for an existing row with version = version + 1 in its UPDATE
+
+    The row is not re-read afterwards: the instance gets its old version + 1.
+    A concurrent writer can only leave the row ahead of that, which makes the
+    next update_versioned() reload instead of overwrite. If the save fails the
+    instance keeps its old version (so a retried save bumps again).
+    """
+    version = instance.version
+    instance.version = F('version') + 1
+    if kwargs.get('update_fields') is not None:
+        kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+    try:
+        save(*args, **kwargs)
+    except Exception:
+        instance.version = version
+        raise
+    instance.version = version + 1
@@ -0,0 +1,179 @@
+"""
+Read-replica routing for dashboards, exports and admin changelists
+
+Reads go to the primary unless they run inside a replica scope - the
+use_replica view decorator or the replica_reads() context manager - so only
+designated read-heavy code (dashboards, Excel exports, admin list pages)
+moves to the 'replica' alias. Spins and every write stay on the primary.
+
+- Sticky primary: a request that writes sets a short-lived cookie, and the
+  client's reads stay on the primary for REPLICA_STICKY_SECONDS so it sees
+  its own changes.
+- Lag fallback: replica health and lag are checked at most every
+  REPLICA_LAG_CHECK_INTERVAL seconds; a lagging or unreachable replica sends
+  reads back to the primary.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE = 'db_primary_pin'
+
+# True inside a replica scope
+_replica_scope = ContextVar('replica_scope', default=False)
+# Per-request state set by the middleware: {'pinned': bool, 'wrote': bool}
+_request_state = ContextVar('db_request_state', default=None)
+
+_lag_check = {'checked_at': None, 'healthy': True}
+
+POSTGRES_LAG_QUERY = '''
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+'''
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def replica_healthy():
+    """Whether the replica is reachable and within REPLICA_MAX_LAG (cached briefly)"""
+    now = time.monotonic()
+    checked_at = _lag_check['checked_at']
+    if checked_at is not None and now - checked_at < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return _lag_check['healthy']
+
+    healthy = True
+    try:
+        replica = connections[REPLICA_ALIAS]
+        with replica.cursor() as cursor:
+            if replica.vendor == 'postgresql':
+                cursor.execute(POSTGRES_LAG_QUERY)
+                lag = float(cursor.fetchone()[0])
+                if lag > settings.REPLICA_MAX_LAG:
+                    logger.warning("Replica lag %.1fs exceeds %ss, reading from primary", lag, settings.REPLICA_MAX_LAG)
+                    healthy = False
+            else:
+                # No replication lag to measure (e.g. two local SQLite files)
+                cursor.execute('SELECT 1')
+    except DatabaseError as e:
+        logger.warning("Replica unavailable, reading from primary: %s", e)
+        healthy = False
+
+    _lag_check.update(checked_at=now, healthy=healthy)
+    return healthy
+
+
+def _reads_from_replica():
+    if not _replica_scope.get() or not replica_configured():
+        return False
+    state = _request_state.get()
+    if state is not None and (state['pinned'] or state['wrote']):
+        return False
+    return replica_healthy()
+
+
+class PrimaryReplicaRouter:
+    """Send reads inside a replica scope to the replica; everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if _reads_from_replica():
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['wrote'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives its schema through replication
+        return db != REPLICA_ALIAS
+
+
+@contextmanager
+def replica_reads():
+    """Run the enclosed reads on the replica (when configured and healthy)"""
+    token = _replica_scope.set(True)
+    try:
+        yield
+    finally:
+        _replica_scope.reset(token)
+
+
+def use_replica(view_func):
+    """View decorator: serve the view's reads from the replica"""
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(*args, **kwargs):
+            with replica_reads():
+                return await view_func(*args, **kwargs)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            response = view_func(*args, **kwargs)
+            # Template responses query while rendering; render inside the scope
+            if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+                response.render()
+            return response
+    return wrapper
+
+
+class ReplicaPinningMiddleware:
+    """Keep a client on the primary for a short window after it writes"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _pin(self, response, state):
+        if state['wrote'] and replica_configured():
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        state = {'pinned': PIN_COOKIE in request.COOKIES, 'wrote': False}
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self._pin(response, state)
+
+    async def __acall__(self, request):
+        state = {'pinned': PIN_COOKIE in request.COOKIES, 'wrote': False}
+        token = _request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        return self._pin(response, state)
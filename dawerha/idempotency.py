@@ -0,0 +1,153 @@
+"""
+Idempotency-Key support for POST endpoints that create rows
+
+Clients on flaky venue networks retry spins and registrations. When a request
+carries an Idempotency-Key header, the first successful response is stored in
+the cache for IDEMPOTENCY_KEY_TTL seconds and replayed for retries with the
+same key, so a retry creates no new GameSpin/Participant and returns the same
+prize.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+LOCK_TIMEOUT = 30  # seconds a first request may take before a retry can run it again
+
+
+def _cache_key(request, key):
+    digest = hashlib.sha256(f'{request.path}:{key}'.encode('utf-8')).hexdigest()
+    return f'idempotency:{digest}'
+
+
+def _key_too_long():
+    return JsonResponse({
+        'success': False,
+        'message': 'مفتاح Idempotency-Key طويل جداً'
+    }, status=400)
+
+
+def _replay(stored, fingerprint):
+    """Build the response for a repeated key from the stored entry"""
+    if stored['fingerprint'] != fingerprint:
+        return JsonResponse({
+            'success': False,
+            'message': 'تم استخدام مفتاح Idempotency-Key مع بيانات مختلفة'
+        }, status=422)
+    response = HttpResponse(
+        stored['content'],
+        status=stored['status'],
+        content_type=stored['content_type']
+    )
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _in_progress():
+    # Concurrent retry while the first request is still running
+    return JsonResponse({
+        'success': False,
+        'message': 'الطلب قيد المعالجة، يرجى المحاولة بعد لحظات'
+    }, status=409, headers={'Retry-After': '1'})
+
+
+def _entry(response, fingerprint):
+    """Cache entry for a response, or None if it should not be replayed"""
+    if 200 <= response.status_code < 300 and not response.streaming:
+        return {
+            'fingerprint': fingerprint,
+            'status': response.status_code,
+            'content': response.content,
+            'content_type': response.get('Content-Type'),
+        }
+    return None
+
+
+def idempotent(view_func):
+    """
+    Replay the stored response for requests that repeat an Idempotency-Key.
+    Only 2xx responses are stored; failed requests can be retried for real.
+    Works with sync and async views (async views use the async cache API).
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return await view_func(request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return _key_too_long()
+
+            cache_key = _cache_key(request, key)
+            fingerprint = hashlib.sha256(request.body).hexdigest()
+
+            stored = await cache.aget(cache_key)
+            if stored is not None:
+                return _replay(stored, fingerprint)
+
+            lock_key = f'{cache_key}:lock'
+            if not await cache.aadd(lock_key, 1, LOCK_TIMEOUT):
+                return _in_progress()
+
+            # The first request may have stored its response and released the
+            # lock between the read above and our add
+            stored = await cache.aget(cache_key)
+            if stored is not None:
+                await cache.adelete(lock_key)
+                return _replay(stored, fingerprint)
+
+            try:
+                response = await view_func(request, *args, **kwargs)
+                entry = _entry(response, fingerprint)
+                if entry is not None:
+                    await cache.aset(cache_key, entry, settings.IDEMPOTENCY_KEY_TTL)
+            finally:
+                await cache.adelete(lock_key)
+
+            return response
+
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_func(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return _key_too_long()
+
+        cache_key = _cache_key(request, key)
+        fingerprint = hashlib.sha256(request.body).hexdigest()
+
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return _replay(stored, fingerprint)
+
+        lock_key = f'{cache_key}:lock'
+        if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            return _in_progress()
+
+        # The first request may have stored its response and released the
+        # lock between the read above and our add
+        stored = cache.get(cache_key)
+        if stored is not None:
+            cache.delete(lock_key)
+            return _replay(stored, fingerprint)
+
+        try:
+            response = view_func(request, *args, **kwargs)
+            entry = _entry(response, fingerprint)
+            if entry is not None:
+                cache.set(cache_key, entry, settings.IDEMPOTENCY_KEY_TTL)
+        finally:
+            cache.delete(lock_key)
+
+        return response
+
+    return wrapper
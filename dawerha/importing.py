@@ -0,0 +1,160 @@
+"""
+Shared CSV/XLSX import path for companies and influencers
+
+read_rows() maps the header row onto an importer's columns (English or
+Arabic aliases) and yields the data rows as text; import_rows() validates
+every row with the importer's build function, then allocates the slugs for
+the whole file with allocate_slugs and inserts it with bulk_create inside
+one transaction, so a file of a few thousand rows takes a handful of
+queries. companies/importer.py and influencers/importer.py define the
+columns and the per-row validation.
+"""
+import csv
+import io
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+
+from django import forms
+from django.db import IntegrityError, router, transaction
+
+from .slugs import SAVE_ATTEMPTS, allocate_slugs
+
+LIST_SEPARATOR = re.compile(r'[,،|]')
+CSV_ENCODINGS = ('utf-8-sig', 'cp1256')  # Excel on Arabic Windows saves CSV as cp1256
+BATCH_SIZE = 500
+
+
+@dataclass
+class ImportResult:
+    """Outcome of an import; errors are (row_number, message) pairs"""
+    total: int = 0
+    created: int = 0
+    errors: list = field(default_factory=list)
+
+
+class ImportForm(forms.Form):
+    """Upload form for the admin import pages"""
+    file = forms.FileField(label='الملف (CSV أو XLSX)')
+    skip_invalid = forms.BooleanField(
+        required=False, label='استيراد الصفوف الصحيحة وتجاهل الصفوف التي بها أخطاء'
+    )
+    dry_run = forms.BooleanField(required=False, label='تحقق فقط بدون استيراد')
+
+
+def _cell(value):
+    """Text of a CSV/XLSX cell (Excel stores phone numbers as numbers)"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    return str(value).strip()
+
+
+def _read_csv(fileobj):
+    data = fileobj.read()
+    for encoding in CSV_ENCODINGS:
+        try:
+            text = data.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise ValueError('تعذر قراءة ملف CSV: الترميز غير مدعوم')
+    return csv.reader(io.StringIO(text, newline=''))
+
+
+def _read_xlsx(fileobj):
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        raise ValueError(f'تعذر قراءة ملف Excel: {e}')
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        # Read-only workbooks keep the file open until closed
+        workbook.close()
+
+
+def read_rows(fileobj, filename, columns, required):
+    """
+    Yield (row_number, {column: text}) for each non-empty data row
+    Args:
+        columns: {column: header aliases}
+        required: columns the header must contain
+    Raises ValueError for an unsupported file or missing required columns
+    """
+    suffix = Path(filename).suffix.lower()
+    if suffix == '.csv':
+        rows = _read_csv(fileobj)
+    elif suffix in ('.xlsx', '.xlsm'):
+        rows = _read_xlsx(fileobj)
+    else:
+        raise ValueError('صيغة الملف غير مدعومة (CSV أو XLSX فقط)')
+
+    header_lookup = {alias.lower(): key for key, aliases in columns.items() for alias in aliases}
+    header = next(rows, None) or ()
+    found = [header_lookup.get(_cell(title).lower()) for title in header]
+    missing = [name for name in required if name not in found]
+    if missing:
+        raise ValueError(f"أعمدة مطلوبة غير موجودة: {', '.join(missing)}")
+
+    for row_number, row in enumerate(rows, start=2):
+        values = {}
+        for column, value in zip(found, row):
+            if column:
+                values[column] = _cell(value)
+        if any(values.values()):
+            yield row_number, values
+
+
+def split_list(value):
+    """Items of a list cell separated by , or ، or |"""
+    return [item.strip() for item in LIST_SEPARATOR.split(value) if item.strip()]
+
+
+def import_rows(model, rows, build, skip_invalid=False, dry_run=False):
+    """
+    Validate rows from read_rows() and bulk-insert the valid objects
+    Args:
+        model: Company or Influencer (slugs are allocated from the name)
+        rows: iterable of (row_number, values)
+        build: values -> unsaved instance; raises ValueError for invalid rows
+        skip_invalid: insert the valid rows even when some rows have errors
+                      (by default any error aborts the whole import)
+        dry_run: validate only
+    Returns:
+        ImportResult
+    """
+    result = ImportResult()
+    objects = []
+    for row_number, values in rows:
+        result.total += 1
+        try:
+            objects.append(build(values))
+        except ValueError as e:
+            result.errors.append((row_number, str(e)))
+
+    if dry_run or not objects or (result.errors and not skip_invalid):
+        return result
+
+    using = router.db_for_write(model)
+    for attempt in range(SAVE_ATTEMPTS):
+        for obj, slug in zip(objects, allocate_slugs(model, [obj.name for obj in objects])):
+            obj.slug = slug
+        try:
+            with transaction.atomic(using=using):
+                model.objects.using(using).bulk_create(objects, batch_size=BATCH_SIZE)
+            break
+        except IntegrityError:
+            # A concurrent registration took one of the slugs; allocate again
+            if attempt == SAVE_ATTEMPTS - 1:
+                raise
+
+    result.created = len(objects)
+    return result
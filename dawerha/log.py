@@ -0,0 +1,156 @@
+"""
+Queue-based JSON logging
+
+Request threads only put records on an in-memory queue (QueueLogHandler); a
+QueueListener thread formats them as JSON lines and does the file/console
+I/O. When the queue is full, records are dropped and counted instead of
+blocking the request.
+
+SamplingFilter keeps a fraction of INFO/DEBUG records for chatty loggers
+(the spin path logs on every spin); warnings and errors are always kept.
+
+Log calls on hot paths should use %-style arguments
+(logger.info("Company %s ...", name)) so sampled-out or disabled records are
+never formatted.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# LogRecord attributes that are not structured extras
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; extra={...} fields are kept as keys"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.thread,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep INFO/DEBUG records of the listed loggers with the given probability"""
+
+    def __init__(self, rates=None):
+        super().__init__()
+        # {'game.views': 0.1} also applies to child loggers (game.views.*)
+        self.rates = rates or {}
+
+    def _rate(self, name):
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition('.')[0]
+        return 1.0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1 or random.random() < rate
+
+
+class QueueLogHandler(QueueHandler):
+    """
+    Queue handler that owns its listener and output handlers
+
+    The listener thread is (re)started lazily in each process, so it also
+    works when gunicorn forks workers after loading the settings (--preload).
+    """
+
+    def __init__(self, filename=None, file_level='INFO', console_level=None, queue_size=10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.queue_size = queue_size
+        self.dropped = 0
+        self.targets = []
+
+        formatter = JsonFormatter()
+        if filename:
+            file_handler = logging.FileHandler(filename, encoding='utf-8', delay=True)
+            file_handler.setLevel(file_level)
+            file_handler.setFormatter(formatter)
+            self.targets.append(file_handler)
+        if console_level:
+            console_handler = logging.StreamHandler(sys.stderr)
+            console_handler.setLevel(console_level)
+            console_handler.setFormatter(formatter)
+            self.targets.append(console_handler)
+
+        self._exc_formatter = logging.Formatter()
+        self._listener = None
+        self._listener_pid = None
+        self._start_lock = threading.Lock()
+        atexit.register(self.stop_listener)
+
+    def _ensure_listener(self):
+        if self._listener_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._listener_pid == os.getpid():
+                return
+            # After a fork the parent's listener thread does not exist here
+            self.queue = queue.Queue(maxsize=self.queue_size)
+            self._listener = QueueListener(self.queue, *self.targets, respect_handler_level=True)
+            self._listener.start()
+            self._listener_pid = os.getpid()
+
+    def prepare(self, record):
+        # Merge the message now (args may change later) but leave JSON formatting to the listener
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        self._ensure_listener()
+        super().emit(record)
+
+    def stop_listener(self):
+        """Flush queued records (called at exit)"""
+        if self._listener is not None and self._listener_pid == os.getpid():
+            try:
+                self._listener.stop()
+            except queue.Full:
+                # No room for the stop sentinel; the daemon thread ends with the process
+                pass
+            self._listener = None
+            self._listener_pid = None
+
+    def close(self):
+        self.stop_listener()
+        for target in self.targets:
+            target.close()
+        super().close()
@@ -0,0 +1,234 @@
+"""
+Per-view request metrics exposed in Prometheus text format
+
+MetricsMiddleware records, for every resolved URL name (game:spin,
+influencers:spin_wheel, admin:companies_company_changelist, ...):
+
+- request count by method and status code
+- a latency histogram
+- SQL query count and total SQL time
+
+SQL is measured with a connection execute_wrapper installed on every new
+connection; it reports into the current request through a context variable,
+so queries run by async views in ORM threads are attributed correctly.
+
+Each thread only writes to its own counters (no locks on the request path);
+the /metrics view merges every thread's counters when scraped. Counters are
+per process: with several gunicorn workers each scrape sees one worker.
+"""
+import hmac
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+# Latency histogram upper bounds, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_VIEW = 'unmatched'
+# Any other method is counted as OTHER_METHOD so clients cannot grow the label set
+KNOWN_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+OTHER_METHOD = 'other'
+
+# SQL stats of the request being handled: [query_count, query_seconds]
+_request_sql = ContextVar('metrics_request_sql', default=None)
+
+_local = threading.local()
+_registry = []
+_registry_lock = threading.Lock()
+
+
+class _ThreadCounters:
+    """Counters written by a single thread and read on scrape"""
+
+    def __init__(self):
+        # (view, method, status) -> count
+        self.responses = {}
+        # view -> [bucket counts..., +Inf count, latency sum, sql count, sql seconds]
+        self.views = {}
+
+
+def _thread_counters():
+    counters = getattr(_local, 'counters', None)
+    if counters is None:
+        counters = _local.counters = _ThreadCounters()
+        # Once per thread, not per request
+        with _registry_lock:
+            _registry.append(counters)
+    return counters
+
+
+def _record_sql(execute, sql, params, many, context):
+    stats = _request_sql.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - started
+
+
+def _install_sql_wrapper(sender, connection, **kwargs):
+    if _record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_sql)
+
+
+connection_created.connect(_install_sql_wrapper, dispatch_uid='dawerha_metrics_sql')
+
+
+def record(view, method, status, seconds, sql_count, sql_seconds):
+    """Add one finished request to the current thread's counters"""
+    counters = _thread_counters()
+    if method not in KNOWN_METHODS:
+        method = OTHER_METHOD
+    key = (view, method, status)
+    counters.responses[key] = counters.responses.get(key, 0) + 1
+
+    row = counters.views.get(view)
+    if row is None:
+        row = counters.views[view] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0, 0.0]
+    for index, bound in enumerate(LATENCY_BUCKETS):
+        if seconds <= bound:
+            row[index] += 1
+            break
+    else:
+        row[len(LATENCY_BUCKETS)] += 1
+    row[-3] += seconds
+    row[-2] += sql_count
+    row[-1] += sql_seconds
+
+
+def snapshot():
+    """Merge every thread's counters into (responses, views)"""
+    with _registry_lock:
+        registry = list(_registry)
+
+    responses = {}
+    views = {}
+    for counters in registry:
+        # dict() copies under the GIL, so a concurrent insert cannot break iteration
+        for key, count in dict(counters.responses).items():
+            responses[key] = responses.get(key, 0) + count
+        for view, row in dict(counters.views).items():
+            merged = views.get(view)
+            if merged is None:
+                views[view] = list(row)
+            else:
+                for index, value in enumerate(row):
+                    merged[index] += value
+    return responses, views
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus():
+    responses, views = snapshot()
+    lines = [
+        '# HELP dawerha_http_requests_total Requests by URL name, method and status code.',
+        '# TYPE dawerha_http_requests_total counter',
+    ]
+    for (view, method, status), count in sorted(responses.items()):
+        lines.append(
+            f'dawerha_http_requests_total{{view="{_label(view)}",method="{_label(method)}",'
+            f'status="{status}"}} {count}'
+        )
+
+    lines += [
+        '# HELP dawerha_http_request_duration_seconds Request latency by URL name.',
+        '# TYPE dawerha_http_request_duration_seconds histogram',
+    ]
+    for view, row in sorted(views.items()):
+        view_label = _label(view)
+        cumulative = 0
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            cumulative += row[index]
+            lines.append(
+                f'dawerha_http_request_duration_seconds_bucket{{view="{view_label}",le="{bound}"}} {cumulative}'
+            )
+        cumulative += row[len(LATENCY_BUCKETS)]
+        lines.append(f'dawerha_http_request_duration_seconds_bucket{{view="{view_label}",le="+Inf"}} {cumulative}')
+        lines.append(f'dawerha_http_request_duration_seconds_sum{{view="{view_label}"}} {row[-3]:.6f}')
+        lines.append(f'dawerha_http_request_duration_seconds_count{{view="{view_label}"}} {cumulative}')
+
+    lines += [
+        '# HELP dawerha_db_queries_total SQL queries executed by URL name.',
+        '# TYPE dawerha_db_queries_total counter',
+    ]
+    for view, row in sorted(views.items()):
+        lines.append(f'dawerha_db_queries_total{{view="{_label(view)}"}} {row[-2]}')
+
+    lines += [
+        '# HELP dawerha_db_query_seconds_total Time spent in SQL by URL name.',
+        '# TYPE dawerha_db_query_seconds_total counter',
+    ]
+    for view, row in sorted(views.items()):
+        lines.append(f'dawerha_db_query_seconds_total{{view="{_label(view)}"}} {row[-1]:.6f}')
+
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """Time each request and count its SQL, keyed by the resolved URL name"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported
+        for connection in connections.all(initialized_only=True):
+            _install_sql_wrapper(sender=None, connection=connection)
+
+    def _finish(self, request, response, started, stats):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match is not None and match.view_name else UNMATCHED_VIEW
+        record(view, request.method, response.status_code,
+               time.perf_counter() - started, stats[0], stats[1])
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        stats = [0, 0.0]
+        token = _request_sql.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_sql.reset(token)
+        return self._finish(request, response, started, stats)
+
+    async def __acall__(self, request):
+        stats = [0, 0.0]
+        token = _request_sql.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_sql.reset(token)
+        return self._finish(request, response, started, stats)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint: METRICS_TOKEN bearer token or a staff session"""
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get('Authorization', '')
+    if token and authorization.startswith('Bearer ') and hmac.compare_digest(authorization[7:], token):
+        allowed = True
+    else:
+        user = getattr(request, 'user', None)
+        allowed = user is not None and user.is_authenticated and user.is_staff
+    if not allowed:
+        return HttpResponseForbidden()
+
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -27,9 +27,45 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', ''),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        # Reuse connections across requests; checked before reuse so a
+        # connection dropped by the server or a failover is replaced
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Under ASGI (SERVER_MODE=asgi) persistent connections are not reused across
+# requests and pile up until the server's max_connections; Django advises
+# CONN_MAX_AGE = 0 there, with DB_POOL to avoid reconnecting per request
+if SERVER_MODE == 'asgi':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+
+# Optional streaming replica for dashboards, exports and admin list pages
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Gunicorn sizing (shared with start_production.sh)
+WEB_WORKERS = int(os.environ.get('WEB_WORKERS', '3'))
+WEB_THREADS = int(os.environ.get('WEB_THREADS', '2'))
+
+# Optional psycopg 3 connection pool (requires "psycopg[pool]" instead of psycopg2).
+# The pool lives in each worker process, so it is sized from the threads per worker.
+# Django requires CONN_MAX_AGE = 0 when the pool is enabled.
+if os.environ.get('DB_POOL', 'False').lower() in ('true', '1', 'yes'):
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '1')),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', str(WEB_THREADS + 2))),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        },
+    }
+
 # Email settings for production
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
@@ -42,36 +78,49 @@ EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
-    'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
-            'style': '{',
+    'filters': {
+        'spin_sampling': {
+            '()': 'dawerha.log.SamplingFilter',
+            'rates': {
+                'game.views': LOG_SPIN_SAMPLE_RATE,
+                'game.distribution': LOG_SPIN_SAMPLE_RATE,
+            },
         },
     },
     'handlers': {
-        'file': {
-            'level': 'ERROR',
-            'class': 'logging.FileHandler',
+        # JSON lines, written by a listener thread (errors to the file, INFO+ to the console)
+        'queue': {
+            '()': 'dawerha.log.QueueLogHandler',
             'filename': BASE_DIR / 'logs' / 'dawerha.log',
-            'formatter': 'verbose',
-        },
-        'console': {
-            'level': 'INFO',
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            'file_level': 'ERROR',
+            'console_level': 'INFO',
+            'queue_size': LOG_QUEUE_SIZE,
+            'filters': ['spin_sampling'],
         },
     },
     'loggers': {
         'django': {
-            'handlers': ['file', 'console'],
+            'handlers': ['queue'],
             'level': 'ERROR',
             'propagate': True,
         },
         'companies': {
-            'handlers': ['file', 'console'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': True,
         },
+        'game': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+        },
+        'influencers': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+        },
+        'dawerha': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+        },
     },
 }
 
@@ -0,0 +1,160 @@
+"""
+Sampled slow-request profiler
+
+RequestProfilerMiddleware runs selected requests under cProfile and writes
+two files per kept request to PROFILE_DIR (logs/profiles/):
+
+    <url name>_<timestamp>_<ms>ms.prof     cProfile stats (pstats / snakeviz)
+    <url name>_<timestamp>_<ms>ms.sql.txt  the request's SQL with timings
+
+Requests are picked by sample_rate (fraction of requests) and/or kept when
+they take at least slow_ms. In slow-only mode every request is profiled and
+only the slow ones are written, so keep that window short. At most one
+request per process is profiled at a time; async requests are passed
+through (profile those endpoints under WSGI).
+
+The profiler is off by default and switched at runtime through the cache
+(no restart), normally with `python manage.py profiling on/off`. Workers
+re-read the switch every PROFILER_CHECK_INTERVAL seconds; use a shared
+cache (Redis) so one switch reaches all workers.
+"""
+import cProfile
+import logging
+import random
+import re
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PROFILER_CACHE_KEY = 'request_profiler:config'
+
+_config = {'checked_at': None, 'value': None}
+_profile_lock = threading.Lock()
+
+
+def enable_profiler(sample_rate=0.0, slow_ms=0, timeout=None):
+    """Switch profiling on for every worker sharing the cache"""
+    cache.set(PROFILER_CACHE_KEY, {'sample_rate': sample_rate, 'slow_ms': slow_ms}, timeout)
+    _config['checked_at'] = None
+
+
+def disable_profiler():
+    cache.delete(PROFILER_CACHE_KEY)
+    _config['checked_at'] = None
+
+
+def profiler_config():
+    """Current switch from the cache (re-read at most every PROFILER_CHECK_INTERVAL)"""
+    now = time.monotonic()
+    checked_at = _config['checked_at']
+    if checked_at is None or now - checked_at >= settings.PROFILER_CHECK_INTERVAL:
+        try:
+            _config['value'] = cache.get(PROFILER_CACHE_KEY)
+        except Exception as e:
+            logger.warning("Could not read profiler switch: %s", e)
+            _config['value'] = None
+        _config['checked_at'] = now
+    return _config['value']
+
+
+def _should_profile(config):
+    if not config:
+        return False
+    if config.get('slow_ms'):
+        return True
+    return random.random() < config.get('sample_rate', 0)
+
+
+class _SqlLog:
+    """execute_wrapper collecting (alias, seconds, sql) for one request"""
+
+    def __init__(self):
+        self.queries = []
+
+    def wrapper(self, alias):
+        def record(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.queries.append((alias, time.perf_counter() - started, sql))
+        return record
+
+
+def _dump(view_name, elapsed_ms, profiler, sql_log):
+    directory = settings.PROFILE_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '.', view_name)
+    stamp = timezone.now().strftime('%Y%m%d-%H%M%S-%f')
+    base = directory / f'{safe_name}_{stamp}_{elapsed_ms:.0f}ms'
+
+    profiler.dump_stats(f'{base}.prof')
+    total = sum(seconds for _, seconds, _ in sql_log.queries)
+    lines = [f'# {view_name} {elapsed_ms:.1f}ms, {len(sql_log.queries)} queries, {total * 1000:.1f}ms SQL']
+    lines += [f'[{alias}] {seconds * 1000:.2f}ms {sql}' for alias, seconds, sql in sql_log.queries]
+    with open(f'{base}.sql.txt', 'w', encoding='utf-8') as handle:
+        handle.write('\n'.join(lines) + '\n')
+    return base
+
+
+class RequestProfilerMiddleware:
+    """Profile sampled or slow requests while the runtime switch is on"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        config = profiler_config()
+        if not _should_profile(config) or not _profile_lock.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            return self._profile(request, config)
+        finally:
+            _profile_lock.release()
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def _profile(self, request, config):
+        profiler = cProfile.Profile()
+        sql_log = _SqlLog()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(sql_log.wrapper(connection.alias)))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        slow_ms = config.get('slow_ms') or 0
+        # Slow-only mode keeps just the slow requests; sampled requests are always kept
+        if slow_ms and elapsed_ms < slow_ms and random.random() >= config.get('sample_rate', 0):
+            return response
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match is not None and match.view_name else 'unmatched'
+        try:
+            base = _dump(view_name, elapsed_ms, profiler, sql_log)
+            logger.info("Profiled %s (%.0fms) -> %s.prof", view_name, elapsed_ms, base)
+        except OSError as e:
+            logger.warning("Could not write profile for %s: %s", view_name, e)
+        return response
@@ -31,8 +31,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'dawerha.metrics.MetricsMiddleware',  # Per-view latency and SQL counters for /metrics
+    'dawerha.profiling.RequestProfilerMiddleware',  # Sampled cProfile dumps, off until switched on
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'dawerha.db_router.ReplicaPinningMiddleware',  # Sticky primary reads after a write
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -70,6 +73,43 @@ DATABASES = {
     }
 }
 
+# SQLite tuning for single-node deployments: WAL lets readers run alongside
+# the writer, IMMEDIATE transactions take the write lock up front (no
+# deadlocked lock upgrades) and the busy timeout waits instead of failing
+# with "database is locked"
+SQLITE_TUNING = config('SQLITE_TUNING', default=True, cast=bool)
+SQLITE_BUSY_TIMEOUT = config('SQLITE_BUSY_TIMEOUT', default=20, cast=int)  # seconds
+if SQLITE_TUNING:
+    DATABASES['default']['OPTIONS'] = {
+        'timeout': SQLITE_BUSY_TIMEOUT,
+        'transaction_mode': 'IMMEDIATE',
+        'init_command': (
+            'PRAGMA journal_mode=WAL;'
+            'PRAGMA synchronous=NORMAL;'
+            'PRAGMA cache_size=-20000;'  # ~20 MB page cache
+            'PRAGMA mmap_size=134217728;'  # 128 MB
+            'PRAGMA temp_store=MEMORY;'
+        ),
+    }
+
+# Optional read replica for dashboards, exports and admin list pages
+# (locally: a second SQLite file, e.g. a copy of db.sqlite3)
+DB_REPLICA_PATH = config('DB_REPLICA_PATH', default='')
+if DB_REPLICA_PATH:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': DB_REPLICA_PATH,
+        'TEST': {'MIRROR': 'default'},
+    }
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=5, cast=int)
+REPLICA_MAX_LAG = config('REPLICA_MAX_LAG', default=10, cast=int)  # seconds
+REPLICA_LAG_CHECK_INTERVAL = 5  # seconds between replica health checks
+DATABASE_ROUTERS = ['dawerha.db_router.PrimaryReplicaRouter']
+
+# Retries for writes that still hit "database is locked" (exponential backoff with jitter)
+DB_WRITE_RETRIES = config('DB_WRITE_RETRIES', default=3, cast=int)
+DB_WRITE_RETRY_DELAY = 0.05  # seconds, doubled on each attempt
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -134,22 +174,92 @@ if not DEBUG:
     SECURE_HSTS_INCLUDE_SUBDOMAINS = True
     SECURE_HSTS_PRELOAD = True
 
+# Server interface the process runs under (start_production.sh SERVER_MODE):
+# 'wsgi' (threaded gunicorn, the default) or 'asgi' (uvicorn workers). Both
+# serve the same sync views; under asgi each request pays a sync_to_async hop
+SERVER_MODE = config('SERVER_MODE', default='wsgi')
+
+# Participant registration ingest (buffered bulk inserts for live-stream bursts)
+PARTICIPANT_INGEST_ENABLED = config('PARTICIPANT_INGEST_ENABLED', default=False, cast=bool)
+PARTICIPANT_INGEST_QUEUE_SIZE = config('PARTICIPANT_INGEST_QUEUE_SIZE', default=5000, cast=int)
+PARTICIPANT_INGEST_BATCH_SIZE = config('PARTICIPANT_INGEST_BATCH_SIZE', default=500, cast=int)
+PARTICIPANT_INGEST_FLUSH_MS = config('PARTICIPANT_INGEST_FLUSH_MS', default=200, cast=int)
+PARTICIPANT_INGEST_SLUG_CACHE_TTL = 300  # seconds
+
+# Spin rate limiting (per-company quotas are set on each company)
+# Counters live in the cache backend; use a shared cache (Redis) with several workers
+SPIN_RATE_LIMIT_SLIDING_WINDOW = config('SPIN_RATE_LIMIT_SLIDING_WINDOW', default=False, cast=bool)
+
+# How long spin/registration responses are replayed for a repeated Idempotency-Key
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=24 * 60 * 60, cast=int)
+
+# Offline kiosk batch spin API (signing key is set per company)
+KIOSK_BATCH_MAX_SPINS = config('KIOSK_BATCH_MAX_SPINS', default=200, cast=int)
+KIOSK_BATCH_MAX_AGE_HOURS = config('KIOSK_BATCH_MAX_AGE_HOURS', default=72, cast=int)
+KIOSK_SIGNATURE_TOLERANCE = 300  # seconds of clock skew allowed for signed requests
+
+# Browser/CDN cache lifetime for the wheel configuration JSON, in seconds
+WHEEL_CONFIG_MAX_AGE = config('WHEEL_CONFIG_MAX_AGE', default=60, cast=int)
+
+# Upper bound for the cached company play page, in seconds (0 = disabled)
+PLAY_PAGE_CACHE_TIMEOUT = config('PLAY_PAGE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Bearer token for Prometheus scrapes of /metrics (staff sessions are always allowed)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Request profiler (switched on at runtime with `manage.py profiling on`)
+PROFILE_DIR = BASE_DIR / 'logs' / 'profiles'
+PROFILER_CHECK_INTERVAL = 5  # seconds between reads of the cache switch
+
 # Logging
+# Records go through an in-memory queue; a listener thread writes JSON lines
+# to logs/dawerha.log so log I/O stays off the request threads (dawerha.log)
+LOG_QUEUE_SIZE = config('LOG_QUEUE_SIZE', default=10000, cast=int)
+# Fraction of INFO/DEBUG spin-path records kept (warnings and errors are always kept)
+LOG_SPIN_SAMPLE_RATE = config('LOG_SPIN_SAMPLE_RATE', default=0.1, cast=float)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'spin_sampling': {
+            '()': 'dawerha.log.SamplingFilter',
+            'rates': {
+                'game.views': LOG_SPIN_SAMPLE_RATE,
+                'game.distribution': LOG_SPIN_SAMPLE_RATE,
+            },
+        },
+    },
     'handlers': {
-        'file': {
-            'level': 'INFO',
-            'class': 'logging.FileHandler',
+        'queue': {
+            '()': 'dawerha.log.QueueLogHandler',
             'filename': BASE_DIR / 'logs' / 'dawerha.log',
+            'file_level': 'INFO',
+            'queue_size': LOG_QUEUE_SIZE,
+            'filters': ['spin_sampling'],
         },
     },
     'loggers': {
         'django': {
-            'handlers': ['file'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': True,
         },
+        'companies': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+        },
+        'game': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+        },
+        'influencers': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+        },
+        'dawerha': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+        },
     },
 }
@@ -0,0 +1,113 @@
+"""
+Unique slug allocation for Company and Influencer
+
+The old save() loop ran one exists() query per candidate and could still
+race with a concurrent registration of the same name. allocate_slug() reads
+every taken slug that starts with the base in a single query (served by the
+slug's unique index; on PostgreSQL Django adds a varchar_pattern_ops index
+for LIKE 'base%') and picks a free candidate in memory. save_with_slug()
+retries the insert with a fresh slug when it loses the race and hits the
+unique constraint. allocate_slugs() is the bulk variant for imports.
+"""
+import random
+import string
+
+from django.db import IntegrityError, router, transaction
+from django.utils.text import slugify
+
+SUFFIX_LENGTH = 4
+SUFFIX_CHARS = string.ascii_lowercase + string.digits
+SAVE_ATTEMPTS = 3
+IN_QUERY_CHUNK = 500  # slugs per IN lookup in allocate_slugs
+
+
+def base_slug(name, max_length=250):
+    """Latin-only slug of the name; a random one when the name has no Latin characters"""
+    # Use allow_unicode=False to ensure slug contains only Latin characters
+    base = slugify(name, allow_unicode=False)
+    if not base:
+        base = ''.join(random.choices(string.ascii_lowercase, k=8))
+    # Leave room for the "-xxxx" suffix
+    return base[:max_length - SUFFIX_LENGTH - 1].strip('-')
+
+
+def _pick(base, taken):
+    """The base itself when free, else base-<random suffix> not in taken"""
+    if base not in taken:
+        return base
+    while True:
+        suffix = ''.join(random.choices(SUFFIX_CHARS, k=SUFFIX_LENGTH))
+        candidate = f'{base}-{suffix}'
+        if candidate not in taken:
+            return candidate
+
+
+def _max_length(model, field):
+    return model._meta.get_field(field).max_length
+
+
+def _writable(model):
+    # Read from the write database: a lagging replica could miss a fresh slug
+    return model._default_manager.using(router.db_for_write(model))
+
+
+def allocate_slug(model, name, field='slug'):
+    """Return a slug for name that no row of model uses yet (one query)"""
+    base = base_slug(name, _max_length(model, field))
+    taken = set(_writable(model).filter(
+        **{f'{field}__startswith': base}
+    ).values_list(field, flat=True))
+    return _pick(base, taken)
+
+
+def _existing(model, field, slugs):
+    """The subset of slugs already in the table (chunked IN lookups on the unique index)"""
+    slugs = list(slugs)
+    found = set()
+    for start in range(0, len(slugs), IN_QUERY_CHUNK):
+        found.update(_writable(model).filter(
+            **{f'{field}__in': slugs[start:start + IN_QUERY_CHUNK]}
+        ).values_list(field, flat=True))
+    return found
+
+
+def allocate_slugs(model, names, field='slug'):
+    """
+    Return one slug per name, unique against the table and within the batch
+
+    Candidates are checked with exact IN lookups rather than one prefix scan per
+    name: the bases first, then the suffixed picks, re-picking the rare clash.
+    """
+    max_length = _max_length(model, field)
+    bases = [base_slug(name, max_length) for name in names]
+    taken = _existing(model, field, set(bases))
+
+    slugs = [None] * len(bases)
+    pending = range(len(bases))
+    while pending:
+        for i in pending:
+            slugs[i] = _pick(bases[i], taken)
+            taken.add(slugs[i])
+        clashes = _existing(model, field, {slugs[i] for i in pending if slugs[i] != bases[i]})
+        pending = [i for i in pending if slugs[i] in clashes]
+    return slugs
+
+
+def save_with_slug(instance, name, save, field='slug'):
+    """
+    Allocate a slug for instance and run save(); when a concurrent insert took
+    the same slug first, allocate again and retry (up to SAVE_ATTEMPTS times)
+    """
+    model = type(instance)
+    using = router.db_for_write(model, instance=instance)
+    for attempt in range(SAVE_ATTEMPTS):
+        slug = allocate_slug(model, name, field)
+        setattr(instance, field, slug)
+        try:
+            # Savepoint so a failed insert does not break the caller's transaction
+            with transaction.atomic(using=using):
+                return save()
+        except IntegrityError:
+            # Only a lost slug race is retried; other constraint errors propagate
+            if attempt == SAVE_ATTEMPTS - 1 or not model._default_manager.using(using).filter(**{field: slug}).exists():
+                raise
@@ -0,0 +1,101 @@
+"""
+Tests for the Idempotency-Key decorator
+
+A retry that reads the cache just before the first request stores its
+response must replay that response, not run the view a second time.
+"""
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from dawerha import idempotency
+from dawerha.idempotency import IDEMPOTENCY_HEADER, idempotent
+
+
+class InterleavingCache:
+    """
+    Cache proxy that runs `interleave` right after the first read of the
+    response key, i.e. between a request's read and its lock add
+    """
+
+    def __init__(self, interleave):
+        self.interleave = interleave
+
+    def _take_interleave(self):
+        interleave, self.interleave = self.interleave, None
+        return interleave
+
+    def get(self, key, *args, **kwargs):
+        value = cache.get(key, *args, **kwargs)
+        interleave = self._take_interleave()
+        if interleave is not None:
+            interleave()
+        return value
+
+    async def aget(self, key, *args, **kwargs):
+        value = await cache.aget(key, *args, **kwargs)
+        interleave = self._take_interleave()
+        if interleave is not None:
+            await interleave()
+        return value
+
+    def __getattr__(self, name):
+        return getattr(cache, name)
+
+
+class IdempotentInterleavingTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.calls = 0
+
+    def request(self):
+        return self.factory.post(
+            '/game/spin/test/', json.dumps({'visitor_name': 'x'}),
+            content_type='application/json', headers={IDEMPOTENCY_HEADER: 'retry-1'}
+        )
+
+    def lock_key(self):
+        return f"{idempotency._cache_key(self.request(), 'retry-1')}:lock"
+
+    def test_sync_retry_between_read_and_lock_replays(self):
+        @idempotent
+        def view(request):
+            self.calls += 1
+            return JsonResponse({'success': True, 'spin': self.calls})
+
+        first = []
+        with mock.patch.object(idempotency, 'cache', InterleavingCache(lambda: first.append(view(self.request())))):
+            retry = view(self.request())
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.content, first[0].content)
+        self.assertIsNone(cache.get(self.lock_key()))
+
+    def test_async_retry_between_read_and_lock_replays(self):
+        @idempotent
+        async def view(request):
+            self.calls += 1
+            return JsonResponse({'success': True, 'spin': self.calls})
+
+        first = []
+
+        async def run_first():
+            first.append(await view(self.request()))
+
+        async def run_retry():
+            with mock.patch.object(idempotency, 'cache', InterleavingCache(run_first)):
+                return await view(self.request())
+
+        retry = async_to_sync(run_retry)()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.content, first[0].content)
+        self.assertIsNone(cache.get(self.lock_key()))
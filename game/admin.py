@@ -3,6 +3,7 @@ Admin configuration for game app
 """
 from django.contrib import admin
 from django.utils.html import format_html
+from dawerha.db_router import use_replica
 from .models import GameSpin
 
 
@@ -33,3 +34,9 @@ class GameSpinAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('company')
+    
+    def changelist_view(self, request, extra_context=None):
+        """List pages read from the replica; actions (POST) stay on the primary"""
+        if request.method == 'GET':
+            return use_replica(super().changelist_view)(request, extra_context)
+        return super().changelist_view(request, extra_context)
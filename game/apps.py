@@ -8,5 +8,7 @@ class GameConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'game'
     verbose_name = 'الألعاب'
-
-
+    
+    def ready(self):
+        # Connect cache invalidation signals
+        from . import pagecache, ratelimit  # noqa: F401
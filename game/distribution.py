@@ -0,0 +1,124 @@
+"""
+Prize weighting helpers and deterministic quota-based distribution
+
+get_prize_percentages/normalize_weights turn a company's configured
+percentages into the probabilities used by select_weighted_prize (and by the
+admin simulator).
+
+With random.choices a 5% prize can hit three times in the first 20 spins and
+then never again. In 'smooth' mode the prizes follow the smooth weighted
+round-robin order instead, so the realized counts stay within about one spin
+of the configured percentages at every point.
+
+For a fixed weight vector the round-robin order repeats every sum(weights)
+spins, so the order is computed once per weight vector and memoized. The only
+per-company state is a single spin counter in the cache, advanced with an
+atomic incr - concurrent spins never read-modify-write shared state.
+"""
+import json
+import logging
+from functools import lru_cache, reduce
+from math import gcd
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Weights are percentages (possibly fractional); scale before reducing to integers
+WEIGHT_SCALE = 100
+
+
+def get_prize_percentages(company, prizes):
+    """
+    Get the configured percentage for each prize.
+    Percentages are stored in company notes; falls back to an equal split when
+    they are missing or do not match the prizes list.
+    """
+    prize_percentages = None
+
+    if company.notes:
+        try:
+            notes_data = json.loads(company.notes)
+            if 'prize_percentages' in notes_data:
+                prize_percentages = notes_data['prize_percentages']
+                logger.info("Company %s: Using custom percentages: %s", company.name, prize_percentages)
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            logger.warning("Company %s: Could not parse prize percentages from notes: %s", company.name, e)
+
+    # If no percentages stored or length mismatch, use equal distribution
+    if not prize_percentages or len(prize_percentages) != len(prizes):
+        equal_percentage = 100 / len(prizes)
+        prize_percentages = [equal_percentage] * len(prizes)
+        logger.info("Company %s: Using equal distribution (%s%% each)", company.name, equal_percentage)
+
+    return prize_percentages
+
+
+def normalize_weights(prize_percentages):
+    """
+    Convert percentages to probabilities that sum to 1.
+    Works for any total (100%, 300%, ...) and keeps the relative ratios;
+    all-zero input falls back to equal weights.
+    """
+    # Higher percentage = higher weight = higher probability
+    weights = [float(p) / 100.0 for p in prize_percentages]
+
+    total_weight = sum(weights)
+    if total_weight > 0:
+        return [w / total_weight for w in weights]
+
+    logger.warning("All prize weights are zero, using equal distribution")
+    return [1.0 / len(weights)] * len(weights)
+
+
+def _integer_weights(percentages):
+    """Turn percentages into the smallest equivalent tuple of integer weights"""
+    weights = [max(int(round(float(p) * WEIGHT_SCALE)), 0) for p in percentages]
+    divisor = reduce(gcd, [w for w in weights if w], 0) or 1
+    return tuple(w // divisor for w in weights)
+
+
+@lru_cache(maxsize=1024)
+def smooth_sequence(weights):
+    """
+    One full period of smooth weighted round-robin for integer weights.
+    Returns a tuple of prize indexes of length sum(weights).
+    """
+    total = sum(weights)
+    current = [0] * len(weights)
+    sequence = []
+
+    for _ in range(total):
+        for i, weight in enumerate(weights):
+            current[i] += weight
+        selected = max(range(len(weights)), key=current.__getitem__)
+        current[selected] -= total
+        sequence.append(selected)
+
+    return tuple(sequence)
+
+
+def _next_step(company_id):
+    """Atomically advance the company's spin counter and return the new value"""
+    key = f'prize_rr:{company_id}'
+    if cache.add(key, 1, None):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+        return 1
+
+
+def select_smooth_index(company_id, percentages):
+    """
+    Pick the next prize index for a company in 'smooth' mode.
+    Returns None when every weight is zero.
+    """
+    weights = _integer_weights(percentages)
+    if not any(weights):
+        return None
+
+    sequence = smooth_sequence(weights)
+    step = _next_step(company_id)
+    return sequence[(step - 1) % len(sequence)]
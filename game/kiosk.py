@@ -0,0 +1,84 @@
+"""
+Request signing and payload helpers for the offline kiosk batch spin API
+
+Kiosk tablets queue spins while the venue network is down and upload them in
+one POST /game/spin-batch/<slug>/ when it comes back. Requests are signed
+with the company's kiosk secret:
+
+    X-Kiosk-Timestamp: <unix seconds>
+    X-Kiosk-Signature: hex(HMAC-SHA256(kiosk_secret, "<timestamp>.<raw body>"))
+
+Every queued spin carries a client nonce; GameSpin has a unique
+(company, client_nonce) constraint, so re-uploading a batch after a dropped
+response never records a spin twice.
+"""
+import hashlib
+import hmac
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+TIMESTAMP_HEADER = 'X-Kiosk-Timestamp'
+SIGNATURE_HEADER = 'X-Kiosk-Signature'
+MAX_NONCE_LENGTH = 64
+
+
+def sign_batch(secret, timestamp, body):
+    """Compute the signature a kiosk sends for a raw request body"""
+    message = f'{timestamp}.'.encode('utf-8') + body
+    return hmac.new(secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+def verify_signature(request, secret):
+    """
+    Check the kiosk signature headers against the company secret.
+    Returns True when the signature matches and the timestamp is fresh.
+    """
+    timestamp = request.headers.get(TIMESTAMP_HEADER, '')
+    signature = request.headers.get(SIGNATURE_HEADER, '')
+    if not secret or not timestamp or not signature:
+        return False
+
+    try:
+        skew = abs(time.time() - int(timestamp))
+    except ValueError:
+        return False
+    if skew > settings.KIOSK_SIGNATURE_TOLERANCE:
+        return False
+
+    expected = sign_batch(secret, timestamp, request.body)
+    return hmac.compare_digest(expected, signature)
+
+
+def parse_client_timestamp(value):
+    """
+    Parse a spin's client timestamp (ISO 8601 string or unix seconds).
+    Returns an aware datetime, or None if it is missing, malformed, in the
+    future or older than KIOSK_BATCH_MAX_AGE_HOURS.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            moment = datetime.fromtimestamp(value, tz=dt_timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            return None
+    elif isinstance(value, str):
+        try:
+            moment = parse_datetime(value)
+        except ValueError:
+            return None
+        if moment is None:
+            return None
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+    else:
+        return None
+
+    now = timezone.now()
+    if moment > now + timedelta(seconds=settings.KIOSK_SIGNATURE_TOLERANCE):
+        return None
+    if moment < now - timedelta(hours=settings.KIOSK_BATCH_MAX_AGE_HOURS):
+        return None
+    return moment
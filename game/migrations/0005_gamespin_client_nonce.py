@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0010_company_kiosk_secret'),
+        ('game', '0004_add_visitor_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamespin',
+            name='client_nonce',
+            field=models.CharField(blank=True, help_text='معرف فريد ترسله أجهزة الكشك لمنع تكرار الدورة عند إعادة المزامنة', max_length=64, null=True, verbose_name='معرف الجهاز للدورة'),
+        ),
+        migrations.AddConstraint(
+            model_name='gamespin',
+            constraint=models.UniqueConstraint(fields=('company', 'client_nonce'), name='unique_spin_nonce_per_company'),
+        ),
+    ]
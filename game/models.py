@@ -51,6 +51,13 @@ class GameSpin(models.Model):
         null=True,
         verbose_name="معلومات المتصفح"
     )
+    client_nonce = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        verbose_name="معرف الجهاز للدورة",
+        help_text="معرف فريد ترسله أجهزة الكشك لمنع تكرار الدورة عند إعادة المزامنة"
+    )
     created_at = models.DateTimeField(
         default=timezone.now,
         verbose_name="تاريخ الدورة"
@@ -60,6 +67,12 @@ class GameSpin(models.Model):
         verbose_name = "دورة لعبة"
         verbose_name_plural = "دورات الألعاب"
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['company', 'client_nonce'],
+                name='unique_spin_nonce_per_company'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.visitor_name} - {self.prize} ({self.company.name})"
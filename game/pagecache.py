@@ -0,0 +1,124 @@
+"""
+Response cache for the company play page
+
+A shared venue link gets many visitors in a short time, and every render of
+play_game looks up the company and evaluates its activation (schedule
+queries included). The rendered page is cached per slug until the next point
+where its activation state can change:
+
+- company saves (admin edits, activate_now, approve, reject, scheduler
+  activations) and schedule edits delete the cached page
+- an active page expires at its activation end
+- an inactive page expires at its activation start, or at the next hour
+  boundary when the company has schedules (schedules fire at minute 0)
+
+Pages are served with an ETag over their content, so a returning visitor's
+browser revalidates and gets a 304 instead of the whole page.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from companies.models import ActivationSchedule, Company
+
+
+def _page_cache_key(slug):
+    return f'play_page:{slug}'
+
+
+def get_cached_play_page(slug):
+    """Return the cached page content for a slug, or None"""
+    if not settings.PLAY_PAGE_CACHE_TIMEOUT:
+        return None
+    return cache.get(_page_cache_key(slug))
+
+
+def _seconds_until(moment, now):
+    return int((moment - now).total_seconds())
+
+
+def seconds_until_state_change(company, is_active):
+    """
+    Seconds until the company's activation state can next change (activation
+    end, activation start or the next schedule hour), or None if no boundary
+    is known
+    """
+    now = timezone.now()
+    boundaries = []
+
+    if is_active:
+        end_time = company.activation_end_time
+        if end_time is None and company.activation_start_time:
+            end_time = company.activation_start_time + timedelta(hours=company.active_hours)
+        if end_time is not None:
+            boundaries.append(_seconds_until(end_time, now))
+    else:
+        start_time = company.activation_start_time
+        if company.is_active and start_time and start_time > now:
+            boundaries.append(_seconds_until(start_time, now))
+        if company.schedules.filter(is_active=True).exists():
+            local_now = timezone.localtime(now)
+            next_hour = local_now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+            boundaries.append(_seconds_until(next_hour, local_now))
+
+    return max(0, min(boundaries)) if boundaries else None
+
+
+def play_page_timeout(company, is_active):
+    """Seconds the rendered page stays valid for its current activation state"""
+    timeout = settings.PLAY_PAGE_CACHE_TIMEOUT
+    expires_in = seconds_until_state_change(company, is_active)
+    return timeout if expires_in is None else min(timeout, expires_in)
+
+
+def play_page_response(request, content):
+    """
+    Serve a play page with an ETag over its content. Browsers revalidate
+    (no-cache) and get a bodyless 304 while the page is unchanged.
+    """
+    etag = quote_etag(hashlib.md5(content).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content)
+    response['ETag'] = etag
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def cache_play_page(company, is_active, content):
+    """Store a rendered play page until its activation state can change"""
+    if not settings.PLAY_PAGE_CACHE_TIMEOUT:
+        return
+    timeout = play_page_timeout(company, is_active)
+    if timeout > 0:
+        cache.set(_page_cache_key(company.slug), content, timeout)
+
+
+def invalidate_play_pages(slugs):
+    """Drop cached pages after a bulk queryset.update(), which sends no post_save"""
+    cache.delete_many([_page_cache_key(slug) for slug in slugs if slug])
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def invalidate_company_page(sender, instance, **kwargs):
+    """Drop the cached page when a company is edited or (de)activated"""
+    if instance.slug:
+        cache.delete(_page_cache_key(instance.slug))
+
+
+@receiver(post_save, sender=ActivationSchedule)
+@receiver(post_delete, sender=ActivationSchedule)
+def invalidate_schedule_page(sender, instance, **kwargs):
+    """Schedules are listed on the inactive page and decide its expiry"""
+    slug = Company.objects.filter(pk=instance.company_id).values_list('slug', flat=True).first()
+    if slug:
+        cache.delete(_page_cache_key(slug))
@@ -0,0 +1,133 @@
+"""
+Per-visitor spin quotas enforced with atomic cache counters
+
+Each company can limit spins per phone per day and per IP per minute
+(Company.spin_limit_per_phone_daily / spin_limit_per_ip_minute, 0 = unlimited).
+The limits themselves are cached per slug, so a rejected request never
+touches the database. Counters live in the cache backend and are bumped
+with add/incr, which are atomic on Redis and memcached.
+
+Windows are fixed by default. With SPIN_RATE_LIMIT_SLIDING_WINDOW the
+previous window is weighted in (sliding window approximation).
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from companies.models import Company
+from influencers.utils import normalize_phone
+
+LIMITS_CACHE_TIMEOUT = 300  # seconds
+
+PHONE_WINDOW = 24 * 60 * 60  # one day
+IP_WINDOW = 60  # one minute
+
+
+def _limits_cache_key(slug):
+    return f'spin_limits:{slug}'
+
+
+def get_spin_limits(slug):
+    """
+    Get (company_id, per_phone_daily, per_ip_minute) for a company slug.
+    Cached per slug; returns None if the slug does not exist.
+    """
+    cache_key = _limits_cache_key(slug)
+    limits = cache.get(cache_key)
+    if limits is None:
+        limits = Company.objects.filter(slug=slug).values_list(
+            'id', 'spin_limit_per_phone_daily', 'spin_limit_per_ip_minute'
+        ).first()
+        if limits is None:
+            return None
+        cache.set(cache_key, tuple(limits), LIMITS_CACHE_TIMEOUT)
+    return tuple(limits)
+
+
+def invalidate_spin_limits_for(slugs):
+    """Drop cached limits after a bulk queryset.update(), which sends no post_save"""
+    cache.delete_many([_limits_cache_key(slug) for slug in slugs if slug])
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def invalidate_spin_limits(sender, instance, **kwargs):
+    """Drop cached limits when a company is edited in the admin"""
+    if instance.slug:
+        cache.delete(_limits_cache_key(instance.slug))
+
+
+def _increment(key, timeout):
+    """Atomically increment a window counter, creating it on the first hit"""
+    if cache.add(key, 1, timeout):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Expired between add() and incr()
+        cache.set(key, 1, timeout)
+        return 1
+
+
+def _window_position(window):
+    """Return (window index, seconds elapsed in window) aligned to local time"""
+    now = time.time() + timezone.localtime().utcoffset().total_seconds()
+    return int(now // window), now % window
+
+
+def _hit_window(prefix, window):
+    """
+    Count one hit in the current window.
+    Returns (count, seconds until the window resets).
+    """
+    index, elapsed = _window_position(window)
+    count = _increment(f'{prefix}:{index}', window * 2)
+
+    if getattr(settings, 'SPIN_RATE_LIMIT_SLIDING_WINDOW', False):
+        previous = cache.get(f'{prefix}:{index - 1}', 0)
+        count += previous * (1 - elapsed / window)
+
+    return count, int(window - elapsed) + 1
+
+
+def _phone_key(company_id, visitor_phone):
+    # 05..., +9665... and spaced forms of one number share a quota
+    phone = normalize_phone(visitor_phone) or visitor_phone.strip()
+    return f'spin_rl:phone:{company_id}:{phone}'
+
+
+def check_spin_limits(limits, ip_address, visitor_phone):
+    """
+    Count this spin attempt against the company quotas.
+    Returns None when the spin is allowed, otherwise the Retry-After seconds.
+    """
+    company_id, per_phone_daily, per_ip_minute = limits
+
+    if per_ip_minute and ip_address:
+        count, retry_after = _hit_window(f'spin_rl:ip:{company_id}:{ip_address}', IP_WINDOW)
+        if count > per_ip_minute:
+            return retry_after
+
+    if per_phone_daily and visitor_phone:
+        count, retry_after = _hit_window(_phone_key(company_id, visitor_phone), PHONE_WINDOW)
+        if count > per_phone_daily:
+            return retry_after
+
+    return None
+
+
+def release_phone_spin(limits, visitor_phone):
+    """Give back a phone quota hit when the spin was not recorded"""
+    company_id, per_phone_daily, per_ip_minute = limits
+    if not per_phone_daily or not visitor_phone:
+        return
+
+    index, elapsed = _window_position(PHONE_WINDOW)
+    try:
+        cache.decr(f'{_phone_key(company_id, visitor_phone)}:{index}')
+    except ValueError:
+        pass
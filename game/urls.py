@@ -8,6 +8,9 @@ app_name = 'game'
 
 urlpatterns = [
     path('play/<slug:slug>/', views.play_game, name='play'),
+    path('config/<slug:slug>/', views.wheel_config, name='wheel_config'),
+    path('wheel/<slug:slug>/<str:version>.svg', views.wheel_svg, name='wheel_svg'),
     path('spin/<slug:slug>/', views.spin_wheel, name='spin'),
+    path('spin-batch/<slug:slug>/', views.spin_batch, name='spin_batch'),
     path('dashboard/<slug:slug>/', views.game_dashboard, name='dashboard'),
 ]
@@ -8,6 +8,7 @@ import re
 from datetime import timedelta
 
 from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.db.models import Count
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, render
@@ -16,94 +17,137 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
 from companies.models import Company
+from dawerha.db import retry_on_locked
+from dawerha.db_router import use_replica
+from dawerha.idempotency import idempotent
+from .distribution import get_prize_percentages, normalize_weights, select_smooth_index
+from .kiosk import MAX_NONCE_LENGTH, parse_client_timestamp, verify_signature
 from .models import GameSpin
+from .pagecache import cache_play_page, get_cached_play_page, play_page_response, seconds_until_state_change
+from .ratelimit import check_spin_limits, get_spin_limits, release_phone_spin
+from .wheel import company_wheel_config, wheel_config_response, wheel_svg_response, wheel_svg_url
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
+PHONE_PATTERN = r'^05[0-9]{8}$'
 
-def select_weighted_prize(company, prizes):
+
+def select_weighted_prize(company, prizes, exclude=None):
     """
     Select a prize using weighted random algorithm based on percentages.
     
     Algorithm:
     1. Get prize percentages from company notes (if available)
-    2. Use percentages directly as weights (higher percentage = higher chance)
-    3. Normalize weights to ensure they sum to 1
-    4. Select prize based on weighted random
+    2. Drop excluded (sold-out) prizes so the rest are re-weighted
+    3. Use percentages directly as weights (higher percentage = higher chance)
+    4. Normalize weights to ensure they sum to 1
+    5. Select prize based on weighted random, or in 'smooth' mode follow the
+       smooth weighted round-robin order (see game.distribution)
     
     The percentages represent the probability of winning each prize:
     - Higher percentage = higher chance to win
     - Lower percentage = lower chance to win
     
+    Args:
+        exclude: optional set of prize names that cannot be won (sold out)
+    
     Returns:
-        str: The selected prize name
+        str: The selected prize name, or None if nothing can be won
     """
     # Ensure prizes list is not empty
     if not prizes:
-        logger.error(f"Company {company.name} has no prizes")
+        logger.error("Company %s has no prizes", company.name)
         return None
     
-    # Try to get prize percentages from notes
-    prize_percentages = None
+    # Get prize percentages from notes (equal distribution if missing)
+    prize_percentages = get_prize_percentages(company, prizes)
     
-    if company.notes:
-        try:
-            notes_data = json.loads(company.notes)
-            if 'prize_percentages' in notes_data:
-                prize_percentages = notes_data['prize_percentages']
-                logger.info(f"Company {company.name}: Using custom percentages: {prize_percentages}")
-        except (json.JSONDecodeError, KeyError) as e:
-            logger.warning(f"Company {company.name}: Could not parse prize percentages from notes: {e}")
-    
-    # If no percentages stored or length mismatch, use equal distribution
-    if not prize_percentages or len(prize_percentages) != len(prizes):
-        equal_percentage = 100 / len(prizes)
-        prize_percentages = [equal_percentage] * len(prizes)
-        logger.info(f"Company {company.name}: Using equal distribution ({equal_percentage}% each)")
-    
-    # Convert percentages to weights (0-1 range)
-    # Higher percentage = higher weight = higher probability
-    # The percentages are already normalized to sum to 100, but we normalize again
-    # to ensure accuracy even if there are slight rounding errors
-    weights = [float(p) / 100.0 for p in prize_percentages]
-    
-    # Normalize weights to sum to 1 (probability distribution)
-    # This ensures that if percentages don't sum to exactly 100, they're still valid
-    # This also handles cases where percentages sum to 300% or any other value
-    total_weight = sum(weights)
-    if total_weight > 0:
-        # Normalize: divide each weight by total to get probabilities that sum to 1
-        normalized_weights = [w / total_weight for w in weights]
-    else:
-        # Fallback: equal weights if all are zero
-        logger.warning(f"Company {company.name}: All weights are zero, using equal distribution")
-        normalized_weights = [1.0 / len(prizes)] * len(prizes)
+    # Sold-out prizes get zero weight; remaining prizes keep their relative ratios
+    if exclude:
+        prize_percentages = [
+            0 if prize in exclude else percentage
+            for prize, percentage in zip(prizes, prize_percentages)
+        ]
+        if not any(prize_percentages):
+            logger.warning("Company %s: All prizes are sold out", company.name)
+            return None
+    
+    # Deterministic quota mode: follow the smooth weighted round-robin order
+    if company.prize_distribution_mode == 'smooth':
+        selected_index = select_smooth_index(company.id, prize_percentages)
+        if selected_index is not None:
+            selected_prize = prizes[selected_index]
+            logger.info(
+                "Company %s: Selected prize '%s' (index: %d, percentage: %s%%, mode: smooth)",
+                company.name, selected_prize, selected_index, prize_percentages[selected_index]
+            )
+            return selected_prize
+    
+    # Convert percentages to a probability distribution (weights sum to 1)
+    normalized_weights = normalize_weights(prize_percentages)
     
     # Log the weights and prizes for debugging
-    if settings.DEBUG:
-        logger.debug(f"Company {company.name} - Prize selection weights:")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Company %s - Prize selection weights:", company.name)
         for prize, weight, percentage in zip(prizes, normalized_weights, prize_percentages):
-            logger.debug(f"  {prize}: {percentage}% (weight: {weight:.4f})")
+            logger.debug("  %s: %s%% (weight: %.4f)", prize, percentage, weight)
     
     # Select prize based on weighted random
     # random.choices uses weights directly - higher weight = higher probability
     selected_prize = random.choices(prizes, weights=normalized_weights, k=1)[0]
     
-    # Find the index of selected prize for logging
-    selected_index = prizes.index(selected_prize) if selected_prize in prizes else -1
-    
-    logger.info(
-        f"Company {company.name}: Selected prize '{selected_prize}' "
-        f"(index: {selected_index}, percentage: {prize_percentages[selected_index] if selected_index >= 0 else 'N/A'}%, "
-        f"weight: {normalized_weights[selected_index] if selected_index >= 0 else 'N/A':.4f})"
-    )
+    # Find the index of selected prize for logging (skipped when the record would be dropped)
+    if logger.isEnabledFor(logging.INFO):
+        selected_index = prizes.index(selected_prize)
+        logger.info(
+            "Company %s: Selected prize '%s' (index: %d, percentage: %s%%, weight: %.4f)",
+            company.name, selected_prize, selected_index,
+            prize_percentages[selected_index], normalized_weights[selected_index]
+        )
     
     return selected_prize
 
 
+def load_prize_stocks(company):
+    """Return ({prize: PrizeStock}, set of prizes already sold out today)"""
+    stocks = {stock.prize.strip(): stock for stock in company.prize_stocks.all()}
+    today = timezone.localdate()
+    sold_out = {prize for prize, stock in stocks.items() if not stock.is_available(today)}
+    return stocks, sold_out
+
+
+def draw_prize(company, prizes, stocks, sold_out):
+    """
+    Draw a prize and reserve one unit if its stock is limited.
+    sold_out is updated in place when a reservation loses the race.
+    
+    Returns:
+        (selected prize or None, reserved PrizeStock or None)
+    """
+    while True:
+        # Select random prize using weighted algorithm based on percentages
+        selected_prize = select_weighted_prize(company, prizes, exclude=sold_out)
+        if not selected_prize:
+            return None, None
+        
+        stock = stocks.get(selected_prize)
+        if stock is None:
+            return selected_prize, None  # Unlimited prize
+        if stock.reserve():
+            return selected_prize, stock
+        
+        # Sold out meanwhile (another spin took the last unit) - draw again without it
+        sold_out.add(selected_prize)
+
+
 def play_game(request, slug):
     """Game page view"""
+    # Served from memory until the company's activation state can change
+    content = get_cached_play_page(slug)
+    if content is not None:
+        return play_page_response(request, content)
+    
     company = get_object_or_404(Company, slug=slug)
     
     # Get and normalize prizes (remove extra spaces) to ensure consistency
@@ -113,31 +157,73 @@ def play_game(request, slug):
     # Get colors
     colors = company.get_colors_list()
     
+    # Evaluate activation once (it checks schedules)
+    is_active = company.is_currently_active
+    
     # Log prizes for debugging
     if settings.DEBUG:
-        logger.debug(f"Company {company.slug} - Play page loaded:")
-        logger.debug(f"  Prizes: {prizes}")
-        logger.debug(f"  Colors: {colors}")
-        logger.debug(f"  Is active: {company.is_currently_active}")
+        logger.debug("Company %s - Play page loaded:", company.slug)
+        logger.debug("  Prizes: %s", prizes)
+        logger.debug("  Colors: %s", colors)
+        logger.debug("  Is active: %s", is_active)
     
     # Always show the play page, but pass activation status
     context = {
         'company': company,
         'prizes': prizes,  # Already normalized
         'colors': colors,
+        'wheel_svg_url': wheel_svg_url('game:wheel_svg', company.slug, prizes, colors, company.logo_url),
         'status': company.status,
-        'is_active': company.is_currently_active,
+        'is_active': is_active,
         'activation_end_time': company.activation_end_time
     }
     
-    return render(request, 'game/play.html', context)
+    content = render(request, 'game/play.html', context).content
+    cache_play_page(company, is_active, content)
+    return play_page_response(request, content)
+
+
+@require_http_methods(["GET", "HEAD"])
+def wheel_config(request, slug):
+    """Wheel configuration (prizes, colors, logo, activation window) as cacheable JSON"""
+    company = get_object_or_404(Company, slug=slug)
+    config = company_wheel_config(company)
+    return wheel_config_response(request, config, seconds_until_state_change(company, config['is_active']))
+
+
+@require_http_methods(["GET", "HEAD"])
+def wheel_svg(request, slug, version):
+    """Pre-rendered wheel for the play page, cached per configuration version"""
+    company = get_object_or_404(Company.objects.only('slug', 'prizes', 'colors', 'logo_url'), slug=slug)
+    prizes, colors = company.get_prizes_list(), company.get_colors_list()
+    current_url = wheel_svg_url('game:wheel_svg', slug, prizes, colors, company.logo_url)
+    return wheel_svg_response(prizes, colors, company.logo_url, version, current_url)
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@idempotent
 def spin_wheel(request, slug):
     """Handle wheel spin"""
+    limits = None
+    visitor_phone = ''
+    spin_recorded = False
     try:
+        data = json.loads(request.body)
+        visitor_name = data.get('visitor_name', '').strip()
+        visitor_phone = data.get('visitor_phone', '').strip()
+        
+        # Enforce per-visitor quotas from the cache before any ORM work
+        limits = get_spin_limits(slug)
+        if limits is not None:
+            retry_after = check_spin_limits(limits, request.META.get('REMOTE_ADDR'), visitor_phone)
+            if retry_after is not None:
+                limits = None  # Nothing to give back for a rejected attempt
+                return JsonResponse({
+                    'success': False,
+                    'message': 'تجاوزت الحد المسموح من المحاولات، يرجى المحاولة لاحقاً'
+                }, status=429, headers={'Retry-After': str(retry_after)})
+        
         company = get_object_or_404(Company, slug=slug)
         
         # Check if company is currently active (allow pending companies if they are active)
@@ -147,10 +233,6 @@ def spin_wheel(request, slug):
                 'message': 'الشركة غير مفعلة حالياً'
             }, status=403)
         
-        data = json.loads(request.body)
-        visitor_name = data.get('visitor_name', '').strip()
-        visitor_phone = data.get('visitor_phone', '').strip()
-        
         if not visitor_name:
             return JsonResponse({
                 'success': False,
@@ -158,8 +240,7 @@ def spin_wheel(request, slug):
             }, status=400)
         
         # Validate phone number format (optional)
-        phone_pattern = r'^05[0-9]{8}$'
-        if visitor_phone and not re.match(phone_pattern, visitor_phone):
+        if visitor_phone and not re.match(PHONE_PATTERN, visitor_phone):
             return JsonResponse({
                 'success': False,
                 'message': 'رقم الجوال غير صحيح. يجب أن يبدأ بـ 05 ويحتوي على 10 أرقام أو تركه فارغاً'
@@ -168,7 +249,7 @@ def spin_wheel(request, slug):
         # Get prizes and normalize them (remove extra spaces)
         prizes = company.get_prizes_list()
         if not prizes:
-            logger.error(f"Company {company.slug}: No prizes available")
+            logger.error("Company %s: No prizes available", company.slug)
             return JsonResponse({
                 'success': False,
                 'message': 'لا توجد جوائز متاحة'
@@ -178,17 +259,24 @@ def spin_wheel(request, slug):
         prizes = [str(p).strip() for p in prizes if p]
         
         if not prizes:
-            logger.error(f"Company {company.slug}: All prizes are empty after normalization")
+            logger.error("Company %s: All prizes are empty after normalization", company.slug)
             return JsonResponse({
                 'success': False,
                 'message': 'لا توجد جوائز صالحة'
             }, status=400)
         
-        # Select random prize using weighted algorithm based on percentages
-        selected_prize = select_weighted_prize(company, prizes)
+        # Limited-stock prizes: skip sold-out ones, then reserve the drawn prize atomically
+        stocks, sold_out = load_prize_stocks(company)
+        selected_prize, reserved_stock = draw_prize(company, prizes, stocks, sold_out)
+        
+        if not selected_prize and sold_out:
+            return JsonResponse({
+                'success': False,
+                'message': 'نفدت جميع الجوائز المتاحة حالياً'
+            }, status=400)
         
         if not selected_prize:
-            logger.error(f"Company {company.slug}: Failed to select prize")
+            logger.error("Company %s: Failed to select prize", company.slug)
             return JsonResponse({
                 'success': False,
                 'message': 'فشل في اختيار الجائزة'
@@ -197,8 +285,8 @@ def spin_wheel(request, slug):
         # Ensure selected prize is in the prizes list
         if selected_prize not in prizes:
             logger.warning(
-                f"Company {company.slug}: Selected prize '{selected_prize}' not in prizes list {prizes}. "
-                f"Using first prize as fallback."
+                "Company %s: Selected prize '%s' not in prizes list %s. Using first prize as fallback.",
+                company.slug, selected_prize, prizes
             )
             selected_prize = prizes[0]
         
@@ -207,16 +295,22 @@ def spin_wheel(request, slug):
         user_agent = request.META.get('HTTP_USER_AGENT', '')
         
         # Create spin record
-        spin = GameSpin.objects.create(
-            company=company,
-            visitor_name=visitor_name,
-            visitor_phone=visitor_phone if visitor_phone else None,
-            prize=selected_prize,
-            won=True,
-            session_id=request.session.session_key or f'session_{timezone.now().timestamp()}',
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
+        try:
+            spin = retry_on_locked(GameSpin.objects.create)(
+                company=company,
+                visitor_name=visitor_name,
+                visitor_phone=visitor_phone if visitor_phone else None,
+                prize=selected_prize,
+                won=True,
+                session_id=request.session.session_key or f'session_{timezone.now().timestamp()}',
+                ip_address=ip_address,
+                user_agent=user_agent
+            )
+        except Exception:
+            if reserved_stock is not None:
+                reserved_stock.release()
+            raise
+        spin_recorded = True
         
         return JsonResponse({
             'success': True,
@@ -234,8 +328,188 @@ def spin_wheel(request, slug):
             'success': False,
             'message': f'حدث خطأ: {str(e)}'
         }, status=500)
+    finally:
+        # Failed spins (inactive company, bad input) do not use up the daily quota
+        if limits is not None and not spin_recorded:
+            release_phone_spin(limits, visitor_phone)
+
+
+def _batch_error(nonce, message):
+    return {'nonce': nonce, 'success': False, 'message': message}
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def spin_batch(request, slug):
+    """
+    Record a batch of spins queued by an offline kiosk device.
+    
+    Body: {"spins": [{"nonce", "visitor_name", "visitor_phone", "client_timestamp"}, ...]}
+    Spins whose nonce was already recorded are returned as duplicates with
+    their original prize. New spins are drawn server-side and inserted with
+    a single bulk_create. Results are returned in request order.
+    """
+    company = get_object_or_404(Company, slug=slug)
+    
+    if not company.kiosk_secret or not verify_signature(request, company.kiosk_secret):
+        return JsonResponse({
+            'success': False,
+            'message': 'توقيع الجهاز غير صالح'
+        }, status=401)
+    
+    # Spins happened while the device was offline, so the current activation
+    # window is not checked - only companies that were rejected are refused
+    if company.status == 'rejected':
+        return JsonResponse({
+            'success': False,
+            'message': 'الشركة غير مفعلة حالياً'
+        }, status=403)
+    
+    try:
+        data = json.loads(request.body)
+        spins = data.get('spins')
+    except (json.JSONDecodeError, AttributeError):
+        spins = None
+    if not isinstance(spins, list) or not spins:
+        return JsonResponse({
+            'success': False,
+            'message': 'خطأ في البيانات المرسلة'
+        }, status=400)
+    
+    if len(spins) > settings.KIOSK_BATCH_MAX_SPINS:
+        return JsonResponse({
+            'success': False,
+            'message': f'الحد الأقصى {settings.KIOSK_BATCH_MAX_SPINS} دورة في الدفعة الواحدة'
+        }, status=413)
+    
+    prizes = [str(p).strip() for p in company.get_prizes_list() if p]
+    if not prizes:
+        logger.error("Company %s: No prizes available", company.slug)
+        return JsonResponse({
+            'success': False,
+            'message': 'لا توجد جوائز متاحة'
+        }, status=400)
+    
+    # One query for every nonce that was already synced
+    nonces = [
+        item['nonce'] for item in spins
+        if isinstance(item, dict) and isinstance(item.get('nonce'), str)
+    ]
+    recorded = {
+        nonce: (spin_id, prize)
+        for nonce, spin_id, prize in GameSpin.objects.filter(
+            company=company, client_nonce__in=nonces
+        ).values_list('client_nonce', 'id', 'prize')
+    }
+    
+    limits = get_spin_limits(slug)
+    stocks, sold_out = load_prize_stocks(company)
+    ip_address = request.META.get('REMOTE_ADDR')
+    user_agent = request.META.get('HTTP_USER_AGENT', '')
+    
+    results = []
+    new_spins = []  # (result, GameSpin)
+    reserved_stocks = []
+    counted_phones = []
+    seen = set()
+    
+    for item in spins:
+        if not isinstance(item, dict):
+            results.append(_batch_error(None, 'خطأ في البيانات المرسلة'))
+            continue
+        
+        nonce = item.get('nonce')
+        if not isinstance(nonce, str) or not nonce or len(nonce) > MAX_NONCE_LENGTH:
+            results.append(_batch_error(nonce, 'معرف الدورة مطلوب'))
+            continue
+        
+        if nonce in recorded:
+            spin_id, prize = recorded[nonce]
+            results.append({'nonce': nonce, 'success': True, 'duplicate': True, 'prize': prize, 'spin_id': spin_id})
+            continue
+        if nonce in seen:
+            results.append(_batch_error(nonce, 'معرف الدورة مكرر في نفس الدفعة'))
+            continue
+        seen.add(nonce)
+        
+        visitor_name = str(item.get('visitor_name') or '').strip()
+        visitor_phone = str(item.get('visitor_phone') or '').strip()
+        if not visitor_name:
+            results.append(_batch_error(nonce, 'اسم الزائر مطلوب'))
+            continue
+        if visitor_phone and not re.match(PHONE_PATTERN, visitor_phone):
+            results.append(_batch_error(nonce, 'رقم الجوال غير صحيح'))
+            continue
+        
+        created_at = parse_client_timestamp(item.get('client_timestamp'))
+        if created_at is None:
+            results.append(_batch_error(nonce, 'وقت الدورة غير صالح'))
+            continue
+        
+        # Kiosks share one IP, so only the per-phone daily quota applies
+        if limits is not None and check_spin_limits(limits, None, visitor_phone) is not None:
+            results.append(_batch_error(nonce, 'تجاوزت الحد المسموح من المحاولات'))
+            continue
+        if limits is not None:
+            counted_phones.append(visitor_phone)
+        
+        selected_prize, reserved_stock = draw_prize(company, prizes, stocks, sold_out)
+        if not selected_prize:
+            results.append(_batch_error(nonce, 'نفدت جميع الجوائز المتاحة حالياً'))
+            continue
+        if reserved_stock is not None:
+            reserved_stocks.append(reserved_stock)
+        
+        result = {'nonce': nonce, 'success': True, 'duplicate': False, 'prize': selected_prize}
+        results.append(result)
+        new_spins.append((result, GameSpin(
+            company=company,
+            visitor_name=visitor_name[:100],
+            visitor_phone=visitor_phone or None,
+            prize=selected_prize,
+            won=True,
+            session_id=f'kiosk_{nonce}'[:100],
+            ip_address=ip_address,
+            user_agent=user_agent,
+            client_nonce=nonce,
+            created_at=created_at
+        )))
+    
+    @retry_on_locked
+    def insert_spins():
+        with transaction.atomic():
+            GameSpin.objects.bulk_create([spin for _, spin in new_spins])
+    
+    try:
+        insert_spins()
+    except IntegrityError:
+        # Another upload of the same batch won the race; the retry will see
+        # these nonces as duplicates and return the recorded prizes
+        for stock in reserved_stocks:
+            stock.release()
+        for visitor_phone in counted_phones:
+            release_phone_spin(limits, visitor_phone)
+        return JsonResponse({
+            'success': False,
+            'message': 'الدفعة قيد المعالجة، يرجى المحاولة بعد لحظات'
+        }, status=409, headers={'Retry-After': '1'})
+    
+    for result, spin in new_spins:
+        result['spin_id'] = spin.pk
+    
+    logger.info(
+        "Company %s: Kiosk batch synced (%d new, %d duplicate or rejected)",
+        company.slug, len(new_spins), len(spins) - len(new_spins)
+    )
+    
+    return JsonResponse({
+        'success': True,
+        'created': len(new_spins),
+        'results': results
+    })
 
 
+@use_replica
 def game_dashboard(request, slug):
     """Game dashboard for company"""
     company = get_object_or_404(Company, slug=slug)
@@ -0,0 +1,217 @@
+"""
+Wheel configuration shared by the company and influencer play pages
+
+The wheel's appearance (prizes, colors, logo) changes rarely. It is exposed
+as JSON with a content-hash version and ETag so browsers and CDNs can cache
+it, and repeat visits cost a 304 instead of a render and database hits.
+
+The wheel itself is pre-rendered to SVG once per version and cached; the
+play pages paint it onto their canvas instead of drawing every segment and
+measuring every label on the visitor's phone.
+"""
+import hashlib
+import json
+import math
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseRedirect
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+
+def _normalize(values):
+    """Trim and drop empty entries, as the play pages do"""
+    return [str(value).strip() for value in values if value]
+
+
+def config_version(prizes, colors, logo_url):
+    """Short content hash of the wheel appearance"""
+    payload = json.dumps([prizes, colors, logo_url or ''], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def company_wheel_config(company):
+    """Wheel configuration for a company play page"""
+    prizes = _normalize(company.get_prizes_list())
+    colors = _normalize(company.get_colors_list())
+    return {
+        'name': company.name,
+        'prizes': prizes,
+        'colors': colors,
+        'logo_url': company.logo_url or '',
+        'version': config_version(prizes, colors, company.logo_url),
+        'is_active': company.is_currently_active,
+        'activation_start_time': company.activation_start_time.isoformat() if company.activation_start_time else None,
+        'activation_end_time': company.activation_end_time.isoformat() if company.activation_end_time else None,
+    }
+
+
+def influencer_wheel_config(influencer):
+    """Wheel configuration for an influencer play page"""
+    prizes = _normalize(influencer.get_prizes_list())
+    colors = _normalize(influencer.get_colors_list())
+    return {
+        'name': influencer.name,
+        'prizes': prizes,
+        'colors': colors,
+        'logo_url': influencer.profile_image_url or '',
+        'version': config_version(prizes, colors, influencer.profile_image_url),
+        'is_active': influencer.is_active,
+        'activation_start_time': None,
+        'activation_end_time': None,
+    }
+
+
+def wheel_config_response(request, config, expires_in=None):
+    """
+    JSON response for a wheel configuration with ETag and Cache-Control.
+    max-age never runs past expires_in (seconds until the next activation
+    boundary), so caches do not keep serving an active wheel after its window
+    closes, or an inactive one after it opens.
+    """
+    content = json.dumps(config, ensure_ascii=False, sort_keys=True)
+    etag = quote_etag(hashlib.md5(content.encode('utf-8')).hexdigest())
+
+    max_age = settings.WHEEL_CONFIG_MAX_AGE
+    if expires_in is not None:
+        max_age = max(0, min(max_age, expires_in))
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=max_age)
+    return response
+
+
+# Geometry mirrors drawWheel() in the play templates
+WHEEL_SIZE = 560
+HUB_RADIUS = 30
+LABEL_FONT_SIZE = 20
+LABEL_MIN_FONT_SIZE = 12
+LABEL_CHAR_WIDTH = 0.55  # average glyph width of bold Cairo, in ems
+DEFAULT_SEGMENT_COLOR = '#6A3FA0'
+
+
+def _wrap_label(text, max_width):
+    """Pick a font size and split a label into lines that fit max_width"""
+    font_size = LABEL_FONT_SIZE
+    width = len(text) * font_size * LABEL_CHAR_WIDTH
+    if width > max_width:
+        font_size = max(LABEL_MIN_FONT_SIZE, int(max_width / width * font_size))
+
+    char_limit = max(1, int(max_width / (font_size * LABEL_CHAR_WIDTH)))
+    if len(text) <= char_limit:
+        return font_size, [text]
+
+    lines = []
+    current = ''
+    for word in text.split(' '):
+        candidate = f'{current} {word}' if current else word
+        if len(candidate) > char_limit and current:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return font_size, lines
+
+
+def render_wheel_svg(prizes, colors, logo_url=None, size=WHEEL_SIZE):
+    """
+    Render the wheel (segments, labels, center hub) as an SVG document.
+    Segment i spans [i * arc, (i + 1) * arc] clockwise from 3 o'clock, the
+    same as the canvas code, so the spin animation lands on the same prize.
+    """
+    center = size / 2
+    radius = size / 2 - 8
+    colors = colors or [DEFAULT_SEGMENT_COLOR]
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{size}" height="{size}" viewBox="0 0 {size} {size}">',
+        '<defs><filter id="label-shadow"><feDropShadow dx="1" dy="1" stdDeviation="2" '
+        'flood-color="#000" flood-opacity="0.5"/></filter></defs>',
+        f'<g transform="translate({center} {center})">',
+    ]
+
+    count = len(prizes)
+    arc = 2 * math.pi / count if count else 0
+    for i, prize in enumerate(prizes):
+        color = quoteattr(colors[i % len(colors)])
+        if count == 1:
+            parts.append(f'<circle r="{radius}" fill={color} stroke="#fff" stroke-width="3"/>')
+        else:
+            start, end = i * arc, (i + 1) * arc
+            x1, y1 = radius * math.cos(start), radius * math.sin(start)
+            x2, y2 = radius * math.cos(end), radius * math.sin(end)
+            large_arc = 1 if arc > math.pi else 0
+            parts.append(
+                f'<path d="M0,0 L{x1:.2f},{y1:.2f} A{radius},{radius} 0 {large_arc} 1 {x2:.2f},{y2:.2f} Z" '
+                f'fill={color} stroke="#fff" stroke-width="3"/>'
+            )
+
+        font_size, lines = _wrap_label(prize, radius - 50)
+        angle = math.degrees(i * arc + arc / 2)
+        line_height = font_size + 4
+        first_y = 10 if len(lines) == 1 else -(len(lines) * line_height) / 2 + line_height / 2
+        parts.append(
+            f'<g transform="rotate({angle:.3f})" fill="#fff" font-family="Cairo, Tahoma, Arial, sans-serif" '
+            f'font-weight="bold" font-size="{font_size}" text-anchor="end" filter="url(#label-shadow)">'
+        )
+        for line_index, line in enumerate(lines):
+            parts.append(f'<text x="{radius - 20}" y="{first_y + line_index * line_height:.1f}">{escape(line)}</text>')
+        parts.append('</g>')
+
+    parts.append(f'<circle r="{HUB_RADIUS}" fill="#2F1D52" stroke="#fff" stroke-width="4"/>')
+    if logo_url:
+        logo = quoteattr(logo_url)
+        inner = HUB_RADIUS - 4
+        parts.append(
+            f'<clipPath id="hub-clip"><circle r="{inner}"/></clipPath>'
+            f'<image href={logo} xlink:href={logo} x="-{inner}" y="-{inner}" width="{inner * 2}" '
+            f'height="{inner * 2}" clip-path="url(#hub-clip)" preserveAspectRatio="xMidYMid slice"/>'
+        )
+    parts.append('</g></svg>')
+    return ''.join(parts)
+
+
+def get_wheel_svg(prizes, colors, logo_url=None):
+    """
+    Return (version, svg) for a wheel, rendering it at most once per version.
+    The cache key is the content hash, so a configuration change simply
+    produces a new key and never serves a stale wheel.
+    """
+    version = config_version(prizes, colors, logo_url)
+    cache_key = f'wheel_svg:{version}'
+    svg = cache.get(cache_key)
+    if svg is None:
+        svg = render_wheel_svg(prizes, colors, logo_url)
+        cache.set(cache_key, svg, None)
+    return version, svg
+
+
+def wheel_svg_url(viewname, slug, prizes, colors, logo_url=None):
+    """Versioned URL of the pre-rendered wheel for a play page"""
+    prizes, colors = _normalize(prizes), _normalize(colors)
+    return reverse(viewname, args=[slug, config_version(prizes, colors, logo_url)])
+
+
+def wheel_svg_response(prizes, colors, logo_url, version, current_url):
+    """
+    Serve the pre-rendered wheel. The URL carries the version, so the
+    response is immutable; an outdated version redirects to the current one.
+    """
+    prizes, colors = _normalize(prizes), _normalize(colors)
+    current_version, svg = get_wheel_svg(prizes, colors, logo_url)
+    if version != current_version:
+        response = HttpResponseRedirect(current_url)
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    response = HttpResponse(svg, content_type='image/svg+xml; charset=utf-8')
+    patch_cache_control(response, public=True, max_age=365 * 24 * 60 * 60, immutable=True)
+    return response
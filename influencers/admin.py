@@ -2,14 +2,21 @@
 Admin configuration for influencers app
 """
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.db.models import F
 from django.utils.html import format_html
-from django.urls import reverse
+from django.urls import path, reverse
 from django.http import HttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
 from django.conf import settings
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
 from datetime import datetime
+from dawerha.db_router import replica_reads, use_replica
+from dawerha.importing import ImportForm
+from .importer import import_influencers, read_rows
 from .models import Influencer, Participant
 
 
@@ -133,6 +140,48 @@ class InfluencerAdmin(admin.ModelAdmin):
         return format_html('<span style="color: #999;">-</span>')
     registration_link_display.short_description = 'رابط التسجيل'
     
+    def get_urls(self):
+        urls = [
+            path(
+                'import/',
+                self.admin_site.admin_view(self.import_view),
+                name='influencers_influencer_import'
+            ),
+        ]
+        return urls + super().get_urls()
+    
+    def import_view(self, request):
+        """Import influencers from a CSV/XLSX file (see influencers/importer.py)"""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        
+        form = ImportForm(request.POST or None, request.FILES or None)
+        result = None
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                result = import_influencers(
+                    read_rows(upload, upload.name),
+                    skip_invalid=form.cleaned_data['skip_invalid'],
+                    dry_run=form.cleaned_data['dry_run']
+                )
+            except ValueError as e:
+                form.add_error('file', str(e))
+            
+            if result and result.created and not result.errors:
+                self.message_user(request, f'✅ تم استيراد {result.created} مؤثر (قيد المراجعة)', level='success')
+                return redirect('admin:influencers_influencer_changelist')
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'استيراد المؤثرين من ملف',
+            'opts': self.model._meta,
+            'form': form,
+            'result': result,
+            'valid_count': result.total - len(result.errors) if result else 0,
+        }
+        return TemplateResponse(request, 'admin/influencers/influencer/import.html', context)
+    
     def changelist_view(self, request, extra_context=None):
         """Override changelist to add export button"""
         # Check if this is an export request
@@ -144,11 +193,16 @@ class InfluencerAdmin(admin.ModelAdmin):
             else:
                 # Export all if nothing selected
                 queryset = self.get_queryset(request)
-            return self.export_to_excel(request, queryset)
+            with replica_reads():
+                return self.export_to_excel(request, queryset)
         
         extra_context = extra_context or {}
         extra_context['show_export_button'] = True
         extra_context['export_action_name'] = 'export_to_excel'
+        extra_context['import_url'] = reverse('admin:influencers_influencer_import')
+        if request.method == 'GET':
+            # List pages read from the replica; actions (POST) stay on the primary
+            return use_replica(super().changelist_view)(request, extra_context)
         return super().changelist_view(request, extra_context)
     
     def export_to_excel(self, request, queryset):
@@ -256,27 +310,32 @@ class InfluencerAdmin(admin.ModelAdmin):
     def approve_influencers(self, request, queryset):
         """Approve selected influencers"""
         count = 0
+        conflicts = 0
         for influencer in queryset:
-            influencer.approve()
-            count += 1
+            if influencer.approve():
+                count += 1
+            else:
+                conflicts += 1
         self.message_user(request, f'تم الموافقة على {count} مؤثر')
+        if conflicts:
+            self.message_user(request, f'تعذر تحديث {conflicts} مؤثر بسبب تعديل متزامن، أعد المحاولة', level='warning')
     approve_influencers.short_description = 'الموافقة على المؤثرين المحددين'
     
     def reject_influencers(self, request, queryset):
         """Reject selected influencers"""
-        count = queryset.update(status='rejected', is_active=False)
+        count = queryset.update(status='rejected', is_active=False, version=F('version') + 1)
         self.message_user(request, f'تم رفض {count} مؤثر')
     reject_influencers.short_description = 'رفض المؤثرين المحددين'
     
     def activate_influencers(self, request, queryset):
         """Activate selected influencers"""
-        count = queryset.update(is_active=True, status='active')
+        count = queryset.update(is_active=True, status='active', version=F('version') + 1)
         self.message_user(request, f'تم تفعيل {count} مؤثر')
     activate_influencers.short_description = 'تفعيل المؤثرين المحددين'
     
     def deactivate_influencers(self, request, queryset):
         """Deactivate selected influencers"""
-        count = queryset.update(is_active=False)
+        count = queryset.update(is_active=False, version=F('version') + 1)
         self.message_user(request, f'تم إلغاء تفعيل {count} مؤثر')
     deactivate_influencers.short_description = 'إلغاء تفعيل المؤثرين المحددين'
 
@@ -305,11 +364,15 @@ class ParticipantAdmin(admin.ModelAdmin):
             else:
                 # Export all if nothing selected
                 queryset = self.get_queryset(request)
-            return self.export_to_excel(request, queryset)
+            with replica_reads():
+                return self.export_to_excel(request, queryset)
         
         extra_context = extra_context or {}
         extra_context['show_export_button'] = True
         extra_context['export_action_name'] = 'export_to_excel'
+        if request.method == 'GET':
+            # List pages read from the replica; actions (POST) stay on the primary
+            return use_replica(super().changelist_view)(request, extra_context)
         return super().changelist_view(request, extra_context)
     
     fieldsets = (
@@ -0,0 +1,138 @@
+"""
+Bulk influencer import from CSV or XLSX files
+
+Used by the admin import page and the import_influencers command. Rows are
+validated with the same rules as register_influencer and go through the
+shared read/bulk insert path of the company import (dawerha/importing.py).
+
+Columns (first row; English or Arabic headers):
+    name / الاسم                  required
+    platform / المنصة             required; key (instagram) or label (إنستغرام)
+    custom_platform / منصة مخصصة  optional; kept when platform is other
+    username / اسم المستخدم       required
+    profile_url / رابط الملف الشخصي optional
+    followers_count / عدد المتابعين optional; whole number
+    email / البريد الإلكتروني      required
+    phone / رقم التواصل           optional
+    prizes / الجوائز              required; separated by , or ، or |
+"""
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator, validate_email
+
+from companies.utils import pick_wheel_colors
+from dawerha.importing import import_rows, read_rows as read_import_rows, split_list
+
+from .models import Influencer
+
+COLUMNS = {
+    'name': ('name', 'influencer', 'الاسم', 'اسم المؤثر'),
+    'platform': ('platform', 'المنصة', 'المنصة الرئيسية'),
+    'custom_platform': ('custom_platform', 'customplatform', 'منصة مخصصة'),
+    'username': ('username', 'اسم المستخدم'),
+    'profile_url': ('profile_url', 'رابط الملف الشخصي'),
+    'followers_count': ('followers_count', 'followers', 'عدد المتابعين'),
+    'email': ('email', 'البريد الإلكتروني', 'البريد الالكتروني'),
+    'phone': ('phone', 'رقم التواصل', 'رقم الجوال', 'الجوال'),
+    'prizes': ('prizes', 'الجوائز'),
+}
+REQUIRED_COLUMNS = ('name', 'platform', 'username', 'email', 'prizes')
+
+_PLATFORM_LOOKUP = {
+    **{key: key for key, _ in Influencer.PLATFORM_CHOICES},
+    **{label: key for key, label in Influencer.PLATFORM_CHOICES},
+}
+
+
+def read_rows(fileobj, filename):
+    """
+    Yield (row_number, {column: text}) for each non-empty data row
+    Raises ValueError for an unsupported file or missing required columns
+    """
+    return read_import_rows(fileobj, filename, COLUMNS, REQUIRED_COLUMNS)
+
+
+def _max_length(field):
+    return Influencer._meta.get_field(field).max_length
+
+
+def build_influencer(values):
+    """
+    Validate one row and return an unsaved pending Influencer
+    Raises ValueError with an Arabic message for invalid rows
+    """
+    name = values.get('name', '')
+    if len(name) < 2:
+        raise ValueError('اسم المؤثر مطلوب (حرفان على الأقل)')
+    if len(name) > _max_length('name'):
+        raise ValueError('اسم المؤثر طويل جداً')
+
+    platform = _PLATFORM_LOOKUP.get(values.get('platform', '').lower())
+    if not platform:
+        raise ValueError(f"المنصة غير معروفة: {values.get('platform') or '-'}")
+    custom_platform = values.get('custom_platform', '')
+    if len(custom_platform) > _max_length('custom_platform'):
+        raise ValueError('المنصة المخصصة طويلة جداً')
+
+    username = values.get('username', '')
+    if not username:
+        raise ValueError('اسم المستخدم مطلوب')
+    if len(username) > _max_length('username'):
+        raise ValueError('اسم المستخدم طويل جداً')
+
+    profile_url = values.get('profile_url', '')
+    if profile_url:
+        try:
+            URLValidator()(profile_url)
+        except ValidationError:
+            raise ValueError(f'رابط الملف الشخصي غير صحيح: {profile_url}')
+        if len(profile_url) > _max_length('profile_url'):
+            raise ValueError('رابط الملف الشخصي طويل جداً')
+
+    followers_count = values.get('followers_count', '')
+    try:
+        followers_count = int(followers_count) if followers_count else 0
+    except ValueError:
+        raise ValueError('عدد المتابعين يجب أن يكون رقماً صحيحاً')
+    if followers_count < 0:
+        raise ValueError('عدد المتابعين يجب أن يكون رقماً صحيحاً')
+
+    email = values.get('email', '')
+    if not email:
+        raise ValueError('البريد الإلكتروني مطلوب')
+    try:
+        validate_email(email)
+    except ValidationError:
+        raise ValueError(f'البريد الإلكتروني غير صحيح: {email}')
+
+    phone = values.get('phone', '')
+    if len(phone) > _max_length('phone'):
+        raise ValueError('رقم التواصل طويل جداً')
+
+    prizes = split_list(values.get('prizes', ''))
+    if not prizes:
+        raise ValueError('يجب تحديد جوائز واحدة على الأقل')
+
+    return Influencer(
+        name=name,
+        platform=platform,
+        custom_platform=custom_platform if platform == 'other' and custom_platform else None,
+        username=username,
+        profile_url=profile_url or None,
+        followers_count=followers_count,
+        email=email,
+        phone=phone or None,
+        prizes=prizes,
+        colors=pick_wheel_colors(len(prizes)),
+        status='pending',
+        is_active=False
+    )
+
+
+def import_influencers(rows, skip_invalid=False, dry_run=False):
+    """
+    Validate rows from read_rows() and bulk-insert the valid influencers
+    (see dawerha.importing.import_rows)
+    Returns:
+        ImportResult
+    """
+    return import_rows(Influencer, rows, build_influencer, skip_invalid=skip_invalid, dry_run=dry_run)
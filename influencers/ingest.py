@@ -0,0 +1,214 @@
+"""
+Buffered participant registration for live-stream bursts
+
+When PARTICIPANT_INGEST_ENABLED is on, register_participant validates the
+request, appends an unsaved Participant to a bounded in-memory queue and
+answers immediately. A background thread writes the queue with bulk_create
+every PARTICIPANT_INGEST_FLUSH_MS milliseconds or every
+PARTICIPANT_INGEST_BATCH_SIZE rows, whichever comes first.
+
+The queue is per process: each gunicorn worker buffers and flushes its own
+registrations.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from .models import Influencer, Participant
+
+logger = logging.getLogger(__name__)
+
+
+class RegistrationQueue:
+    """
+    Bounded queue of pending participants with a background batch writer
+    """
+
+    def __init__(self, max_size, batch_size, flush_interval):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._worker = None
+
+        # Metrics
+        self.accepted = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.failed = 0
+        self.flush_count = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+        self.total_flush_latency = 0.0
+
+    def enqueue(self, participant):
+        """
+        Add an unsaved participant to the queue.
+        Returns False when the queue is full (caller should answer 429).
+        """
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(participant)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            return False
+
+        with self._lock:
+            self.accepted += 1
+        return True
+
+    def _ensure_worker(self):
+        """Start the batch writer thread on first use"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(
+                target=self._run,
+                name='participant-ingest',
+                daemon=True
+            )
+            self._worker.start()
+
+    def _collect_batch(self):
+        """Wait for the first item, then gather until batch_size or the flush deadline"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        """Background loop writing batches to the database"""
+        while True:
+            batch = self._collect_batch()
+            self.flush(batch)
+
+    def flush(self, batch):
+        """Insert a batch of participants with a single bulk_create"""
+        if not batch:
+            return
+
+        close_old_connections()
+        start = time.perf_counter()
+        saved = len(batch)
+        try:
+            # Insert-or-ignore: duplicates of (influencer, phone_normalized) are dropped
+            Participant.objects.bulk_create(batch, batch_size=self.batch_size, ignore_conflicts=True)
+        except Exception as e:
+            # One bad row (e.g. influencer deleted meanwhile) must not drop the batch
+            logger.warning("Participant ingest bulk insert failed, retrying row by row: %s", e)
+            saved = self._save_individually(batch)
+        finally:
+            close_old_connections()
+
+        latency = time.perf_counter() - start
+        with self._lock:
+            self.flushed += saved
+            self.failed += len(batch) - saved
+            self.flush_count += 1
+            self.last_flush_latency = latency
+            self.max_flush_latency = max(self.max_flush_latency, latency)
+            self.total_flush_latency += latency
+
+    def _save_individually(self, batch):
+        """Fallback path: insert rows one at a time, skipping the ones that fail"""
+        saved = 0
+        for participant in batch:
+            try:
+                participant.save(force_insert=True)
+                saved += 1
+            except Exception as e:
+                logger.error("Participant ingest dropped a row for influencer %s: %s", participant.influencer_id, e)
+        return saved
+
+    def drain(self):
+        """Flush everything still queued (used at process exit)"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+        self.flush(batch)
+
+    def metrics(self):
+        """Snapshot of queue depth and flush statistics"""
+        with self._lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'queue_capacity': self._queue.maxsize,
+                'accepted': self.accepted,
+                'rejected': self.rejected,
+                'flushed': self.flushed,
+                'failed': self.failed,
+                'flush_count': self.flush_count,
+                'last_flush_latency_ms': round(self.last_flush_latency * 1000, 3),
+                'max_flush_latency_ms': round(self.max_flush_latency * 1000, 3),
+                'avg_flush_latency_ms': round(
+                    (self.total_flush_latency / self.flush_count) * 1000, 3
+                ) if self.flush_count else 0.0,
+            }
+
+
+_registration_queue = None
+_registration_queue_lock = threading.Lock()
+
+
+def get_registration_queue():
+    """Return the process-wide registration queue, creating it on first use"""
+    global _registration_queue
+    if _registration_queue is None:
+        with _registration_queue_lock:
+            if _registration_queue is None:
+                _registration_queue = RegistrationQueue(
+                    max_size=settings.PARTICIPANT_INGEST_QUEUE_SIZE,
+                    batch_size=settings.PARTICIPANT_INGEST_BATCH_SIZE,
+                    flush_interval=settings.PARTICIPANT_INGEST_FLUSH_MS / 1000.0
+                )
+                atexit.register(_registration_queue.drain)
+    return _registration_queue
+
+
+def get_influencer_id(slug):
+    """
+    Resolve an influencer slug to its id, cached so bursts skip the slug query.
+    Returns None when the slug does not exist.
+    """
+    cache_key = f'influencer_id:{slug}'
+    influencer_id = cache.get(cache_key)
+    if influencer_id is None:
+        influencer_id = Influencer.objects.filter(slug=slug).values_list('id', flat=True).first()
+        if influencer_id is None:
+            return None
+        cache.set(cache_key, influencer_id, settings.PARTICIPANT_INGEST_SLUG_CACHE_TTL)
+    return influencer_id
+
+
+def forget_influencer_id(slug):
+    """Drop the cached id of slug (the influencer was deleted or re-created)"""
+    cache.delete(f'influencer_id:{slug}')
+
+
+def is_ingest_enabled():
+    """Check whether buffered registration is turned on"""
+    return getattr(settings, 'PARTICIPANT_INGEST_ENABLED', False)
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:03
+
+from django.db import migrations, models
+
+from influencers.utils import normalize_phone
+
+BATCH_SIZE = 2000
+
+
+def normalize_and_deduplicate(apps, schema_editor):
+    """
+    Fill phone_normalized and delete duplicate registrations in batches,
+    keeping the earliest registration for each (influencer, phone).
+    """
+    Participant = apps.get_model('influencers', 'Participant')
+    
+    seen = set()
+    last_id = 0
+    
+    # Keyset pagination: each batch is fully read before it is written back
+    while True:
+        batch = list(
+            Participant.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .only('id', 'influencer_id', 'phone')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_id = batch[-1].id
+        
+        to_update = []
+        to_delete = []
+        for participant in batch:
+            phone_normalized = normalize_phone(participant.phone)
+            key = (participant.influencer_id, phone_normalized)
+            
+            if key in seen:
+                to_delete.append(participant.id)
+            else:
+                seen.add(key)
+                participant.phone_normalized = phone_normalized
+                to_update.append(participant)
+        
+        if to_update:
+            Participant.objects.bulk_update(to_update, ['phone_normalized'], batch_size=BATCH_SIZE)
+        if to_delete:
+            Participant.objects.filter(id__in=to_delete).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('influencers', '0002_participant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='phone_normalized',
+            field=models.CharField(blank=True, editable=False, help_text='يستخدم لمنع تكرار التسجيل لنفس المؤثر', max_length=15, null=True, verbose_name='رقم الجوال الموحد'),
+        ),
+        migrations.RunPython(normalize_and_deduplicate, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='participant',
+            constraint=models.UniqueConstraint(fields=('influencer', 'phone_normalized'), name='unique_participant_phone_per_influencer'),
+        ),
+    ]
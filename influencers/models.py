@@ -4,10 +4,11 @@ Influencer models for Dawerha platform
 from django.db import models
 from django.utils import timezone
 from django.core.validators import MinLengthValidator
-from django.utils.text import slugify
+from dawerha.db import save_bumping_version, update_versioned
+from dawerha.slugs import save_with_slug
 import json
-import random
-import string
+from functools import partial
+from .utils import normalize_phone
 
 
 class Influencer(models.Model):
@@ -120,6 +121,12 @@ class Influencer(models.Model):
         null=True,
         verbose_name="تاريخ الموافقة"
     )
+    version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="رقم النسخة",
+        help_text="يزداد مع كل تعديل لاكتشاف التحديثات المتزامنة"
+    )
     
     # Additional Information
     profile_image_url = models.URLField(
@@ -148,25 +155,18 @@ class Influencer(models.Model):
     
     def save(self, *args, **kwargs):
         """Override save to generate unique slug"""
-        if not self.slug:
-            base_slug = slugify(self.name, allow_unicode=False)
-            
-            if not base_slug:
-                base_slug = ''.join(random.choices(string.ascii_lowercase, k=8))
-            
-            unique_slug = base_slug
-            counter = 1
-            
-            while Influencer.objects.filter(slug=unique_slug).exists():
-                random_suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=4))
-                unique_slug = f"{base_slug}-{random_suffix}"
-                counter += 1
-                if counter > 10:
-                    break
-            
-            self.slug = unique_slug
+        write = super().save
+        if not self._state.adding:
+            # Any edit moves the version so a pending approve/reject notices it
+            write = partial(save_bumping_version, self, write)
+            if not self.slug and kwargs.get('update_fields') is not None:
+                # The slug allocated below must be written too
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'slug'}
         
-        super().save(*args, **kwargs)
+        if not self.slug:
+            # Retried with a fresh slug if a concurrent insert takes it first
+            return save_with_slug(self, self.name, lambda: write(*args, **kwargs))
+        return write(*args, **kwargs)
     
     @property
     def final_platform(self):
@@ -180,17 +180,16 @@ class Influencer(models.Model):
         return reverse('game:play', kwargs={'slug': self.slug})
     
     def approve(self):
-        """Approve the influencer"""
-        self.status = 'approved'
-        self.is_active = True
-        self.approved_at = timezone.now()
-        self.save()
+        """
+        Approve the influencer
+        Returns False (nothing written, instance reloaded) if the influencer was
+        changed concurrently since it was loaded
+        """
+        return update_versioned(self, status='approved', is_active=True, approved_at=timezone.now())
     
     def reject(self):
-        """Reject the influencer"""
-        self.status = 'rejected'
-        self.is_active = False
-        self.save()
+        """Reject the influencer (False if it was changed concurrently, see approve)"""
+        return update_versioned(self, status='rejected', is_active=False)
     
     def get_prizes_list(self):
         """Get prizes as a list"""
@@ -241,6 +240,14 @@ class Participant(models.Model):
         max_length=15,
         verbose_name="رقم الجوال"
     )
+    phone_normalized = models.CharField(
+        max_length=15,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="رقم الجوال الموحد",
+        help_text="يستخدم لمنع تكرار التسجيل لنفس المؤثر"
+    )
     social_media_account = models.CharField(
         max_length=200,
         verbose_name="حساب التواصل الاجتماعي",
@@ -259,6 +266,20 @@ class Participant(models.Model):
         verbose_name = "مشارك"
         verbose_name_plural = "المشاركون"
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['influencer', 'phone_normalized'],
+                name='unique_participant_phone_per_influencer'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.influencer.name}"
+    
+    def save(self, *args, **kwargs):
+        """Override save to fill the normalized phone used for duplicate detection"""
+        # Recomputed on every save so an edited phone moves its unique key too
+        self.phone_normalized = normalize_phone(self.phone)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'phone_normalized'}
+        super().save(*args, **kwargs)
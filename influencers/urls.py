@@ -14,7 +14,10 @@ urlpatterns = [
     path('dashboard/<int:influencer_id>/export/', views.export_participants_excel, name='export_participants'),
     path('register-participant/<slug:slug>/', views.register_participant_page, name='register_participant'),
     path('register-participant/<slug:slug>/submit/', views.register_participant, name='register_participant_submit'),
+    path('ingest-metrics/', views.participant_ingest_metrics, name='ingest_metrics'),
     path('play/<slug:slug>/', views.play_wheel_page, name='play_wheel'),
+    path('config/<slug:slug>/', views.wheel_config, name='wheel_config'),
+    path('wheel/<slug:slug>/<str:version>.svg', views.wheel_svg, name='wheel_svg'),
     path('spin/<slug:slug>/', views.spin_wheel, name='spin_wheel'),
     path('participants-count/<slug:slug>/', views.get_participants_count, name='participants_count'),
 ]
@@ -0,0 +1,38 @@
+"""
+Utility functions for influencers app
+"""
+import re
+
+
+def normalize_phone(phone):
+    """
+    Normalize a Saudi mobile number to the local 05XXXXXXXX form
+    Args:
+        phone: raw phone string as entered by the participant
+    Returns:
+        normalized phone string (digits only), used for duplicate detection
+    Examples:
+        "+966 50 123 4567" -> "0501234567"
+        "00966501234567"   -> "0501234567"
+        "501234567"        -> "0501234567"
+    """
+    if not phone:
+        return ''
+    
+    digits = re.sub(r'\D', '', str(phone))
+    
+    # Strip international prefix (00966 / 966)
+    if digits.startswith('00966'):
+        digits = digits[5:]
+    elif digits.startswith('966'):
+        digits = digits[3:]
+    
+    # Add the local leading zero (5XXXXXXXX -> 05XXXXXXXX)
+    if len(digits) == 9 and digits.startswith('5'):
+        digits = '0' + digits
+    
+    # Nothing numeric to normalize: fall back to the trimmed raw value
+    if not digits:
+        return str(phone).strip()[:15]
+    
+    return digits[:15]
@@ -1,8 +1,10 @@
 """
 Views for influencers app
 """
-from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse, HttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import IntegrityError
+from django.http import Http404, JsonResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.views.generic import TemplateView
@@ -13,7 +15,13 @@ from datetime import datetime
 import json
 import random
 import logging
+from dawerha.db_router import use_replica
+from dawerha.idempotency import idempotent
+from game.pagecache import play_page_response
+from game.wheel import influencer_wheel_config, wheel_config_response, wheel_svg_response, wheel_svg_url
 from .models import Influencer, Participant
+from .utils import normalize_phone
+from .ingest import forget_influencer_id, get_influencer_id, get_registration_queue, is_ingest_enabled
 
 logger = logging.getLogger(__name__)
 
@@ -140,7 +148,7 @@ def register_influencer(request):
             })
             
         except Exception as e:
-            logger.error(f"Error creating influencer: {str(e)}")
+            logger.error("Error creating influencer: %s", e)
             return JsonResponse({
                 'success': False,
                 'message': f'حدث خطأ أثناء التسجيل: {str(e)}'
@@ -152,13 +160,14 @@ def register_influencer(request):
             'message': 'خطأ في البيانات المرسلة'
         }, status=400)
     except Exception as e:
-        logger.error(f"Error in register_influencer: {str(e)}")
+        logger.error("Error in register_influencer: %s", e)
         return JsonResponse({
             'success': False,
             'message': f'حدث خطأ: {str(e)}'
         }, status=500)
 
 
+@use_replica
 def influencer_dashboard(request, influencer_id):
     """Influencer dashboard"""
     influencer = get_object_or_404(Influencer, id=influencer_id)
@@ -174,6 +183,7 @@ def influencer_dashboard(request, influencer_id):
     return render(request, 'influencers/dashboard.html', context)
 
 
+@use_replica
 def export_participants_excel(request, influencer_id):
     """Export participants to Excel for a specific influencer"""
     influencer = get_object_or_404(Influencer, id=influencer_id)
@@ -256,52 +266,107 @@ def register_participant_page(request, slug):
     return render(request, 'influencers/register_participant.html', context)
 
 
+def _build_participant(data, influencer_id):
+    """
+    Validate the registration fields
+    Returns (participant, None) or (None, error response)
+    """
+    name = data.get('name', '').strip()
+    phone = data.get('phone', '').strip()
+    social_media_account = data.get('social_media_account', '').strip()
+    city = data.get('city', '').strip()
+    
+    # Validate required fields
+    if not name:
+        error = 'الاسم مطلوب'
+    elif not phone:
+        error = 'رقم الجوال مطلوب'
+    elif not social_media_account:
+        error = 'حساب التواصل الاجتماعي مطلوب'
+    elif not city:
+        error = 'المدينة مطلوبة'
+    else:
+        return Participant(
+            influencer_id=influencer_id,
+            name=name,
+            phone=phone,
+            phone_normalized=normalize_phone(phone),
+            social_media_account=social_media_account,
+            city=city
+        ), None
+    
+    return None, JsonResponse({
+        'success': False,
+        'message': error
+    }, status=400)
+
+
+def _enqueue_participant(participant):
+    """Queue for the batch writer and acknowledge immediately"""
+    if not get_registration_queue().enqueue(participant):
+        return JsonResponse({
+            'success': False,
+            'message': 'الضغط عالٍ حالياً، يرجى المحاولة بعد قليل'
+        }, status=429, headers={'Retry-After': '1'})
+    
+    return JsonResponse({
+        'success': True,
+        'message': 'تم التسجيل بنجاح'
+    }, status=202)
+
+
+def _duplicate_phone_response():
+    return JsonResponse({
+        'success': False,
+        'message': 'رقم الجوال مسجل مسبقاً لهذا السحب'
+    }, status=409)
+
+
+def _influencer_not_found_response():
+    return JsonResponse({
+        'success': False,
+        'message': 'المؤثر غير موجود'
+    }, status=404)
+
+
+def _registration_error_response(e):
+    logger.error("Error in register_participant: %s", e)
+    return JsonResponse({
+        'success': False,
+        'message': f'حدث خطأ: {str(e)}'
+    }, status=500)
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
+@idempotent
 def register_participant(request, slug):
     """Register a new participant"""
     try:
-        influencer = get_object_or_404(Influencer, slug=slug)
-        data = json.loads(request.body)
-        
-        name = data.get('name', '').strip()
-        phone = data.get('phone', '').strip()
-        social_media_account = data.get('social_media_account', '').strip()
-        city = data.get('city', '').strip()
-        
-        # Validate required fields
-        if not name:
-            return JsonResponse({
-                'success': False,
-                'message': 'الاسم مطلوب'
-            }, status=400)
+        influencer_id = get_influencer_id(slug)
+        if influencer_id is None:
+            return _influencer_not_found_response()
+        participant, error = _build_participant(json.loads(request.body), influencer_id)
+        if error:
+            return error
         
-        if not phone:
-            return JsonResponse({
-                'success': False,
-                'message': 'رقم الجوال مطلوب'
-            }, status=400)
+        if is_ingest_enabled():
+            return _enqueue_participant(participant)
         
-        if not social_media_account:
-            return JsonResponse({
-                'success': False,
-                'message': 'حساب التواصل الاجتماعي مطلوب'
-            }, status=400)
-        
-        if not city:
-            return JsonResponse({
-                'success': False,
-                'message': 'المدينة مطلوبة'
-            }, status=400)
-        
-        # Create participant
-        participant = Participant.objects.create(
-            influencer=influencer,
-            name=name,
-            phone=phone,
-            social_media_account=social_media_account,
-            city=city
-        )
+        # Create participant - a single INSERT; the unique (influencer, phone_normalized)
+        # index rejects duplicates without a read-then-write round trip
+        try:
+            participant.save(force_insert=True)
+        except IntegrityError:
+            if Participant.objects.filter(
+                influencer_id=influencer_id, phone_normalized=participant.phone_normalized
+            ).exists():
+                return _duplicate_phone_response()
+            # Not the phone constraint: the cached id may belong to a deleted influencer
+            forget_influencer_id(slug)
+            if not Influencer.objects.filter(pk=influencer_id).exists():
+                return _influencer_not_found_response()
+            raise
         
         return JsonResponse({
             'success': True,
@@ -314,11 +379,19 @@ def register_participant(request, slug):
             'message': 'خطأ في البيانات المرسلة'
         }, status=400)
     except Exception as e:
-        logger.error(f"Error in register_participant: {str(e)}")
-        return JsonResponse({
-            'success': False,
-            'message': f'حدث خطأ: {str(e)}'
-        }, status=500)
+        return _registration_error_response(e)
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def participant_ingest_metrics(request):
+    """Queue depth and flush latency of the buffered registration pipeline"""
+    metrics = get_registration_queue().metrics()
+    metrics['enabled'] = is_ingest_enabled()
+    return JsonResponse({
+        'success': True,
+        'metrics': metrics
+    })
 
 
 def play_wheel_page(request, slug):
@@ -336,27 +409,87 @@ def play_wheel_page(request, slug):
         'prizes': prizes,
         'colors': colors,
         'participants_count': participants_count,
+        'wheel_svg_url': wheel_svg_url(
+            'influencers:wheel_svg', influencer.slug, prizes, colors, influencer.profile_image_url
+        ),
     }
     
-    return render(request, 'influencers/play_wheel.html', context)
+    return play_page_response(request, render(request, 'influencers/play_wheel.html', context).content)
+
+
+@require_http_methods(["GET", "HEAD"])
+def wheel_config(request, slug):
+    """Wheel configuration (prizes, colors, image) as cacheable JSON"""
+    influencer = get_object_or_404(Influencer, slug=slug)
+    return wheel_config_response(request, influencer_wheel_config(influencer))
+
+
+@require_http_methods(["GET", "HEAD"])
+def wheel_svg(request, slug, version):
+    """Pre-rendered wheel for the play page, cached per configuration version"""
+    influencer = get_object_or_404(Influencer, slug=slug)
+    prizes, colors = influencer.get_prizes_list(), influencer.get_colors_list()
+    current_url = wheel_svg_url('influencers:wheel_svg', slug, prizes, colors, influencer.profile_image_url)
+    return wheel_svg_response(prizes, colors, influencer.profile_image_url, version, current_url)
+
+
+def _participants_count_error_response(e):
+    logger.error("Error getting participants count: %s", e)
+    return JsonResponse({
+        'success': False,
+        'message': f'حدث خطأ: {str(e)}'
+    }, status=500)
 
 
 @require_http_methods(["GET"])
 def get_participants_count(request, slug):
     """Get current participants count"""
     try:
-        influencer = get_object_or_404(Influencer, slug=slug)
-        count = influencer.participants.count()
+        influencer_id = get_influencer_id(slug)
+        if influencer_id is None:
+            raise Http404
+        count = Participant.objects.filter(influencer_id=influencer_id).count()
         return JsonResponse({
             'success': True,
             'count': count
         })
     except Exception as e:
-        logger.error(f"Error getting participants count: {str(e)}")
-        return JsonResponse({
-            'success': False,
-            'message': f'حدث خطأ: {str(e)}'
-        }, status=500)
+        return _participants_count_error_response(e)
+
+
+def _spin_error_response(message, status):
+    return JsonResponse({
+        'success': False,
+        'message': message
+    }, status=status)
+
+
+def _spin_result_response(selected_prize, winner):
+    """Spin response with the winner's phone and account partly hidden"""
+    # Encrypt phone (hide last 4 digits, show first part)
+    phone_encrypted = winner.phone
+    if phone_encrypted and len(phone_encrypted) > 4:
+        phone_encrypted = phone_encrypted[:-4] + '****'
+    elif phone_encrypted and len(phone_encrypted) <= 4:
+        phone_encrypted = '****'
+    
+    # Encrypt social media account (hide last 3 characters, show first part)
+    social_encrypted = winner.social_media_account
+    if social_encrypted and len(social_encrypted) > 3:
+        social_encrypted = social_encrypted[:-3] + '***'
+    elif social_encrypted and len(social_encrypted) <= 3:
+        social_encrypted = '***'
+    
+    return JsonResponse({
+        'success': True,
+        'prize': selected_prize,
+        'winner': {
+            'name': winner.name,
+            'phone': phone_encrypted,  # Encrypted for display
+            'social_media_account': social_encrypted,  # Encrypted for display
+            'city': winner.city
+        }
+    })
 
 
 @csrf_exempt
@@ -368,63 +501,27 @@ def spin_wheel(request, slug):
         
         # Check if influencer is active
         if not influencer.is_active:
-            return JsonResponse({
-                'success': False,
-                'message': 'المؤثر غير مفعل حالياً'
-            }, status=403)
-        
-        # Get all participants
-        participants = influencer.participants.all()
+            return _spin_error_response('المؤثر غير مفعل حالياً', 403)
         
-        if not participants.exists():
-            return JsonResponse({
-                'success': False,
-                'message': 'لا يوجد مسجلين بعد'
-            }, status=400)
+        # Count participants; only the winner row is loaded
+        participants = influencer.participants.order_by('pk')
+        participants_count = participants.count()
+        if not participants_count:
+            return _spin_error_response('لا يوجد مسجلين بعد', 400)
         
-        # Get prizes
         prizes = influencer.get_prizes_list()
-        
         if not prizes:
-            return JsonResponse({
-                'success': False,
-                'message': 'لا توجد جوائز متاحة'
-            }, status=400)
+            return _spin_error_response('لا توجد جوائز متاحة', 400)
         
-        # Select random prize
+        # Select random prize and random participant (winner)
         selected_prize = random.choice(prizes)
+        winner = participants[random.randrange(participants_count):].first()
+        if winner is None:
+            # Participants were removed meanwhile
+            return _spin_error_response('لا يوجد مسجلين بعد', 400)
         
-        # Select random participant (winner)
-        winner = random.choice(list(participants))
-        
-        # Encrypt phone (hide last 4 digits, show first part)
-        phone_encrypted = winner.phone
-        if phone_encrypted and len(phone_encrypted) > 4:
-            phone_encrypted = phone_encrypted[:-4] + '****'
-        elif phone_encrypted and len(phone_encrypted) <= 4:
-            phone_encrypted = '****'
-        
-        # Encrypt social media account (hide last 3 characters, show first part)
-        social_encrypted = winner.social_media_account
-        if social_encrypted and len(social_encrypted) > 3:
-            social_encrypted = social_encrypted[:-3] + '***'
-        elif social_encrypted and len(social_encrypted) <= 3:
-            social_encrypted = '***'
-        
-        return JsonResponse({
-            'success': True,
-            'prize': selected_prize,
-            'winner': {
-                'name': winner.name,
-                'phone': phone_encrypted,  # Encrypted for display
-                'social_media_account': social_encrypted,  # Encrypted for display
-                'city': winner.city
-            }
-        })
+        return _spin_result_response(selected_prize, winner)
         
     except Exception as e:
-        logger.error(f"Error in spin_wheel: {str(e)}")
-        return JsonResponse({
-            'success': False,
-            'message': f'حدث خطأ: {str(e)}'
-        }, status=500)
+        logger.error("Error in spin_wheel: %s", e)
+        return _spin_error_response(f'حدث خطأ: {str(e)}', 500)
@@ -2,16 +2,42 @@
 
 # Gunicorn configuration for Dawerha project
 # Run this script to start the production server
+#
+# SERVER_MODE=asgi runs uvicorn workers (dawerha.asgi) for hosts that need an
+# ASGI entry point. It is not a performance mode: the views are sync, so each
+# request goes through a sync_to_async thread hop and throughput is lower than
+# the default threaded WSGI setup.
 
 # Set environment variables
 export DJANGO_SETTINGS_MODULE=dawerha.production_settings
 
+# Worker sizing; production_settings sizes the optional DB pool from WEB_THREADS
+export WEB_WORKERS=${WEB_WORKERS:-3}
+export WEB_THREADS=${WEB_THREADS:-2}
+export SERVER_MODE=${SERVER_MODE:-wsgi}
+
+if [ "$SERVER_MODE" = "asgi" ]; then
+    # Start Gunicorn with uvicorn workers
+    exec gunicorn \
+        --bind 0.0.0.0:8000 \
+        --workers "$WEB_WORKERS" \
+        --worker-class uvicorn_worker.UvicornWorker \
+        --max-requests 1000 \
+        --max-requests-jitter 100 \
+        --timeout 30 \
+        --keep-alive 2 \
+        --log-level info \
+        --access-logfile - \
+        --error-logfile - \
+        dawerha.asgi:application
+fi
+
 # Start Gunicorn
 exec gunicorn \
     --bind 0.0.0.0:8000 \
-    --workers 3 \
+    --workers "$WEB_WORKERS" \
     --worker-class gthread \
-    --threads 2 \
+    --threads "$WEB_THREADS" \
     --worker-connections 1000 \
     --max-requests 1000 \
     --max-requests-jitter 100 \
@@ -22,4 +48,3 @@ exec gunicorn \
     --access-logfile - \
     --error-logfile - \
     dawerha.wsgi:application
-
@@ -22,7 +22,62 @@
         }
     };
     
+    // Render simulated counts for each horizon (100 / 1,000 / 10,000 spins)
+    function renderSimulation(data) {
+        let html = '';
+        data.results.forEach(function(result) {
+            html += '<h4 style="margin: 10px 0 5px; color: #6A3FA0;">بعد ' + result.spins.toLocaleString() + ' دورة</h4>';
+            html += '<table style="width: 100%; border-collapse: collapse; font-size: 13px;">';
+            html += '<thead><tr style="background: #f0ebf7;">' +
+                '<th style="padding: 6px; text-align: right; border: 1px solid #ddd;">الجائزة</th>' +
+                '<th style="padding: 6px; border: 1px solid #ddd;">المتوقع</th>' +
+                '<th style="padding: 6px; border: 1px solid #ddd;">النطاق (95%)</th>' +
+                '<th style="padding: 6px; border: 1px solid #ddd;">احتمال ≥ ' + data.at_least + '</th>' +
+                '</tr></thead><tbody>';
+            result.prizes.forEach(function(prize, i) {
+                html += '<tr>' +
+                    '<td style="padding: 6px; border: 1px solid #ddd;">' + $('<span>').text(data.prizes[i]).html() + '</td>' +
+                    '<td style="padding: 6px; border: 1px solid #ddd; text-align: center;">' + prize.expected + '</td>' +
+                    '<td style="padding: 6px; border: 1px solid #ddd; text-align: center;">' + prize.low + ' - ' + prize.high + '</td>' +
+                    '<td style="padding: 6px; border: 1px solid #ddd; text-align: center;">' + (prize.p_at_least * 100).toFixed(1) + '%</td>' +
+                    '</tr>';
+            });
+            html += '</tbody></table>';
+        });
+        $('#prize-simulation-results').html(html);
+    }
+    
+    window.runPrizeSimulation = function() {
+        let container = $('#prize-simulation');
+        if (!container.length) {
+            return;
+        }
+        
+        let weights = [];
+        $('input[name^="prize_percentage_"]').each(function() {
+            weights.push(parseFloat($(this).val()) || 0);
+        });
+        
+        let results = $('#prize-simulation-results');
+        results.html('<span style="color: #666;">⏳ جاري المحاكاة...</span>');
+        
+        $.getJSON(container.data('url'), {
+            weights: weights.join(','),
+            at_least: $('#prize-simulation-at-least').val() || 1
+        }).done(function(data) {
+            renderSimulation(data);
+        }).fail(function(xhr) {
+            let message = (xhr.responseJSON && xhr.responseJSON.message) || 'فشل تشغيل المحاكاة';
+            results.html($('<span style="color: #dc3545;">').text('❌ ' + message));
+        });
+    };
+    
     $(document).ready(function() {
+        $(document).on('click', '#prize-simulation-run', function() {
+            window.runPrizeSimulation();
+        });
+        
+
         // Update total on input change
         $(document).on('input change', 'input[name^="prize_percentage_"]', function() {
             window.updateTotalPercentage();
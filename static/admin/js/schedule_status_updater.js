@@ -1,99 +1,140 @@
 (function($) {
     'use strict';
-    
-    // Make updateScheduleStatus globally available
-    window.updateScheduleStatus = function(scheduleId) {
-        const statusElement = document.getElementById('schedule-status-' + scheduleId);
-        if (!statusElement) return;
-        
-        // Get status URL
-        const statusUrl = '/companies/admin/schedule-status/' + scheduleId + '/';
-        
-        // Make AJAX request
+
+    // Batched status endpoint (rendered by the admin into data-status-url)
+    const DEFAULT_STATUS_URL = '/schedule-status/';
+
+    // ETag of the last response, sent back as If-None-Match so unchanged state returns 304
+    let lastEtag = null;
+
+    // Avoid overlapping requests when the network is slow
+    let requestInFlight = false;
+
+    // Debounce timer for window.updateScheduleStatus calls
+    let pendingRefresh = null;
+
+    function getStatusElements() {
+        return document.querySelectorAll('[id^="schedule-status-"]');
+    }
+
+    function renderStatus(statusElement, data) {
+        // Update status display
+        let displayText = '';
+        let color = data.color;
+
+        if (!data.schedule_active) {
+            displayText = '⏸️ الجدولة متوقفة';
+            color = '#dc3545';
+        } else if (data.is_active) {
+            displayText = '✅ ' + data.display;
+            color = data.color;
+        } else if (data.should_activate_soon) {
+            displayText = '⏳ جاهز للتفعيل (ضمن النطاق)';
+            color = '#ffc107';
+        } else {
+            displayText = '⏳ ' + data.display + ' - خارج نطاق الجدولة';
+            color = '#6c757d';
+        }
+
+        statusElement.textContent = displayText;
+        statusElement.style.color = color;
+        if (data.is_active) {
+            statusElement.style.fontWeight = 'bold';
+        } else {
+            statusElement.style.fontWeight = 'normal';
+        }
+    }
+
+    // Fetch the status of every schedule on the page in one request
+    function updateAllSchedules() {
+        const statusElements = getStatusElements();
+        if (!statusElements.length || requestInFlight) return;
+
+        const elementsById = {};
+        statusElements.forEach(function(element) {
+            const scheduleId = element.id.replace('schedule-status-', '');
+            if (scheduleId) {
+                elementsById[scheduleId] = element;
+            }
+        });
+
+        const scheduleIds = Object.keys(elementsById).sort();
+        if (!scheduleIds.length) return;
+
+        const baseUrl = statusElements[0].dataset.statusUrl || DEFAULT_STATUS_URL;
+        const statusUrl = baseUrl + '?ids=' + scheduleIds.join(',');
+
+        const headers = {
+            'X-Requested-With': 'XMLHttpRequest',
+        };
+        if (lastEtag) {
+            headers['If-None-Match'] = lastEtag;
+        }
+
+        requestInFlight = true;
         fetch(statusUrl, {
             method: 'GET',
-            headers: {
-                'X-Requested-With': 'XMLHttpRequest',
-            },
+            headers: headers,
             credentials: 'same-origin'
         })
-        .then(response => response.json())
+        .then(response => {
+            if (response.status === 304) {
+                return null; // Nothing changed since the last poll
+            }
+            lastEtag = response.headers.get('ETag');
+            return response.json();
+        })
         .then(data => {
-            if (data.success) {
-                // Update status display
-                let displayText = '';
-                let color = data.color;
-                
-                if (!data.schedule_active) {
-                    displayText = '⏸️ الجدولة متوقفة';
-                    color = '#dc3545';
-                } else if (data.is_active) {
-                    displayText = '✅ ' + data.display;
-                    color = data.color;
-                } else if (data.should_activate_soon) {
-                    displayText = '⏳ جاهز للتفعيل (ضمن النطاق)';
-                    color = '#ffc107';
-                } else {
-                    displayText = '⏳ ' + data.display + ' - خارج نطاق الجدولة';
-                    color = '#6c757d';
-                }
-                
-                statusElement.textContent = displayText;
-                statusElement.style.color = color;
-                if (data.is_active) {
-                    statusElement.style.fontWeight = 'bold';
-                } else {
-                    statusElement.style.fontWeight = 'normal';
+            if (!data || !data.success) return;
+
+            Object.keys(data.schedules).forEach(function(scheduleId) {
+                const statusElement = elementsById[scheduleId];
+                if (statusElement) {
+                    renderStatus(statusElement, data.schedules[scheduleId]);
                 }
-            }
+            });
         })
         .catch(error => {
             console.error('Error updating schedule status:', error);
+        })
+        .finally(() => {
+            requestInFlight = false;
         });
+    }
+
+    // Kept for other admin scripts: any single-schedule refresh triggers one batched request
+    window.updateScheduleStatus = function(scheduleId) {
+        if (pendingRefresh) return;
+        pendingRefresh = setTimeout(function() {
+            pendingRefresh = null;
+            lastEtag = null; // Force a full response
+            updateAllSchedules();
+        }, 50);
     };
-    
-    // Track which schedules are already being updated to avoid duplicates
-    const updatingSchedules = new Set();
-    
-    // Function to add updates for a specific schedule
-    function addScheduleUpdate(scheduleId) {
-        if (updatingSchedules.has(scheduleId)) {
-            return; // Already updating this schedule
-        }
-        
-        updatingSchedules.add(scheduleId);
-        
+
+    let pollingStarted = false;
+
+    function startStatusUpdates() {
+        if (pollingStarted || !getStatusElements().length) return;
+        pollingStarted = true;
+
         // Update immediately
-        updateScheduleStatus(scheduleId);
-        
+        updateAllSchedules();
+
         // Update every 5 seconds
-        setInterval(function() {
-            updateScheduleStatus(scheduleId);
-        }, 5000);
-    }
-    
-    // Modify startStatusUpdates to use addScheduleUpdate
-    function startStatusUpdates() {
-        const statusElements = document.querySelectorAll('[id^="schedule-status-"]');
-        
-        statusElements.forEach(function(element) {
-            const scheduleId = element.id.replace('schedule-status-', '');
-            if (scheduleId && !updatingSchedules.has(scheduleId)) {
-                addScheduleUpdate(scheduleId);
-            }
-        });
+        setInterval(updateAllSchedules, 5000);
     }
-    
+
     // Start updates when DOM is ready
     if (document.readyState === 'loading') {
         document.addEventListener('DOMContentLoaded', startStatusUpdates);
     } else {
         startStatusUpdates();
     }
-    
+
     // Also start after page changes (for admin changelist pagination, etc.)
     $(document).on('DOMNodeInserted', function() {
         startStatusUpdates();
     });
-    
+
 })(django.jQuery);